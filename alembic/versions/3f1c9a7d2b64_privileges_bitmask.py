@@ -0,0 +1,126 @@
+"""privileges bitmask
+
+Revision ID: 3f1c9a7d2b64
+Revises: be751c2087e1
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7d2b64'
+down_revision: Union[str, None] = 'be751c2087e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 5000
+
+# Bit layout and defaults as of this revision, inlined so later changes to
+# app.constants.UserPrivilege or the schema cannot alter what it writes.
+# Missing keys used to fall back to the TelegramUserPermissions defaults,
+# where only can_be_edited is True.
+PRIVILEGES = {
+    'is_member': (1 << 0, False),
+    'can_send_messages': (1 << 1, False),
+    'can_send_audios': (1 << 2, False),
+    'can_send_documents': (1 << 3, False),
+    'can_send_photos': (1 << 4, False),
+    'can_send_videos': (1 << 5, False),
+    'can_send_video_notes': (1 << 6, False),
+    'can_send_voice_notes': (1 << 7, False),
+    'can_send_polls': (1 << 8, False),
+    'can_send_other_messages': (1 << 9, False),
+    'can_add_web_page_previews': (1 << 10, False),
+    'can_change_info': (1 << 11, False),
+    'can_invite_users': (1 << 12, False),
+    'can_pin_messages': (1 << 13, False),
+    'can_manage_topics': (1 << 14, False),
+    'can_be_edited': (1 << 15, True),
+    'can_restrict_members': (1 << 16, False),
+    'can_delete_messages': (1 << 17, False),
+}
+DEFAULT_MASK = sum(bit for bit, default in PRIVILEGES.values() if default)
+
+association = sa.table(
+    'telegram_user_chat_association',
+    sa.column('id', sa.CHAR(36)),
+    sa.column('privileges', mysql.JSON()),
+    sa.column('privileges_mask', sa.Integer()),
+)
+
+
+def _to_mask(privileges) -> int:
+    if isinstance(privileges, str):
+        privileges = json.loads(privileges)
+    privileges = privileges or {}
+    mask = 0
+    for name, (bit, default) in PRIVILEGES.items():
+        value = privileges.get(name)
+        if value if value is not None else default:
+            mask |= bit
+    return mask
+
+
+def _from_mask(mask: int) -> dict:
+    return {name: bool(mask & bit) for name, (bit, _) in PRIVILEGES.items()}
+
+
+def upgrade() -> None:
+    op.add_column('telegram_user_chat_association',
+        sa.Column('privileges_mask', sa.Integer(), nullable=False, server_default=str(DEFAULT_MASK))
+    )
+
+    connection = op.get_bind()
+    offset = 0
+    while True:
+        rows = connection.execute(
+            sa.select(association.c.id, association.c.privileges)
+            .order_by(association.c.id).limit(BATCH_SIZE).offset(offset)
+        ).all()
+        if not rows:
+            break
+        # Empty rows and rows matching the defaults keep the server default.
+        masks = ((row.id, _to_mask(row.privileges)) for row in rows)
+        updates = [
+            {'row_id': row_id, 'privileges_mask': mask}
+            for row_id, mask in masks if mask != DEFAULT_MASK
+        ]
+        if updates:
+            connection.execute(
+                association.update().where(association.c.id == sa.bindparam('row_id')),
+                updates
+            )
+        offset += BATCH_SIZE
+
+    op.drop_column('telegram_user_chat_association', 'privileges')
+
+
+def downgrade() -> None:
+    op.add_column('telegram_user_chat_association',
+        sa.Column('privileges', mysql.JSON(), nullable=True)
+    )
+
+    connection = op.get_bind()
+    offset = 0
+    while True:
+        rows = connection.execute(
+            sa.select(association.c.id, association.c.privileges_mask)
+            .order_by(association.c.id).limit(BATCH_SIZE).offset(offset)
+        ).all()
+        if not rows:
+            break
+        connection.execute(
+            association.update().where(association.c.id == sa.bindparam('row_id')),
+            [{'row_id': row.id, 'privileges': _from_mask(row.privileges_mask)} for row in rows]
+        )
+        offset += BATCH_SIZE
+
+    op.alter_column('telegram_user_chat_association', 'privileges',
+        existing_type=mysql.JSON(), nullable=False
+    )
+    op.drop_column('telegram_user_chat_association', 'privileges_mask')
@@ -0,0 +1,97 @@
+from typing import TYPE_CHECKING, List, Optional, Sequence
+from app.embeddings import normalize_rows
+from app.lazy import lazy_import
+
+if TYPE_CHECKING:
+    import numpy
+
+np = lazy_import("numpy")
+
+_CHUNK_ROWS = 8192
+
+
+class IVFIndex:
+    # Inverted-file index over unit vectors: spherical k-means centroids, each
+    # owning the row ids closest to it. A query probes the nprobe closest
+    # lists and the caller re-ranks those candidates exactly.
+    def __init__(self, centroids: "numpy.ndarray", assignments: "numpy.ndarray", nprobe: int = 8):
+        self.centroids = normalize_rows(centroids)
+        self.nprobe = min(nprobe, len(self.centroids))
+        self.lists: List[List[int]] = [[] for _ in range(len(self.centroids))]
+        for row, centroid in enumerate(assignments.tolist()):
+            self.lists[centroid].append(row)
+        self._arrays: List[Optional["numpy.ndarray"]] = [None] * len(self.lists)
+
+    def __len__(self) -> int:
+        return sum(len(ids) for ids in self.lists)
+
+    @classmethod
+    def build(
+        cls,
+        vectors: "numpy.ndarray",
+        n_lists: Optional[int] = None,
+        nprobe: int = 8,
+        iterations: int = 12,
+        seed: int = 0,
+    ) -> "IVFIndex":
+        vectors = normalize_rows(vectors)
+        n_lists = n_lists or max(1, int(4 * len(vectors) ** 0.5))
+        n_lists = min(n_lists, len(vectors))
+        rng = np.random.default_rng(seed)
+
+        sample = vectors
+        if len(vectors) > 256 * n_lists:
+            sample = vectors[rng.choice(len(vectors), 256 * n_lists, replace=False)]
+
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            labels = _nearest(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            empty = np.bincount(labels, minlength=n_lists) == 0
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+            centroids = normalize_rows(sums)
+
+        return cls(centroids, _nearest(vectors, centroids), nprobe)
+
+    def add(self, vectors: "numpy.ndarray", start: int) -> None:
+        for offset, centroid in enumerate(_nearest(normalize_rows(vectors), self.centroids).tolist()):
+            self.lists[centroid].append(start + offset)
+            self._arrays[centroid] = None
+
+    def candidates(self, query: "numpy.ndarray") -> "numpy.ndarray":
+        scores = self.centroids @ query
+        if self.nprobe < len(scores):
+            probe = np.argpartition(-scores, self.nprobe - 1)[:self.nprobe]
+        else:
+            probe = range(len(scores))
+        return np.concatenate([self._ids(int(centroid)) for centroid in probe])
+
+    def _ids(self, centroid: int) -> "numpy.ndarray":
+        ids = self._arrays[centroid]
+        if ids is None:
+            ids = self._arrays[centroid] = np.asarray(self.lists[centroid], dtype=np.int64)
+        return ids
+
+    def save(self, path: str, words: Sequence[str]) -> None:
+        assignments = np.empty(len(self), dtype=np.int32)
+        for centroid, ids in enumerate(self.lists):
+            assignments[ids] = centroid
+        np.savez(path, centroids=self.centroids, assignments=assignments, words=np.asarray(list(words)))
+
+    @classmethod
+    def load(cls, path: str, words: Sequence[str], nprobe: int = 8) -> Optional["IVFIndex"]:
+        try:
+            data = np.load(path, allow_pickle=False)
+        except FileNotFoundError:
+            return None
+        if data["words"].tolist() != list(words):
+            return None
+        return cls(data["centroids"], data["assignments"], nprobe)
+
+
+def _nearest(vectors: "numpy.ndarray", centroids: "numpy.ndarray") -> "numpy.ndarray":
+    labels = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), _CHUNK_ROWS):
+        labels[start:start + _CHUNK_ROWS] = (vectors[start:start + _CHUNK_ROWS] @ centroids.T).argmax(axis=1)
+    return labels
@@ -1,88 +1,254 @@
-import numpy as np
+import json
 import pickle
 from functools import lru_cache
 import re
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+from app.ann import IVFIndex
+from app.canonical import canonicalize
+from app.config import (
+    SUBWORD_TABLE_PATH, TOXIC_INDEX_PATH, TOXIC_MODEL_GLOB, TOXIC_MODEL_PATH, TOXIC_MODEL_QUANTIZATION,
+    TOXIC_VALIDATION_PATH
+)
+from app.constants import (
+    SUBWORD_BUCKETS, SUBWORD_CACHE_SIZE, SUBWORD_MIN_WORD_LENGTH, TOXIC_INDEX_MIN_SIZE, TOXIC_INDEX_NPROBE,
+    TOXIC_MODEL_POLL_INTERVAL, TOXIC_OVERLAY_CACHE_SIZE, TOXIC_RELOAD_MIN_ACCURACY, TOXIC_RELOAD_SELF_CHECK_WORDS
+)
+from app.embeddings import EmbeddingStore, build_store
+from app.fingerprint import duplicate_index
+from app.model_registry import ModelRegistry
+from app.subword import SubwordTable
+from app.lazy import lazy_import
+
+np = lazy_import("numpy")
 
 def _clean_text(text: str) -> str:
     text = re.sub(r'[^a-zA-Zа-яА-ЯіІїЇєЄґҐ\s]', ' ', text.lower())
     return ' '.join(text.split())
 
 
-def cosine_similarity_numpy(v1: np.ndarray, v2: np.ndarray) -> float:
-    """
-    Вычисляет косинусное сходство между двумя векторами используя numpy.
-    
-    Args:
-        v1, v2: numpy массивы любой формы
-        
-    Returns:
-        float: Косинусное сходство в диапазоне [-1, 1]
-    """
-    v1 = np.asarray(v1, dtype=np.float64)
-    v2 = np.asarray(v2, dtype=np.float64)
-    
-    v1_flat = v1.reshape(-1)
-    v2_flat = v2.reshape(-1)
-    
-    if len(v1_flat) != len(v2_flat):
-        raise ValueError(f"Vectors must have the same length, got {len(v1_flat)} and {len(v2_flat)}")
-    
-    eps = 1e-8
-    
-    dot_product = np.dot(v1_flat, v2_flat)
-    norm_v1 = np.linalg.norm(v1_flat)
-    norm_v2 = np.linalg.norm(v2_flat)
-    
-    if norm_v1 < eps or norm_v2 < eps:
-        return 0.0
-        
-    return float(dot_product / (norm_v1 * norm_v2))
+class ToxicOverlay:
+    # A chat's extra toxic words: a handful of rows encoded against the shared
+    # store and scored next to the base table, which is never copied.
+    __slots__ = ("words", "table", "lexicon")
+
+    def __init__(self, words: List[str], table: Optional[Any], lexicon: FrozenSet[str]):
+        self.words = words
+        self.table = table
+        self.lexicon = lexicon
+
+
+class ToxicityModel:
+    __slots__ = (
+        "store", "toxic_words", "toxic_table", "threshold", "index", "subwords", "_oov_query", "_overlay"
+    )
+
+    def __init__(self, store: EmbeddingStore, toxic_embeddings: Dict[str, "np.ndarray"], threshold: float):
+        self._setup(store, list(toxic_embeddings), store.encode(_stack(toxic_embeddings.values())), threshold)
+
+    @classmethod
+    def from_table(cls, store: EmbeddingStore, toxic_words: List[str], toxic_table: Any, threshold: float) -> "ToxicityModel":
+        model = cls.__new__(cls)
+        model._setup(store, list(toxic_words), toxic_table, threshold)
+        return model
+
+    def _setup(self, store: EmbeddingStore, toxic_words: List[str], toxic_table: Any, threshold: float) -> None:
+        self.store = store
+        self.toxic_words = toxic_words
+        self.toxic_table = toxic_table
+        self.threshold = threshold
+        self.index: Optional[IVFIndex] = None
+        self.subwords: Optional[SubwordTable] = None
+        self._oov_query = lru_cache(maxsize=SUBWORD_CACHE_SIZE)(self._build_oov_query)
+        self._overlay = lru_cache(maxsize=TOXIC_OVERLAY_CACHE_SIZE)(self._build_overlay)
+
+    def _build_oov_query(self, word: str) -> Optional[Any]:
+        if self.subwords is None or len(word) < SUBWORD_MIN_WORD_LENGTH:
+            return None
+        vector = self.subwords.vector(word)
+        return None if vector is None else self.store.make_query(vector)
+
+    @property
+    def nbytes(self) -> int:
+        table = self.toxic_table if isinstance(self.toxic_table, tuple) else (self.toxic_table,)
+        subwords = self.subwords.nbytes if self.subwords is not None else 0
+        return self.store.nbytes + sum(part.nbytes for part in table) + subwords
+
+    def _query(self, word: str) -> Optional[Any]:
+        query = self.store.lookup(word)
+        return self._oov_query(word) if query is None else query
+
+    def _build_overlay(self, words: Tuple[str, ...]) -> ToxicOverlay:
+        lexicon = dict.fromkeys(_clean_text(canonicalize(" ".join(words))).split())
+        known, vectors = [], []
+        for word in lexicon:
+            query = self._query(word)
+            if query is not None:
+                known.append(word)
+                vectors.append(self.store.as_float(query))
+        table = self.store.encode(_stack(vectors)) if vectors else None
+        return ToxicOverlay(known, table, frozenset(lexicon))
+
+    def overlay(self, words: Tuple[str, ...]) -> ToxicOverlay:
+        # Keyed by the word tuple, so chats with the same overlay share it.
+        return self._overlay(words)
+
+    def best_match(self, word: str, overlay: Optional[ToxicOverlay] = None) -> Optional[Tuple[float, str]]:
+        query = self._query(word)
+        if query is None:
+            return None
+
+        match = self._base_match(query)
+        if overlay is not None and overlay.table is not None:
+            similarities = self.store.score(query, overlay.table)
+            best = int(similarities.argmax())
+            if match is None or float(similarities[best]) > match[0]:
+                match = float(similarities[best]), overlay.words[best]
+        return match
+
+    def _base_match(self, query: Any) -> Optional[Tuple[float, str]]:
+        if self.index is None:
+            rows, table = None, self.toxic_table
+        else:
+            rows = self.index.candidates(self.store.as_float(query))
+            if not len(rows):
+                return None
+            table = self.store.take(self.toxic_table, rows)
+
+        similarities = self.store.score(query, table)
+        best = int(similarities.argmax())
+        similarity = float(similarities[best])
+        if rows is not None:
+            best = int(rows[best])
+        return similarity, self.toxic_words[best]
+
+    def add_toxic_words(self, toxic_embeddings: Dict[str, "np.ndarray"]) -> None:
+        known = set(self.toxic_words)
+        toxic_embeddings = {word: vector for word, vector in toxic_embeddings.items() if word not in known}
+        if not toxic_embeddings:
+            return
+        vectors = _stack(toxic_embeddings.values())
+        start = len(self.toxic_words)
+        self.toxic_table = self.store.append(self.toxic_table, vectors)
+        self.toxic_words.extend(toxic_embeddings)
+        if self.index is not None:
+            self.index.add(vectors, start)
+
+
+def _stack(vectors) -> "np.ndarray":
+    return np.stack([np.asarray(vector, dtype=np.float32).reshape(-1) for vector in vectors])
 
-@lru_cache(maxsize=1)
-def _get_cached_model():
+
+def build_toxic_index(toxic_embeddings: Dict[str, "np.ndarray"], path: Optional[str] = TOXIC_INDEX_PATH) -> IVFIndex:
+    index = IVFIndex.build(_stack(toxic_embeddings.values()), nprobe=TOXIC_INDEX_NPROBE)
+    if path:
+        index.save(path, list(toxic_embeddings))
+    return index
+
+
+def build_subword_table(keyed_vectors: Any, path: Optional[str] = SUBWORD_TABLE_PATH) -> SubwordTable:
+    table = SubwordTable.build(keyed_vectors.key_to_index, keyed_vectors.vectors, SUBWORD_BUCKETS)
+    if path:
+        table.save(path)
+    return table
+
+
+def load_toxicity_model(path: str = TOXIC_MODEL_PATH, quantization: str = TOXIC_MODEL_QUANTIZATION) -> ToxicityModel:
     try:
-        with open('./app/data/toxic_detector_improved_03.pkl', 'rb') as f:
-            return pickle.load(f)
+        with open(path, 'rb') as f:
+            data = pickle.load(f)
     except FileNotFoundError:
         raise Exception("Model file not found. Please run training first.")
+
+    store = build_store(data['model'].wv, quantization)
+    toxic_embeddings = data['toxic_embeddings']
+    model = ToxicityModel(store, toxic_embeddings, data['threshold'])
+    subwords = SubwordTable.load(SUBWORD_TABLE_PATH)
+    # A table built for a previous model may not match a retrained one.
+    if subwords is not None and subwords.vectors.shape[1] == data['model'].wv.vector_size:
+        model.subwords = subwords
+    if len(toxic_embeddings) >= TOXIC_INDEX_MIN_SIZE:
+        model.index = IVFIndex.load(TOXIC_INDEX_PATH, model.toxic_words, TOXIC_INDEX_NPROBE) \
+            or build_toxic_index(toxic_embeddings, path=None)
+    return model
+
+
+def validate_toxicity_model(model: ToxicityModel, path: str = TOXIC_VALIDATION_PATH) -> Tuple[bool, str]:
+    step = max(1, len(model.toxic_words) // TOXIC_RELOAD_SELF_CHECK_WORDS)
+    words = model.toxic_words[::step]
+    matched = 0
+    for word in words:
+        match = model.best_match(word)
+        matched += match is not None and match[0] > model.threshold
+    self_check = matched / max(1, len(words))
+    report = f"self-check {self_check:.1%} of {len(words)} toxic words"
+    if self_check < TOXIC_RELOAD_MIN_ACCURACY:
+        return False, report
+
+    try:
+        with open(path, encoding="utf-8") as f:
+            sample = [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return True, report
+    correct = sum(
+        is_toxic_canonical(canonicalize(row["text"]), model=model)[0] == bool(row["label"]) for row in sample
+    )
+    accuracy = correct / max(1, len(sample))
+    report += f", accuracy {accuracy:.1%} on {len(sample)} labelled messages"
+    return accuracy >= TOXIC_RELOAD_MIN_ACCURACY, report
+
+
+toxicity_registry: ModelRegistry[ToxicityModel] = ModelRegistry(
+    "toxicity model",
+    loader=load_toxicity_model,
+    validator=validate_toxicity_model,
+    default_path=TOXIC_MODEL_PATH,
+    pattern=TOXIC_MODEL_GLOB,
+    poll_interval=TOXIC_MODEL_POLL_INTERVAL,
+    nbytes=lambda model: model.nbytes,
+    on_swap=lambda model: duplicate_index.clear_verdicts(),
+)
+
+
+def _get_cached_model() -> ToxicityModel:
+    return toxicity_registry.get()
     
 
-def is_toxic_message(text: str, threshold_adjust: float = 0.0) -> tuple[bool, float, str]:
+
+def is_toxic_message(
+    text: str, threshold_adjust: float = 0.0, overlay_words: Tuple[str, ...] = ()
+) -> tuple[bool, float, str]:
     if not text: return (False, 0.0, "")
-    data = _get_cached_model()
-    model = data['model']
-    toxic_embeddings = data['toxic_embeddings']
-    base_threshold = data['threshold']
-    threshold = max(0.1, min(0.95, base_threshold + threshold_adjust))
+    return is_toxic_canonical(canonicalize(text), threshold_adjust, overlay_words)
+
+
+def is_toxic_canonical(
+    text: str, threshold_adjust: float = 0.0, overlay_words: Tuple[str, ...] = (),
+    model: Optional[ToxicityModel] = None
+) -> tuple[bool, float, str]:
+    # The model is fetched once, so a concurrent swap never splits a message.
+    model = model or _get_cached_model()
+    threshold = max(0.1, min(0.95, model.threshold + threshold_adjust))
+    overlay = model.overlay(overlay_words) if overlay_words else None
     
-    text = _clean_text(text)
-    words = text.split()
+    words = _clean_text(text).split()
 
     max_similarity = 0.0
     toxic_match = ""
     
     for word in words:
-        if word in model.wv:
-            word_vector = model.wv[word]
-            
-            for toxic_word, toxic_vector in toxic_embeddings.items():
-                try:
-                    similarity = cosine_similarity_numpy(word_vector, toxic_vector)
-                    # print((toxic_word, word, similarity))
-                    # similarity = np.dot(word_vector, toxic_vector) / (
-                    #     np.linalg.norm(word_vector) * np.linalg.norm(toxic_vector)
-                    # )
-                    
-                    if similarity > max_similarity:
-                        max_similarity = similarity
-                        toxic_match = toxic_word
-                    
-                    if similarity > threshold:
-
-                        return True, similarity, toxic_word
-                        
-                except Exception as e:
-                    print(f"Error processing word '{word}': {str(e)}")
-                    continue
-
-    return False, max_similarity, toxic_match
\ No newline at end of file
+        if overlay is not None and word in overlay.lexicon:
+            return True, 1.0, word
+
+        match = model.best_match(word, overlay)
+        if match is None:
+            continue
+
+        similarity, toxic_word = match
+        if similarity > max_similarity:
+            max_similarity = similarity
+            toxic_match = toxic_word
+
+        if similarity > threshold:
+            return True, similarity, toxic_word
+
+    return False, max_similarity, toxic_match
@@ -1,10 +1,14 @@
 from app.utils import TIME_DURATION_PATTERN, get_logger
 from aiogram import Bot, Dispatcher, types, F
-from aiogram.filters import ChatMemberUpdatedFilter, IS_NOT_MEMBER, IS_MEMBER, RESTRICTED, ADMINISTRATOR, IS_ADMIN, MEMBER
+from aiogram.filters import StateFilter, ChatMemberUpdatedFilter, IS_NOT_MEMBER, IS_MEMBER, RESTRICTED, ADMINISTRATOR, IS_ADMIN, MEMBER
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 from app.config import BOT_TOKEN
+from app import constants
+from app.cache import user_state_store
+from app.state_store import UserStateStorage
 from app import commands
+from app.callbacks import CallbackPrefix
 from app import handlers
 from sqlalchemy.exc import SQLAlchemyError
 from aiogram.exceptions import (
@@ -18,7 +22,7 @@ from aiogram.exceptions import (
 logger = get_logger()
 
 bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
-dp = Dispatcher()
+dp = Dispatcher(storage=UserStateStorage(user_state_store))
 
 async def global_error_handler(event: types.ErrorEvent):
     exception = event.exception
@@ -64,12 +68,31 @@ async def migrate_chat_error_handler(event: types.ErrorEvent):
         "❗ Чат був мігрований в супергрупу, спробуйте знову."
     )
 
-dp.callback_query.register(handlers.on_edit_chat_menu, F.data.startswith("chat-edit-menu"))
-dp.callback_query.register(handlers.on_edit_chat_settings, F.data.startswith("chat-edit"))
-dp.callback_query.register(handlers.on_welcome_chat, F.data.startswith("welcome"))
+dp.callback_query.register(handlers.on_edit_chat_menu, CallbackPrefix("chat-edit-menu"))
+dp.callback_query.register(handlers.on_edit_chat_settings, CallbackPrefix("chat-edit"))
+dp.callback_query.register(handlers.on_welcome_chat, CallbackPrefix("welcome"))
 
 
-dp.message.register(handlers.on_rm_duration_message, F.text.regexp(TIME_DURATION_PATTERN))
+dp.message.register(
+    handlers.on_rm_duration_message,
+    StateFilter(constants.UserState.EDIT_BOT_RESTRICTED_WORD_DURATION), F.text.regexp(TIME_DURATION_PATTERN)
+)
+dp.message.register(
+    handlers.on_link_filter_whitelist_add,
+    StateFilter(constants.UserState.EDIT_BOT_LINK_FILTER_ADD), F.chat.type == "private", F.text
+)
+dp.message.register(
+    handlers.on_link_filter_whitelist_delete,
+    StateFilter(constants.UserState.EDIT_BOT_LINK_FILTER_DELETE), F.chat.type == "private", F.text
+)
+dp.message.register(
+    handlers.on_toxic_words_add,
+    StateFilter(constants.UserState.EDIT_BOT_TOXIC_WORDS_ADD), F.chat.type == "private", F.text
+)
+dp.message.register(
+    handlers.on_toxic_words_delete,
+    StateFilter(constants.UserState.EDIT_BOT_TOXIC_WORDS_DELETE), F.chat.type == "private", F.text
+)
 dp.message.register(handlers.on_init_command, commands.BOT_INIT)
 dp.message.register(handlers.on_cat_gif_command, commands.BOT_CAT_GIF)
 dp.message.register(handlers.on_bot_mute_command, commands.BOT_MUTE)
@@ -88,6 +111,7 @@ dp.message.register(handlers.on_bot_coin_command, commands.BOT_COIN)
 
 dp.message.register(handlers.on_my_chats_command, commands.BOT_MY_CHATS)
 dp.message.register(handlers.on_global_message)
+dp.edited_message.register(handlers.on_edited_message)
 
 
 
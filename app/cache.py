@@ -1,67 +1,133 @@
-from typing import Optional
+from typing import Any, Dict, FrozenSet, Optional, Tuple, Union
 from datetime import datetime
+import time
 from aiocache import SimpleMemoryCache
 from app.models import TelegramChat
 from uuid import UUID
-from app.schemas import BotUserState
-from app.constants import MAX_MUTE_MSG_COUNT, MUTE_MSG_TIME_LIMIT
-
-user_cache = SimpleMemoryCache()
-user_message_cache = SimpleMemoryCache(timeout=120)
-chat_cache = SimpleMemoryCache(timeout=120)
+from app.schemas import BotUserState, ChatSnapshot
+from app.memory_cache import BoundedCache
+from app.constants import (
+    APPROVED_MESSAGE_MAX_BYTES, APPROVED_MESSAGE_MAX_ENTRIES, APPROVED_MESSAGE_TTL, CHAT_CACHE_MAX_BYTES, CHAT_CACHE_MAX_ENTRIES, CHAT_CACHE_TTL, CHAT_ROLES_CACHE_TTL,
+    MAX_MUTE_MSG_COUNT, MEMBER_JOINED_MAX_ENTRIES, NEW_MEMBER_AGE, MUTE_MSG_TIME_LIMIT, USER_MESSAGE_CACHE_MAX_ENTRIES,
+    USER_STATE_MAX_ENTRIES, USER_STATE_TTL, UserRole
+)
+
+user_state_store: BoundedCache[BotUserState] = BoundedCache(
+    max_entries=USER_STATE_MAX_ENTRIES, ttl=USER_STATE_TTL, sliding=True
+)
+user_message_cache: BoundedCache[Tuple[int, datetime]] = BoundedCache(
+    max_entries=USER_MESSAGE_CACHE_MAX_ENTRIES, ttl=MUTE_MSG_TIME_LIMIT
+)
+chat_cache: BoundedCache[ChatSnapshot] = BoundedCache(
+    max_entries=CHAT_CACHE_MAX_ENTRIES, ttl=CHAT_CACHE_TTL, max_bytes=CHAT_CACHE_MAX_BYTES
+)
+approved_message_cache: BoundedCache[FrozenSet[str]] = BoundedCache(
+    max_entries=APPROVED_MESSAGE_MAX_ENTRIES, ttl=APPROVED_MESSAGE_TTL, max_bytes=APPROVED_MESSAGE_MAX_BYTES
+)
+# (chat_id, user_id) -> when the bot saw the user join; entries expire as
+# soon as the member stops counting as new.
+member_joined_cache: BoundedCache[float] = BoundedCache(
+    max_entries=MEMBER_JOINED_MAX_ENTRIES, ttl=NEW_MEMBER_AGE
+)
+chat_roles_cache = SimpleMemoryCache()
+menu_cache = SimpleMemoryCache(timeout=600)
+rendered_message_cache = SimpleMemoryCache(timeout=3600)
 
 async def set_user_state(user_id: int, state: BotUserState):
-    await user_cache.set(f"user_state_{user_id}", state)
+    user_state_store.set((user_id, user_id), state)
 
 async def get_user_state(user_id: int) -> BotUserState:
-    state = await user_cache.get(f"user_state_{user_id}")
+    state = user_state_store.get((user_id, user_id))
     return state if state else BotUserState(user_id=user_id)
 
 async def clear_user_state(user_id: int):
-    await user_cache.delete(f"user_state_{user_id}")
+    user_state_store.delete((user_id, user_id))
+
+
+async def set_chat_state(chat_id: UUID | int, state: Union[TelegramChat, ChatSnapshot]) -> ChatSnapshot:
+    if not isinstance(state, ChatSnapshot):
+        state = ChatSnapshot.from_model(state)
+    chat_cache.set(chat_id, state)
+    return state
+
+async def get_chat_state(chat_id: UUID | int) -> Optional[ChatSnapshot]:
+    return chat_cache.get(chat_id)
+
+async def clear_chat_state(chat_id: UUID | int):
+    chat_cache.delete(chat_id)
+
+async def set_approved_message(chat_id: int, message_id: int, tokens: FrozenSet[str]):
+    approved_message_cache.set((chat_id, message_id), tokens)
+
+async def get_approved_message(chat_id: int, message_id: int) -> Optional[FrozenSet[str]]:
+    return approved_message_cache.get((chat_id, message_id))
+
+async def set_member_joined(chat_id: int, user_id: int):
+    member_joined_cache.set((chat_id, user_id), time.time())
+
+async def is_new_member(chat_id: int, user_id: int) -> bool:
+    # Only a join the bot saw makes someone new. Members it has no record of,
+    # e.g. everyone right after a restart, are treated as established.
+    return member_joined_cache.get((chat_id, user_id)) is not None
+
+################################################################################
+
+async def get_rendered_menu(key: str) -> Optional[Tuple[str, Any]]:
+    return await menu_cache.get(f"menu_{key}")
+
+async def set_rendered_menu(key: str, rendered: Tuple[str, Any]):
+    await menu_cache.set(f"menu_{key}", rendered)
+
+async def get_message_menu(chat_id: int, message_id: int) -> Optional[str]:
+    return await rendered_message_cache.get(f"rendered_{chat_id}_{message_id}")
+
+async def set_message_menu(chat_id: int, message_id: int, key: Optional[str]):
+    if key is None:
+        return await rendered_message_cache.delete(f"rendered_{chat_id}_{message_id}")
+    await rendered_message_cache.set(f"rendered_{chat_id}_{message_id}", key)
+
+################################################################################
+
+async def set_chat_roles(chat_id: int, roles: Dict[int, UserRole]):
+    await chat_roles_cache.set(f"chat_roles_{chat_id}", roles, ttl=int(CHAT_ROLES_CACHE_TTL.total_seconds()))
 
+async def get_chat_roles(chat_id: int) -> Optional[Dict[int, UserRole]]:
+    return await chat_roles_cache.get(f"chat_roles_{chat_id}")
 
-async def set_chat_state(chat_id: UUID | int, state: TelegramChat):
-    cache_key = f"chat_{chat_id}"
-    return await chat_cache.set(cache_key, state)
+async def update_chat_member_role(chat_id: int, user_id: int, role: UserRole):
+    roles = await get_chat_roles(chat_id)
+    if roles is None:
+        return
 
-async def get_chat_state(chat_id: UUID | int) -> Optional[TelegramChat]:
-    cache_key = f"chat_{chat_id}"
-    state = await chat_cache.get(cache_key)
-    return state if state else None
+    if role in (UserRole.ADMIN, UserRole.OWNER):
+        roles[user_id] = role
+    else:
+        roles.pop(user_id, None)
 
-async def clear_chat_state(chat_id: UUID):
-    await chat_cache.delete(f"chat_{chat_id}")
+async def clear_chat_roles(chat_id: int):
+    await chat_roles_cache.delete(f"chat_roles_{chat_id}")
 
 ################################################################################
 
 async def increment_user_message_count(chat_id: UUID | int, user_id: int) -> Optional[int]:
-    cache_key = f"chat_{chat_id}_user_{user_id}"
-    
-    current_data = await user_message_cache.get(cache_key)
-    current_count = current_data["count"] if current_data else 0
-    last_msg_time = current_data["last_message_time"] if current_data else datetime.now()
+    now = datetime.now()
+    current = user_message_cache.get((chat_id, user_id))
+    current_count, last_msg_time = current if current else (0, now)
 
-    if datetime.now() - last_msg_time > MUTE_MSG_TIME_LIMIT:
+    if now - last_msg_time > MUTE_MSG_TIME_LIMIT:
         current_count = 0 
 
     current_count += 1
-    new_data = {
-        "count": current_count,
-        "last_message_time": datetime.now()
-    }
-    await user_message_cache.set(cache_key, new_data)
+    user_message_cache.set((chat_id, user_id), (current_count, now))
     return current_count
 
 async def check_user_spam_status(chat_id: UUID | int, user_id: int) -> bool:
-    cache_key = f"chat_{chat_id}_user_{user_id}"
-    data = await user_message_cache.get(cache_key)
+    current = user_message_cache.get((chat_id, user_id))
 
-    if not data or data["count"] < MAX_MUTE_MSG_COUNT:
+    if not current or current[0] < MAX_MUTE_MSG_COUNT:
         return False
 
     return True
 
 async def clear_user_message_state(chat_id: UUID | int, user_id: int):
-    cache_key = f"chat_{chat_id}_user_{user_id}"
-    await user_message_cache.delete(cache_key)
\ No newline at end of file
+    user_message_cache.delete((chat_id, user_id))
@@ -0,0 +1,153 @@
+import base64
+import inspect
+import re
+import struct
+import zlib
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union
+from aiogram import types
+from aiogram.filters import Filter
+
+_HEADER = struct.Struct(">HHB")
+_INT = struct.Struct(">q")
+
+_DATA_NONE = 0
+_DATA_INT = 1
+_DATA_STR = 2
+
+# Every prefix and sub-prefix that can appear in callback data. Decoding
+# needs the crc -> name table before anything is encoded, so buttons sent
+# by a previous process still resolve after a restart.
+CALLBACK_NAMES = (
+    "", "chat-edit", "chat-edit-menu", "welcome",
+    "add-bw-toxic", "add-lf-whitelist", "chat", "delete-bw-toxic", "delete-lf-whitelist", "edit",
+    "edit-banlinks", "edit-banwords", "edit-basic", "edit-bw-toxic", "edit-lf-whitelist", "edit-notify",
+    "edit-welcome-rules", "exit", "rules-accept", "toggle-basic-enabled", "toggle-bw-enabled",
+    "toggle-bw-punishment-time", "toggle-bw-punishment-type", "toggle-bw-sensitivity",
+    "toggle-lf-blockall", "toggle-lf-enabled",
+)
+
+_LEGACY = re.compile(r"([a-zA-Z0-9_-]+)_([a-zA-Z0-9_-]+)?_(.*)")
+
+_names: Dict[int, str] = {}
+
+
+def _name_id(name: str) -> int:
+    name_id = zlib.crc32(name.encode("utf-8")) & 0xFFFF
+    known = _names.get(name_id)
+    if known is None:
+        _names[name_id] = name
+        # Earlier decodes may have cached this id as unknown.
+        decode_inline_data.cache_clear()
+    elif known != name:
+        raise ValueError(f"Callback name '{name}' collides with '{known}'")
+    return name_id
+
+
+def encode_inline_data(prefix: str, sub_prefix: Optional[str], data: Optional[Union[int, str]]=None) -> str:
+    if data is None or data == "":
+        payload = b""
+        data_type = _DATA_NONE
+    elif isinstance(data, int):
+        payload = _INT.pack(data)
+        data_type = _DATA_INT
+    else:
+        payload = str(data).encode("utf-8")
+        data_type = _DATA_STR
+
+    raw = _HEADER.pack(_name_id(prefix), _name_id(sub_prefix or ""), data_type) + payload
+    encoded = base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+    if len(encoded) > 64:
+        raise ValueError(f"Callback data is too long ({len(encoded)} > 64)")
+    return encoded
+
+
+def _decode_legacy(data: str) -> Tuple[Optional[str], Optional[str], Optional[Union[int, str]]]:
+    # "prefix_sub-prefix_data" from before the binary codec, kept so buttons
+    # on messages sent by older releases keep working.
+    match = _LEGACY.match(data)
+    if not match or match.group(1) not in _names.values():
+        return None, None, None
+    prefix, sub_prefix, raw_data = match.groups()
+    if not raw_data:
+        return prefix, sub_prefix, None
+    try:
+        return prefix, sub_prefix, int(raw_data)
+    except ValueError:
+        return prefix, sub_prefix, raw_data.replace("__", "_").replace("*", "-")
+
+
+@lru_cache(maxsize=4096)
+def decode_inline_data(data: str) -> Tuple[Optional[str], Optional[str], Optional[Union[int, str]]]:
+    try:
+        raw = base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+        prefix_id, sub_prefix_id, data_type = _HEADER.unpack_from(raw)
+    except (ValueError, struct.error):
+        return _decode_legacy(data)
+
+    if prefix_id not in _names:
+        return _decode_legacy(data)
+    prefix = _names.get(prefix_id)
+    sub_prefix = _names.get(sub_prefix_id) or None
+    payload = raw[_HEADER.size:]
+
+    if data_type == _DATA_INT and len(payload) == _INT.size:
+        return prefix, sub_prefix, _INT.unpack(payload)[0]
+    if data_type == _DATA_STR:
+        return prefix, sub_prefix, payload.decode("utf-8", errors="replace")
+    return prefix, sub_prefix, None
+
+
+class CallbackPrefix(Filter):
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        _name_id(prefix)
+
+    async def __call__(self, callback: types.CallbackQuery) -> bool:
+        if not callback.data:
+            return False
+        return decode_inline_data(callback.data)[0] == self.prefix
+
+
+CallbackHandler = Callable[..., Awaitable[Any]]
+
+
+class CallbackRouter:
+    def __init__(self):
+        self._routes: Dict[Tuple[str, Optional[str]], Tuple[CallbackHandler, Tuple[str, ...]]] = {}
+
+    def route(self, prefix: str, sub_prefix: Optional[str]) -> Callable[[CallbackHandler], CallbackHandler]:
+        def decorator(handler: CallbackHandler) -> CallbackHandler:
+            self.add(prefix, sub_prefix, handler)
+            return handler
+        return decorator
+
+    def add(self, prefix: str, sub_prefix: Optional[str], handler: CallbackHandler) -> None:
+        _name_id(prefix)
+        _name_id(sub_prefix or "")
+        key = (prefix, sub_prefix)
+        if key in self._routes:
+            raise ValueError(f"Callback route {key} is already registered")
+
+        params = tuple(inspect.signature(handler).parameters)[1:]
+        self._routes[key] = (handler, params)
+
+    def __contains__(self, key: Tuple[str, Optional[str]]) -> bool:
+        return key in self._routes
+
+    def __len__(self) -> int:
+        return len(self._routes)
+
+    async def dispatch(self, callback: types.CallbackQuery, prefix: str, sub_prefix: Optional[str], **context: Any) -> Any:
+        route = self._routes.get((prefix, sub_prefix))
+        if route is None:
+            return None
+
+        handler, params = route
+        return await handler(callback, **{name: context[name] for name in params if name in context})
+
+
+inline_router = CallbackRouter()
+
+for _name in CALLBACK_NAMES:
+    _name_id(_name)
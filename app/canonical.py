@@ -0,0 +1,67 @@
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional, Pattern, Tuple
+
+_INVISIBLE = "\u00ad\u200b\u200c\u200d\u2060\ufeff"
+
+# Only letters that look the same as Cyrillic; b, h, k, m and t count because
+# text is lowercased first and their capitals are identical.
+_TO_CYRILLIC = str.maketrans({
+    "a": "а", "b": "в", "c": "с", "e": "е", "h": "н", "i": "і", "k": "к", "m": "м",
+    "o": "о", "p": "р", "t": "т", "x": "х", "y": "у",
+    "0": "о", "1": "і", "3": "з", "4": "ч", "6": "б", "@": "а", "ё": "е",
+    **{char: None for char in _INVISIBLE},
+})
+_TO_LATIN = str.maketrans({
+    "а": "a", "в": "b", "с": "c", "е": "e", "н": "h", "і": "i", "к": "k", "м": "m",
+    "о": "o", "р": "p", "т": "t", "х": "x", "у": "y",
+    "0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t", "@": "a", "$": "s", "!": "i",
+    **{char: None for char in _INVISIBLE},
+})
+
+_CYRILLIC = re.compile(r"[а-яіїєґё]")
+_MASKED = re.compile(r"(?<=\w)[*._\-]+(?=\w)")
+_REPEATED = re.compile(r"(.)\1{2,}")
+
+
+def canonicalize(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = _MASKED.sub("", text)
+    text = text.translate(_TO_CYRILLIC if _CYRILLIC.search(text) else _TO_LATIN)
+    return _REPEATED.sub(r"\1", text)
+
+
+def canonical_variants(word: str) -> Tuple[str, ...]:
+    word = _REPEATED.sub(r"\1", _MASKED.sub("", unicodedata.normalize("NFKC", word).lower()))
+    return tuple(dict.fromkeys((word.translate(_TO_CYRILLIC), word.translate(_TO_LATIN))))
+
+
+def _trie_regex(node: Dict[str, Any]) -> str:
+    # Alternation factored by common prefixes, so the regex engine tries
+    # one branch per next character instead of every word at every offset.
+    terminal = "" in node
+    branches = [re.escape(char) + _trie_regex(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 and len(branches[0]) == 1 else "(?:" + "|".join(branches) + ")"
+    return body + "?" if terminal else body
+
+
+@lru_cache(maxsize=256)
+def _restricted_pattern(words: Tuple[str, ...]) -> Optional[Pattern]:
+    trie: Dict[str, Any] = {}
+    for word in words:
+        for variant in canonical_variants(word):
+            if not variant:
+                continue
+            node = trie
+            for char in variant:
+                node = node.setdefault(char, {})
+            node[""] = {}
+    return re.compile(_trie_regex(trie)) if trie else None
+
+
+def find_restricted_word(canonical_text: str, words: Iterable[str]) -> bool:
+    pattern = _restricted_pattern(tuple(words))
+    return pattern is not None and pattern.search(canonical_text) is not None
@@ -0,0 +1,85 @@
+import asyncio
+import random
+from collections import deque
+from typing import Awaitable, Callable, Deque, List, Optional
+from app.config import TENOR_API_KEY, TENOR_API_URL
+from app.constants import CAT_GIF_BUFFER_SIZE, CAT_GIF_REFILL_THRESHOLD
+from app.http_client import get_http_session
+from app.utils import get_logger
+
+logger = get_logger()
+
+
+async def fetch_cat_gifs(limit: int = CAT_GIF_BUFFER_SIZE) -> List[str]:
+    params = {
+        "q": "cat",
+        "key": TENOR_API_KEY,
+        "limit": limit,
+        "random": "true",
+        "media_filter": "gif"
+    }
+
+    async with get_http_session().get(TENOR_API_URL, params=params) as response:
+        if response.status != 200:
+            return []
+        data = await response.json()
+        return [gif['media'][0]['gif']['url'] for gif in data.get('results', [])]
+
+
+class GifBuffer:
+    def __init__(
+        self,
+        fetch: Callable[[int], Awaitable[List[str]]],
+        size: int = CAT_GIF_BUFFER_SIZE,
+        refill_threshold: int = CAT_GIF_REFILL_THRESHOLD
+    ):
+        self.fetch = fetch
+        self.size = size
+        self.refill_threshold = refill_threshold
+        self._urls: Deque[str] = deque(maxlen=size)
+        self._refill_task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._urls)
+
+    async def refill(self) -> int:
+        try:
+            urls = await self.fetch(self.size)
+        except Exception as e:
+            logger.warning(f"Failed to refill GIF buffer: {e}")
+            return 0
+
+        random.shuffle(urls)
+        self._urls.extend(urls)
+        return len(urls)
+
+    def _schedule_refill(self) -> None:
+        if self._refill_task is None or self._refill_task.done():
+            self._refill_task = asyncio.create_task(self.refill())
+
+    async def get(self) -> Optional[str]:
+        if not self._urls:
+            await self.refill()
+            if not self._urls:
+                return None
+
+        url = self._urls.popleft()
+        if len(self._urls) <= self.refill_threshold:
+            self._schedule_refill()
+        return url
+
+    async def close(self) -> None:
+        if self._refill_task and not self._refill_task.done():
+            self._refill_task.cancel()
+            try:
+                await self._refill_task
+            except asyncio.CancelledError:
+                pass
+        self._refill_task = None
+
+
+cat_gif_buffer = GifBuffer(fetch_cat_gifs)
+
+
+async def get_random_cat_gif() -> Optional[str]:
+    return await cat_gif_buffer.get()
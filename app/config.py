@@ -4,8 +4,23 @@ from dotenv import load_dotenv
 load_dotenv()
 
 TENOR_API_KEY = os.getenv("TENOR_API_KEY", "LIVDSRZULELA")
+TENOR_API_URL = os.getenv("TENOR_API_URL", "https://g.tenor.com/v1/search")
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 API_ID = os.getenv("API_ID")
 API_HASH = os.getenv("API_HASH")
 DATABASE_URL = os.getenv("DATABASE_URL")
 DEBUG_MODE = bool(os.getenv("DEBUG")) or False
+COMMANDS_HASH_PATH = os.getenv("COMMANDS_HASH_PATH", ".bot_commands.json")
+TOXIC_MODEL_PATH = os.getenv("TOXIC_MODEL_PATH", "./app/data/toxic_detector_improved_03.pkl")
+TOXIC_MODEL_GLOB = os.getenv("TOXIC_MODEL_GLOB", "./app/data/toxic_detector_*.pkl")
+TOXIC_VALIDATION_PATH = os.getenv("TOXIC_VALIDATION_PATH", "./app/data/toxic_validation.jsonl")
+TOXIC_MODEL_QUANTIZATION = os.getenv("TOXIC_MODEL_QUANTIZATION", "float32")
+TOXIC_INDEX_PATH = os.getenv("TOXIC_INDEX_PATH", "./app/data/toxic_index.npz")
+SUBWORD_TABLE_PATH = os.getenv("SUBWORD_TABLE_PATH", "./app/data/subword_table.npz")
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.01"))
+TRACE_SLOW_UPDATE_MS = float(os.getenv("TRACE_SLOW_UPDATE_MS", "1000"))
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "")
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+LOG_DIR = os.getenv("LOG_DIR", "logs")
+LOG_JSON = bool(os.getenv("LOG_JSON")) or False
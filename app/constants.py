@@ -1,17 +1,61 @@
 from datetime import timedelta
-from enum import Enum
+from enum import Enum, IntFlag
 from app import strings
 
 INIT_CMD_COOLDOWN_TIME = timedelta(minutes=30)
 MAX_MUTE_MSG_COUNT = 2
 MUTE_MSG_TIME_LIMIT = timedelta(minutes=2)
 RULE_READ_TIME = timedelta(seconds=20)
+CHAT_ROLES_CACHE_TTL = timedelta(minutes=10)
+USER_STATE_TTL = timedelta(hours=6)
+USER_STATE_MAX_ENTRIES = 100_000
+CHAT_CACHE_TTL = timedelta(seconds=120)
+CHAT_CACHE_MAX_ENTRIES = 20_000
+CHAT_CACHE_MAX_BYTES = 64 * 2**20
+USER_MESSAGE_CACHE_MAX_ENTRIES = 200_000
+RAID_RATE_HALF_LIFE = timedelta(seconds=30)
+RAID_JOIN_THRESHOLD = 25
+RAID_MESSAGE_THRESHOLD = 150
+RAID_MODE_DURATION = timedelta(minutes=10)
+RAID_FLUSH_INTERVAL = 1.0
+RAID_TRACKED_CHATS = 50_000
+RAID_MAX_JOINERS = 5_000
+DUPLICATE_WINDOW = timedelta(minutes=15)
+DUPLICATE_MAX_ENTRIES = 100_000
+DUPLICATE_MAX_DISTANCE = 7
+DUPLICATE_MIN_LENGTH = 24
+CROSS_CHAT_SPAM_CHATS = 3
+CROSS_CHAT_SPAM_SENDERS = 3
+NEW_MEMBER_AGE = timedelta(days=1)
+MEMBER_JOINED_MAX_ENTRIES = 500_000
+APPROVED_MESSAGE_TTL = timedelta(hours=48)
+APPROVED_MESSAGE_MAX_ENTRIES = 200_000
+APPROVED_MESSAGE_MAX_BYTES = 64 * 2**20
+TOXIC_INDEX_MIN_SIZE = 2048
+TOXIC_INDEX_NPROBE = 8
+SUBWORD_BUCKETS = 100_000
+SUBWORD_CACHE_SIZE = 50_000
+SUBWORD_MIN_WORD_LENGTH = 4
+TOXIC_SENSITIVITY = {"low": 0.1, "default": 0.0, "high": -0.1}
+TOXIC_OVERLAY_CACHE_SIZE = 4096
+TOXIC_OVERLAY_MAX_WORDS = 200
+TOXIC_MODEL_POLL_INTERVAL = 30.0
+TOXIC_RELOAD_MIN_ACCURACY = 0.9
+TOXIC_RELOAD_SELF_CHECK_WORDS = 200
+CAT_GIF_BUFFER_SIZE = 50
+CAT_GIF_REFILL_THRESHOLD = 10
+LOG_QUEUE_SIZE = 10_000
+LOG_DUPLICATE_WINDOW = 60.0
+LOG_DUPLICATE_MAX_KEYS = 1024
+TRACE_EXPORT_QUEUE_SIZE = 1_000
 
 
 class UserState(str, Enum):
     EDIT_BOT_RESTRICTED_WORD_DURATION = "edit_bot_restricted_word_duration"
     EDIT_BOT_LINK_FILTER_ADD = "edit_bot_link_filter_add"
     EDIT_BOT_LINK_FILTER_DELETE = "edit_bot_link_filter_delete"
+    EDIT_BOT_TOXIC_WORDS_ADD = "edit_bot_toxic_words_add"
+    EDIT_BOT_TOXIC_WORDS_DELETE = "edit_bot_toxic_words_delete"
 
     NOTHING = "nothing"
     
@@ -22,6 +66,14 @@ class UserRole(str, Enum):
     
     BANNED = "banned"
 
+    @classmethod
+    def from_status(cls, status: str) -> "UserRole":
+        return {
+            "creator": cls.OWNER,
+            "administrator": cls.ADMIN,
+            "kicked": cls.BANNED,
+        }.get(getattr(status, "value", status), cls.MEMBER)
+
 
 class ChatType(str, Enum):
     PRIVATE = "private"
@@ -73,6 +125,8 @@ DEFAULT_CHAT_SETTINGS = {
     "restricted_words": {
         "enabled": False,
         "words": ["badword1", "badword2"],
+        "sensitivity": "default",
+        "toxic_words": [],
         "punishment": {
             "type": "ban", 
             "duration": "30m", 
@@ -116,4 +170,39 @@ ROLE_PERMISSIONS = {
     UserRole.MEMBER: MEMBER_PERMISSIONS,
     UserRole.ADMIN: ADMIN_PERMISSIONS,
     UserRole.OWNER: OWNER_PERMISSIONS
-}
\ No newline at end of file
+}
+
+
+def permissions_mask(permissions: list[Permission]) -> int:
+    mask = 0
+    for permission in permissions or []:
+        mask |= PERMISSION_BITS[Permission(permission)]
+    return mask
+
+
+PERMISSION_BITS = {permission: 1 << index for index, permission in enumerate(Permission)}
+
+ROLE_PERMISSION_MASKS = {
+    role: permissions_mask(permissions) for role, permissions in ROLE_PERMISSIONS.items()
+}
+
+
+class UserPrivilege(IntFlag):
+    IS_MEMBER = 1 << 0
+    CAN_SEND_MESSAGES = 1 << 1
+    CAN_SEND_AUDIOS = 1 << 2
+    CAN_SEND_DOCUMENTS = 1 << 3
+    CAN_SEND_PHOTOS = 1 << 4
+    CAN_SEND_VIDEOS = 1 << 5
+    CAN_SEND_VIDEO_NOTES = 1 << 6
+    CAN_SEND_VOICE_NOTES = 1 << 7
+    CAN_SEND_POLLS = 1 << 8
+    CAN_SEND_OTHER_MESSAGES = 1 << 9
+    CAN_ADD_WEB_PAGE_PREVIEWS = 1 << 10
+    CAN_CHANGE_INFO = 1 << 11
+    CAN_INVITE_USERS = 1 << 12
+    CAN_PIN_MESSAGES = 1 << 13
+    CAN_MANAGE_TOPICS = 1 << 14
+    CAN_BE_EDITED = 1 << 15
+    CAN_RESTRICT_MEMBERS = 1 << 16
+    CAN_DELETE_MESSAGES = 1 << 17
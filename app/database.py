@@ -1,18 +1,27 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from functools import lru_cache
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.config import DATABASE_URL
 from contextlib import asynccontextmanager
 
-engine = create_async_engine(DATABASE_URL, echo=False)
-async_session = sessionmaker(
-    engine, expire_on_commit=False, class_=AsyncSession
-)
 Base = declarative_base()
 
+@lru_cache()
+def get_engine() -> AsyncEngine:
+    return create_async_engine(DATABASE_URL, echo=False)
+
+@lru_cache()
+def get_sessionmaker() -> sessionmaker:
+    return sessionmaker(
+        get_engine(), expire_on_commit=False, class_=AsyncSession
+    )
+
 @asynccontextmanager
 async def get_session() -> AsyncSession: # type: ignore
-    async with async_session() as session:
+    async with get_sessionmaker()() as session:
         yield session
 
 async def close_engine() -> None:
-    await engine.dispose()
+    if not get_engine.cache_info().currsize:
+        return
+    await get_engine().dispose()
@@ -5,7 +5,7 @@ from aiogram import types
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.cache import check_user_spam_status, increment_user_message_count
 from app.database import get_session
-from app.services import get_or_create_association, get_or_create_user, get_or_create_chat
+from app.services import get_chat_member_role, get_or_create_association, get_or_create_user, get_or_create_chat
 from app import constants, strings
 from app.utils import check_admin_rights, format_timedelta_uk, subtract_datetimes, utcnow
 
@@ -16,24 +16,33 @@ def with_session(func: Callable[..., Any]) -> Callable[..., Any]:
             return await func(*args, session=session, **kwargs)
     return wrapper
 
+def _precompute_rights(required_rights, required_role):
+    required_rights_mask = constants.permissions_mask(required_rights)
+    if isinstance(required_role, list):
+        required_role = frozenset(required_role)
+    return required_rights_mask, required_role
+
+def _resolves_members(required_rights: int, required_role) -> bool:
+    # MEMBER and BANNED only lead to different outcomes when rights are
+    # checked and a non-admin role can pass.
+    if not required_rights:
+        return False
+    roles = required_role if isinstance(required_role, frozenset) else {required_role} if required_role else None
+    return roles is None or bool(roles & {constants.UserRole.MEMBER, constants.UserRole.BANNED})
+
 def with_user_rights(required_rights: List[constants.Permission] = None, required_role: List[constants.UserRole] = None):
+    required_rights, required_role = _precompute_rights(required_rights, required_role)
+    resolve_members = _resolves_members(required_rights, required_role)
     def decorator(func) -> Any:
         @wraps(func)
         async def wrapper(message: types.Message, *args, **kwargs):
             if message.chat.type != 'private':
-                result = await message.bot.get_chat_member(
+                user_role = await get_chat_member_role(
+                    message.bot,
                     message.chat.id,
                     message.from_user.id,
+                    resolve_members,
                 )
-                user_role = constants.UserRole.MEMBER 
-                if isinstance(result, types.ChatMemberOwner):
-                    user_role = constants.UserRole.OWNER 
-                elif isinstance(result, types.ChatMemberAdministrator):
-                    user_role = constants.UserRole.ADMIN 
-                elif isinstance(result, types.ChatMemberMember):
-                    user_role = constants.UserRole.MEMBER 
-                elif isinstance(result, types.ChatMemberBanned):
-                    user_role = constants.UserRole.BANNED
 
                 if (required_rights or required_role):
                     has_rights = check_admin_rights(user_role, required_rights, required_role)
@@ -44,6 +53,7 @@ def with_user_rights(required_rights: List[constants.Permission] = None, require
     return decorator
 
 def with_user_and_chat_and_rights(required_rights: List[constants.Permission] = None, required_role: constants.UserRole = None):
+    required_rights, required_role = _precompute_rights(required_rights, required_role)
     def decorator(func) -> Any:
         @wraps(func)
         async def wrapper(message: types.Message, *args, **kwargs):
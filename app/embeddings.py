@@ -0,0 +1,142 @@
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+from app.lazy import lazy_import
+
+if TYPE_CHECKING:
+    import numpy
+
+np = lazy_import("numpy")
+
+_CHUNK_ROWS = 65536
+_EPS = 1e-8
+
+
+def normalize_rows(vectors: "numpy.ndarray") -> "numpy.ndarray":
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, _EPS)
+
+
+class EmbeddingStore:
+    quantized = False
+
+    def __init__(self, key_to_index: Dict[str, int], vectors: "numpy.ndarray"):
+        self.key_to_index = key_to_index
+        self.vectors = np.empty(vectors.shape, dtype=np.float32)
+        for start in range(0, len(vectors), _CHUNK_ROWS):
+            self.vectors[start:start + _CHUNK_ROWS] = normalize_rows(vectors[start:start + _CHUNK_ROWS])
+
+    @classmethod
+    def from_arrays(cls, key_to_index: Dict[str, int], arrays: Dict[str, "numpy.ndarray"]) -> "EmbeddingStore":
+        # Wraps already-encoded arrays (e.g. memory-mapped) without copying them.
+        store = cls.__new__(cls)
+        store.key_to_index = key_to_index
+        for name, array in arrays.items():
+            setattr(store, name, array)
+        return store
+
+    def arrays(self) -> Dict[str, "numpy.ndarray"]:
+        return {"vectors": self.vectors}
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.key_to_index
+
+    def __len__(self) -> int:
+        return len(self.key_to_index)
+
+    @property
+    def nbytes(self) -> int:
+        return self.vectors.nbytes
+
+    def lookup(self, word: str) -> Optional[Any]:
+        index = self.key_to_index.get(word)
+        return None if index is None else self.vectors[index]
+
+    def encode(self, vectors: "numpy.ndarray") -> Any:
+        return normalize_rows(vectors)
+
+    def score(self, query: Any, table: Any) -> "numpy.ndarray":
+        return table @ query
+
+    def make_query(self, vector: "numpy.ndarray") -> Any:
+        return normalize_rows(vector)
+
+    def as_float(self, query: Any) -> "numpy.ndarray":
+        return query
+
+    def take(self, table: Any, rows: "numpy.ndarray") -> Any:
+        return table[rows]
+
+    def append(self, table: Any, vectors: "numpy.ndarray") -> Any:
+        return np.concatenate([table, self.encode(vectors)])
+
+
+class QuantizedEmbeddingStore(EmbeddingStore):
+    # Unit vectors stored as int8 codes with one float32 scale per row:
+    # cos(a, b) ~= (codes_a . codes_b) * scale_a * scale_b.
+    quantized = True
+
+    def __init__(self, key_to_index: Dict[str, int], vectors: "numpy.ndarray"):
+        self.key_to_index = key_to_index
+        self.codes = np.empty(vectors.shape, dtype=np.int8)
+        self.scales = np.empty(len(vectors), dtype=np.float32)
+        for start in range(0, len(vectors), _CHUNK_ROWS):
+            codes, scales = quantize(vectors[start:start + _CHUNK_ROWS])
+            self.codes[start:start + _CHUNK_ROWS] = codes
+            self.scales[start:start + _CHUNK_ROWS] = scales
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.scales.nbytes
+
+    def arrays(self) -> Dict[str, "numpy.ndarray"]:
+        return {"codes": self.codes, "scales": self.scales}
+
+    def lookup(self, word: str) -> Optional[Tuple["numpy.ndarray", float]]:
+        index = self.key_to_index.get(word)
+        if index is None:
+            return None
+        return self.codes[index].astype(np.int32), float(self.scales[index])
+
+    def encode(self, vectors: "numpy.ndarray") -> Tuple["numpy.ndarray", "numpy.ndarray"]:
+        codes, scales = quantize(vectors)
+        return codes.astype(np.int32), scales
+
+    def score(self, query: Tuple["numpy.ndarray", float], table: Tuple["numpy.ndarray", "numpy.ndarray"]) -> "numpy.ndarray":
+        codes, scale = query
+        table_codes, table_scales = table
+        return (table_codes @ codes) * (table_scales * scale)
+
+    def make_query(self, vector: "numpy.ndarray") -> Tuple["numpy.ndarray", float]:
+        codes, scales = quantize(vector[None])
+        return codes[0].astype(np.int32), float(scales[0])
+
+    def as_float(self, query: Tuple["numpy.ndarray", float]) -> "numpy.ndarray":
+        codes, scale = query
+        return codes.astype(np.float32) * scale
+
+    def take(self, table: Tuple["numpy.ndarray", "numpy.ndarray"], rows: "numpy.ndarray") -> Tuple["numpy.ndarray", "numpy.ndarray"]:
+        return table[0][rows], table[1][rows]
+
+    def append(self, table: Tuple["numpy.ndarray", "numpy.ndarray"], vectors: "numpy.ndarray") -> Tuple["numpy.ndarray", "numpy.ndarray"]:
+        codes, scales = self.encode(vectors)
+        return np.concatenate([table[0], codes]), np.concatenate([table[1], scales])
+
+
+def quantize(vectors: "numpy.ndarray") -> Tuple["numpy.ndarray", "numpy.ndarray"]:
+    unit = normalize_rows(vectors)
+    scales = np.maximum(np.abs(unit).max(axis=-1), _EPS) / 127.0
+    codes = np.rint(unit / scales[..., None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+STORES = {
+    "float32": EmbeddingStore,
+    "int8": QuantizedEmbeddingStore,
+}
+
+
+def build_store(keyed_vectors: Any, quantization: str = "float32") -> EmbeddingStore:
+    store_cls = STORES.get(quantization)
+    if store_cls is None:
+        raise ValueError(f"Unknown embedding quantization '{quantization}'")
+    return store_cls(dict(keyed_vectors.key_to_index), keyed_vectors.vectors)
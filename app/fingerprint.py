@@ -0,0 +1,163 @@
+import re
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+from app.constants import (
+    DUPLICATE_MAX_DISTANCE, DUPLICATE_MAX_ENTRIES, DUPLICATE_MIN_LENGTH, DUPLICATE_WINDOW
+)
+
+_MASK64 = (1 << 64) - 1
+_BANDS = 4
+_BAND_BITS = 64 // _BANDS
+_BAND_PROBES = (0,) + tuple(1 << bit for bit in range(_BAND_BITS))
+_MAX_TRACKED_CHATS = 64
+_MAX_TRACKED_SENDERS = 64
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def normalize_text(text: str) -> str:
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+
+def features(text: str) -> List[str]:
+    return text.split() or [text]
+
+
+def simhash(text: str) -> int:
+    # Python's str hash is salted per process, which is fine for an
+    # in-memory index but means fingerprints must never be persisted.
+    # Per-bit counts are kept bit-sliced: planes[k] holds bit k of all 64
+    # counters, so adding one hash is a ripple-carry over a few big ints.
+    tokens = features(text)
+    planes: List[int] = []
+    for token in tokens:
+        carry = hash(token) & _MASK64
+        for k, plane in enumerate(planes):
+            planes[k] = plane ^ carry
+            carry &= plane
+            if not carry:
+                break
+        else:
+            if carry:
+                planes.append(carry)
+
+    threshold = len(tokens) // 2
+    greater, equal = 0, _MASK64
+    for k in range(len(planes) - 1, -1, -1):
+        if threshold >> k & 1:
+            equal &= planes[k]
+        else:
+            greater |= equal & planes[k]
+            equal &= ~planes[k]
+    if threshold >> len(planes):
+        return 0
+    return greater
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def _bands(fingerprint: int) -> List[Tuple[int, int]]:
+    mask = (1 << _BAND_BITS) - 1
+    return [(band, fingerprint >> (band * _BAND_BITS) & mask) for band in range(_BANDS)]
+
+
+class FingerprintEntry:
+    __slots__ = ("fingerprint", "created_at", "chats", "senders", "count", "toxicity", "toxicity_key")
+
+    def __init__(self, fingerprint: int, created_at: float):
+        self.fingerprint = fingerprint
+        self.created_at = created_at
+        self.chats: Set[int] = set()
+        self.senders: Set[int] = set()
+        self.count = 0
+        self.toxicity: Optional[Tuple[bool, float, Optional[str]]] = None
+        # hash() of the exact text the verdict was computed for.
+        self.toxicity_key: Optional[int] = None
+
+
+class DuplicateIndex:
+    def __init__(
+        self,
+        window: float = DUPLICATE_WINDOW.total_seconds(),
+        max_entries: int = DUPLICATE_MAX_ENTRIES,
+        max_distance: int = DUPLICATE_MAX_DISTANCE,
+        min_length: int = DUPLICATE_MIN_LENGTH,
+    ):
+        # Two fingerprints within 7 bits of each other differ in at most one
+        # bit in at least one of the 4 bands of 16 bits, so probing every band
+        # value and its single-bit flips finds every match. 16-bit bands keep
+        # buckets to an entry or two even at max_entries.
+        self.window = window
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.min_length = min_length
+        self._entries: Deque[FingerprintEntry] = deque()
+        self._buckets: Dict[Tuple[int, int], Dict[int, FingerprintEntry]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def find(self, fingerprint: int) -> Optional[FingerprintEntry]:
+        best, best_distance = None, self.max_distance + 1
+        for band, value in _bands(fingerprint):
+            for probe in _BAND_PROBES:
+                bucket = self._buckets.get((band, value ^ probe))
+                if not bucket:
+                    continue
+                for entry in bucket.values():
+                    distance = hamming_distance(fingerprint, entry.fingerprint)
+                    if distance < best_distance:
+                        best, best_distance = entry, distance
+        return best
+
+    def observe(
+        self, text: str, chat_id: int, sender_id: Optional[int] = None, now: Optional[float] = None
+    ) -> Optional[FingerprintEntry]:
+        normalized = normalize_text(text or "")
+        if len(normalized) < self.min_length:
+            return None
+
+        now = time.monotonic() if now is None else now
+        self._evict(now)
+        fingerprint = simhash(normalized)
+        entry = self.find(fingerprint)
+        if entry is None:
+            self.misses += 1
+            entry = FingerprintEntry(fingerprint, now)
+            self._entries.append(entry)
+            for band in _bands(fingerprint):
+                self._buckets.setdefault(band, {})[id(entry)] = entry
+        else:
+            self.hits += 1
+
+        entry.count += 1
+        if len(entry.chats) < _MAX_TRACKED_CHATS:
+            entry.chats.add(chat_id)
+        if sender_id is not None and len(entry.senders) < _MAX_TRACKED_SENDERS:
+            entry.senders.add(sender_id)
+        return entry
+
+    def clear_verdicts(self) -> None:
+        for entry in self._entries:
+            entry.toxicity = entry.toxicity_key = None
+
+    def _evict(self, now: float) -> None:
+        expire_before = now - self.window
+        while self._entries and (
+            self._entries[0].created_at < expire_before or len(self._entries) >= self.max_entries
+        ):
+            entry = self._entries.popleft()
+            for band in _bands(entry.fingerprint):
+                bucket = self._buckets.get(band)
+                if bucket is None:
+                    continue
+                bucket.pop(id(entry), None)
+                if not bucket:
+                    del self._buckets[band]
+
+
+duplicate_index = DuplicateIndex()
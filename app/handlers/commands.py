@@ -12,8 +12,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from app.models import TelegramChat, TelegramUser, UserChatAssociation
 from app.schemas import BotUserState
-from app.utils import encode_inline_data, format_timedelta_ua, format_timedelta_uk, get_chat_members, get_random_cat_gif, parse_command_args, parse_mute_command, subtract_datetimes, utcnow
+from app.callbacks import encode_inline_data
+from app.utils import format_timedelta_ua, format_timedelta_uk, get_chat_members, parse_command_args, parse_mute_command, subtract_datetimes, utcnow
 from app.cache import set_chat_state, set_user_state
+from app.cat_gifs import get_random_cat_gif
 
 @with_user_rights(required_role=[constants.UserRole.ADMIN, constants.UserRole.OWNER])
 @with_session
@@ -25,17 +27,11 @@ async def on_init_command(message: types.Message, session: AsyncSession):
         
     
     chat_title = message.chat.title if message.chat.title else message.chat.full_name
-    chat_member = await message.bot.get_chat_member(chat_id, message.from_user.id)
+    user_role = await services.get_chat_member_role(message.bot, chat_id, message.from_user.id)
     
-    if not isinstance(chat_member, (types.ChatMemberOwner, types.ChatMemberAdministrator)):
+    if user_role not in (constants.UserRole.OWNER, constants.UserRole.ADMIN):
         await message.reply(strings.NO_RIGHTS)
         return
-    
-    user_role = None
-    if isinstance(chat_member, types.ChatMemberOwner):
-        user_role = constants.UserRole.OWNER
-    elif isinstance(chat_member, types.ChatMemberAdministrator):
-        user_role = constants.UserRole.ADMIN
 
     
     chat = await services.get_or_create_chat(session, chat_id, chat_title, chat_type)
@@ -65,6 +61,7 @@ async def on_init_command(message: types.Message, session: AsyncSession):
 
         users = await get_chat_members(chat_id)
         admins = await message.bot.get_chat_administrators(chat_id)
+        await services.cache_chat_administrators(chat_id, admins)
         admin_ids = [(admin.user.id, admin.user.username, TelegramUserPermissions.from_user(admin)) for admin in admins if not admin.user.is_bot]
 
         for admin_id, admin_username, admin_permission in admin_ids:
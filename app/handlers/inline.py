@@ -1,94 +1,110 @@
 from datetime import timedelta
-from typing import Union
+from typing import Callable, Optional, Tuple, Union
 from aiogram import types
+from aiogram.exceptions import TelegramBadRequest
 from app import services
 from app import strings
 from app import constants
 from app.dependencies import with_session, with_user_and_chat_and_rights
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models import TelegramUser, TelegramChat, UserChatAssociation
-from app.schemas import BotUserState, BotUserStateEdit
-from app.utils import decode_inline_data, encode_inline_data, format_timedelta_uk, utcnow
-from app.cache import get_user_state, set_user_state
+from app.schemas import BotUserState, BotUserStateEdit, ChatSettings
+from app.callbacks import decode_inline_data, encode_inline_data, inline_router
+from app.utils import format_timedelta_uk, utcnow
+from app.cache import get_message_menu, get_rendered_menu, get_user_state, set_message_menu, set_rendered_menu, set_user_state
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 
 @with_session
 async def on_edit_chat_menu(callback: types.CallbackQuery, session: AsyncSession):
-    user_id = callback.from_user.id
-    prefix, sub_prefix, raw_data = decode_inline_data(callback.data)
-    print((prefix, sub_prefix, raw_data))
-    user_state = await get_user_state(user_id)
-    if not user_state: 
-        await callback.answer("Помилка даних, почніть з початку...", show_alert=True)
-        return await callback.message.delete()
-
-
-    if sub_prefix == "chat":
-        return await show_chat_details(callback, session, raw_data, user_id)
-    elif sub_prefix == "exit":
-        await callback.message.delete()
+    return await dispatch_chat_edit(callback, session)
 
 @with_session
 async def on_edit_chat_settings(callback: types.CallbackQuery, session: AsyncSession):
+    return await dispatch_chat_edit(callback, session)
+
+async def dispatch_chat_edit(callback: types.CallbackQuery, session: AsyncSession):
     prefix, sub_prefix, raw_data = decode_inline_data(callback.data)
-    print((prefix, sub_prefix, raw_data))
     user_id = callback.from_user.id
     user_state = await get_user_state(user_id)
     if not user_state: 
         await callback.answer("Помилка даних, почніть з початку...", show_alert=True)
         return await callback.message.delete()
 
+    return await inline_router.dispatch(
+        callback, prefix, sub_prefix,
+        session=session,
+        user_state=user_state,
+        raw_data=raw_data,
+        user_id=user_id
+    )
 
 
-    if sub_prefix == "edit":
-        await show_edit_menu(callback, user_state)
-    elif sub_prefix == "edit-basic":
-        await show_basic_edit(callback, user_state)
-    elif sub_prefix == "toggle-basic-enabled":
-        await toggle_basic_enabled(callback, session, user_state)
-    elif sub_prefix == "edit-welcome-rules":
-        await show_welcome_rules(callback, user_state)
-    elif sub_prefix == "edit-notify":
-        await show_notify_edit(callback, user_state)
+@inline_router.route("chat-edit-menu", "exit")
+async def exit_chat_menu(callback: types.CallbackQuery):
+    await callback.message.delete()
 
-    ##### Ban words
-    elif sub_prefix == "edit-banwords":
-        await show_ban_words_edit(callback, user_state)
-    elif sub_prefix == "toggle-bw-enabled":
-        await toggle_bw_enabled(callback, session, user_state)
-    elif sub_prefix == "toggle-bw-punishment-type":
-        await toggle_ban_words_punishment_type(callback, session, user_state, raw_data)
-    elif sub_prefix == "toggle-bw-punishment-time":
-        await toggle_ban_words_punishment_time(callback, session, user_state, raw_data)
-
-    ##### Ban links
-    elif sub_prefix == "edit-banlinks":
-        await show_ban_links_edit(callback, user_state)
-    elif sub_prefix == "toggle-lf-enabled":
-        await toggle_ban_links_enabled(callback, session, user_state)
-    elif sub_prefix == "toggle-lf-blockall":
-        await toggle_ban_links_blockall(callback, session, user_state)
-    elif sub_prefix == "edit-lf-whitelist":
-        await show_ban_links_whitelist_edit(callback, user_state)
-    elif sub_prefix == "add-lf-whitelist":
-        await show_ban_links_whitelist_add(callback, user_state)
-    elif sub_prefix == "delete-lf-whitelist":
-        await show_ban_links_whitelist_delete(callback, user_state)
 
-    
-    
+### Функції для спрощення коду з Callback
+RenderedMenu = Tuple[str, types.InlineKeyboardMarkup]
 
 
-### Функції для спрощення коду з Callback
+async def edit_menu(
+    target: Union[types.CallbackQuery, types.Message],
+    user_state: BotUserState,
+    rendered: RenderedMenu,
+    key: Optional[str] = None
+):
+    text, markup = rendered
+    if isinstance(target, types.CallbackQuery):
+        chat_id, message_id = target.message.chat.id, target.message.message_id
+    else:
+        chat_id, message_id = target.chat.id, user_state.last_message_id
+
+    if key is not None and await get_message_menu(chat_id, message_id) == key:
+        return
+
+    try:
+        if isinstance(target, types.CallbackQuery):
+            await target.message.edit_text(text, reply_markup=markup)
+        else:
+            await target.bot.edit_message_text(
+                text=text,
+                chat_id=chat_id,
+                message_id=message_id,
+                inline_message_id=user_state.last_inline_message_id,
+                reply_markup=markup
+            )
+    except TelegramBadRequest as e:
+        if "message is not modified" not in str(e):
+            raise
+    await set_message_menu(chat_id, message_id, key)
+
+
+async def show_menu(
+    target: Union[types.CallbackQuery, types.Message],
+    user_state: BotUserState,
+    menu: str,
+    render: Callable[[int, ChatSettings], RenderedMenu]
+):
+    chat_id = user_state.edit.selected_chat_tid
+    chat_state = await services.get_chat_from_cache(chat_id)
+    key = f"{menu}_{chat_id}_{chat_state.settings_version}"
+    rendered = await get_rendered_menu(key)
+    if rendered is None:
+        rendered = render(chat_id, chat_state.settings)
+        await set_rendered_menu(key, rendered)
+    await edit_menu(target, user_state, rendered, key)
+
+
+@inline_router.route("chat-edit-menu", "chat")
+@inline_router.route("chat-edit", "chat")
 async def show_chat_details(callback: types.CallbackQuery, session: AsyncSession, raw_data: str, user_id: int):
     chat_data = await services.get_chat_by(session, int(raw_data))
     user_state = await get_user_state(callback.from_user.id)
     user_state.edit = BotUserStateEdit(
-        user_id =callback.from_user.id,
         selected_chat_id=chat_data.id,
         selected_chat_tid=chat_data.telegram_id,
-        settings=chat_data.settings
     )
     user_state.last_inline_message_id=callback.inline_message_id
     await set_user_state(user_id, user_state)
@@ -98,32 +114,28 @@ async def show_chat_details(callback: types.CallbackQuery, session: AsyncSession
     kb.row(types.InlineKeyboardButton(text=strings.BACK, callback_data=encode_inline_data("chat-edit-menu", "exit", "")))
     kb.adjust(2)
 
-    await callback.message.edit_text(strings.BOT_CHATS_DETAILS.format(
+    await edit_menu(callback, user_state, (strings.BOT_CHATS_DETAILS.format(
         chat_title=chat_data.title,
         chat_type=chat_data.chat_type.to_locale,
         chat_id=chat_data.telegram_id,
         chat_user_count=len(chat_data.users)
-    ), reply_markup=kb.as_markup())
+    ), kb.as_markup()))
 
     
+@inline_router.route("chat-edit", "toggle-basic-enabled")
 async def toggle_basic_enabled(callback: types.CallbackQuery, session: AsyncSession, user_state: BotUserState):
     chat_id = user_state.edit.selected_chat_tid
-    chat_state = await services.get_chat_from_cache(chat_id)
-    chat_settings = chat_state.settings
-    chat_settings.moderation.enabled = not chat_settings.moderation.enabled
-    await services.update_chat_settings_by_id(session, chat_id, chat_settings)
+    await services.patch_chat_settings(session, chat_id, "moderation.enabled", toggle=True)
     await show_basic_edit(callback, user_state)
 
+@inline_router.route("chat-edit", "toggle-bw-enabled")
 async def toggle_bw_enabled(callback: types.CallbackQuery, session: AsyncSession, user_state: BotUserState):
     chat_id = user_state.edit.selected_chat_tid
-    chat_state = await services.get_chat_from_cache(chat_id)
-    chat_settings = chat_state.settings
-    chat_settings.restricted_words.enabled = not chat_settings.restricted_words.enabled
-    await services.update_chat_settings_by_id(session, chat_id, chat_settings)
+    await services.patch_chat_settings(session, chat_id, "restricted_words.enabled", toggle=True)
     await show_ban_words_edit(callback, user_state)
 
-async def show_edit_menu(callback: types.CallbackQuery, user_state: BotUserState):
-    chat_id = user_state.edit.selected_chat_tid
+
+def render_edit_menu(chat_id: int, chat_settings: ChatSettings) -> RenderedMenu:
     kb = InlineKeyboardBuilder()
     kb.button(text=strings.EDIT_BASIC, callback_data=encode_inline_data("chat-edit", "edit-basic", chat_id))
     kb.button(text=strings.EDIT_NOTIFY, callback_data=encode_inline_data("chat-edit", "edit-notify", chat_id))
@@ -132,14 +144,14 @@ async def show_edit_menu(callback: types.CallbackQuery, user_state: BotUserState
     kb.row()
     kb.add(types.InlineKeyboardButton(text=strings.BACK, callback_data=encode_inline_data("chat-edit", "chat", chat_id)))
     kb.adjust(2)
+    return strings.BOT_EDIT_CHAT_MOD_SETTINGS, kb.as_markup()
 
-    await callback.message.edit_text(strings.BOT_EDIT_CHAT_MOD_SETTINGS, reply_markup=kb.as_markup())
+@inline_router.route("chat-edit", "edit")
+async def show_edit_menu(callback: types.CallbackQuery, user_state: BotUserState):
+    await show_menu(callback, user_state, "edit", render_edit_menu)
 
-async def show_basic_edit(callback: types.CallbackQuery, user_state: BotUserState):
-    chat_id = user_state.edit.selected_chat_tid
-    chat_state = await services.get_chat_from_cache(chat_id)
-    chat_settings = chat_state.settings
-    
+
+def render_basic_edit(chat_id: int, chat_settings: ChatSettings) -> RenderedMenu:
     kb = InlineKeyboardBuilder()
     kb.button(
         text=strings.OFF if chat_settings.moderation.enabled else strings.ON, 
@@ -151,40 +163,41 @@ async def show_basic_edit(callback: types.CallbackQuery, user_state: BotUserStat
     )
     kb.button(text=strings.BACK, callback_data=encode_inline_data("chat-edit", "edit", chat_id))
     kb.adjust(1)
-    await callback.message.edit_text(strings.CHAT_EDIT_BASIC.format(
+    return strings.CHAT_EDIT_BASIC.format(
         is_mod_on=strings.YES if chat_settings.moderation.enabled else strings.NO
-    ), reply_markup=kb.as_markup())
+    ), kb.as_markup()
 
-async def show_welcome_rules(callback: types.CallbackQuery, user_state: BotUserState):
-    chat_id = user_state.edit.selected_chat_tid
-    chat_state = await services.get_chat_from_cache(chat_id)
-    chat_settings = chat_state.settings
+@inline_router.route("chat-edit", "edit-basic")
+async def show_basic_edit(callback: types.CallbackQuery, user_state: BotUserState):
+    await show_menu(callback, user_state, "basic", render_basic_edit)
+
+
+def render_welcome_rules(chat_id: int, chat_settings: ChatSettings) -> RenderedMenu:
     kb = InlineKeyboardBuilder()
     kb.button(text=strings.BACK, callback_data=encode_inline_data("chat-edit", "edit", chat_id))
-
-    await callback.message.edit_text(strings.CHAT_RULES_SETTINGS.format(
+    return strings.CHAT_RULES_SETTINGS.format(
         is_rules_enabled=strings.yes_no(chat_settings.moderation.read_rules.enabled),
         rules_link=chat_settings.moderation.read_rules.url
-    ), reply_markup=kb.as_markup())
+    ), kb.as_markup()
 
+@inline_router.route("chat-edit", "edit-welcome-rules")
+async def show_welcome_rules(callback: types.CallbackQuery, user_state: BotUserState):
+    await show_menu(callback, user_state, "welcome-rules", render_welcome_rules)
 
 
-async def show_notify_edit(callback: types.CallbackQuery, user_state: BotUserState):
-    chat_id = user_state.edit.selected_chat_tid
-    chat_state = await services.get_chat_from_cache(chat_id)
-    chat_settings = chat_state.settings
+def render_notify_edit(chat_id: int, chat_settings: ChatSettings) -> RenderedMenu:
     kb = InlineKeyboardBuilder()
     kb.button(text=strings.BACK, callback_data=encode_inline_data("chat-edit", "edit", chat_id))
-
-    await callback.message.edit_text(strings.CHAT_EDIT_NOTIFY.format(
+    return strings.CHAT_EDIT_NOTIFY.format(
         is_new_member_on=strings.YES if chat_settings.notifications.new_user_notifications else strings.NO
-    ), reply_markup=kb.as_markup())
+    ), kb.as_markup()
 
-async def show_ban_links_edit(callback: types.CallbackQuery, user_state: BotUserState) -> None:
-    chat_id = user_state.edit.selected_chat_tid
-    chat_state = await services.get_chat_from_cache(chat_id)
-    chat_settings = chat_state.settings
-    
+@inline_router.route("chat-edit", "edit-notify")
+async def show_notify_edit(callback: types.CallbackQuery, user_state: BotUserState):
+    await show_menu(callback, user_state, "notify", render_notify_edit)
+
+
+def render_ban_links_edit(chat_id: int, chat_settings: ChatSettings) -> RenderedMenu:
     kb = InlineKeyboardBuilder()
     kb.button(
         text=f"{strings.ENABLED}: {strings.yes_no(chat_settings.link_filtering.enabled)}", 
@@ -203,73 +216,64 @@ async def show_ban_links_edit(callback: types.CallbackQuery, user_state: BotUser
         callback_data=encode_inline_data("chat-edit", "edit", chat_id)
     )
     kb.adjust(1) 
-    await callback.message.edit_text(
-        strings.CHAT_EDIT_RESTRICTED_LINKS.format(
-            is_mod_on = strings.yes_no(chat_settings.link_filtering.enabled),
-            ban_all_links = strings.yes_no(chat_settings.link_filtering.block_all),
-            whitelist_label = ", ".join(chat_settings.link_filtering.whitelist)
-        ), 
-        reply_markup=kb.as_markup()
-    )
+    return strings.CHAT_EDIT_RESTRICTED_LINKS.format(
+        is_mod_on = strings.yes_no(chat_settings.link_filtering.enabled),
+        ban_all_links = strings.yes_no(chat_settings.link_filtering.block_all),
+        whitelist_label = ", ".join(chat_settings.link_filtering.whitelist)
+    ), kb.as_markup()
+
+@inline_router.route("chat-edit", "edit-banlinks")
+async def show_ban_links_edit(callback: types.CallbackQuery, user_state: BotUserState) -> None:
+    await show_menu(callback, user_state, "banlinks", render_ban_links_edit)
     
+@inline_router.route("chat-edit", "toggle-lf-enabled")
 async def toggle_ban_links_enabled(callback: types.CallbackQuery, session: AsyncSession, user_state: BotUserState):
     chat_id = user_state.edit.selected_chat_tid
-    chat_state = await services.get_chat_from_cache(chat_id)
-    chat_settings = chat_state.settings
-    chat_settings.link_filtering.enabled = not chat_settings.link_filtering.enabled
-    await services.update_chat_settings_by_id(session, chat_id, chat_settings)
+    await services.patch_chat_settings(session, chat_id, "link_filtering.enabled", toggle=True)
     return await show_ban_links_edit(callback, user_state)
 
-async def show_ban_links_whitelist_delete(
-        callback: types.CallbackQuery,
-        user_state: BotUserState
-):
-    chat_id = user_state.edit.selected_chat_tid
-    chat_state = await services.get_chat_from_cache(chat_id)
-    chat_settings = chat_state.settings
-    user_state.state = constants.UserState.EDIT_BOT_LINK_FILTER_DELETE
-    await set_user_state(callback.from_user.id, user_state)
 
+def render_ban_links_whitelist_delete(chat_id: int, chat_settings: ChatSettings) -> RenderedMenu:
     kb = InlineKeyboardBuilder()
     kb.button(
         text=strings.BACK, 
         callback_data=encode_inline_data("chat-edit", "edit-lf-whitelist", "-")
     )
     kb.adjust(1) 
-    return await callback.message.edit_text(
-        strings.CHAT_EDIT_RESTRICTED_LINKS_WHITELIST_DELETE.format(
-            whitelist_links = ", ".join(chat_settings.link_filtering.whitelist)
-        ),
-        reply_markup=kb.as_markup()
-    )
+    return strings.CHAT_EDIT_RESTRICTED_LINKS_WHITELIST_DELETE.format(
+        whitelist_links = ", ".join(chat_settings.link_filtering.whitelist)
+    ), kb.as_markup()
 
-async def show_ban_links_whitelist_add(
+@inline_router.route("chat-edit", "delete-lf-whitelist")
+async def show_ban_links_whitelist_delete(
         callback: types.CallbackQuery,
         user_state: BotUserState
 ):
-    user_state.state = constants.UserState.EDIT_BOT_LINK_FILTER_ADD
+    user_state.state = constants.UserState.EDIT_BOT_LINK_FILTER_DELETE
     await set_user_state(callback.from_user.id, user_state)
+    return await show_menu(callback, user_state, "lf-whitelist-delete", render_ban_links_whitelist_delete)
 
+
+def render_ban_links_whitelist_add(chat_id: int, chat_settings: ChatSettings) -> RenderedMenu:
     kb = InlineKeyboardBuilder()
     kb.button(
         text=strings.BACK, 
         callback_data=encode_inline_data("chat-edit", "edit-lf-whitelist", "-")
     )
     kb.adjust(1) 
-    return await callback.message.edit_text(
-            strings.CHAT_EDIT_RESTRICTED_LINKS_WHITELIST_ADD,
-            reply_markup=kb.as_markup()
-        )
-
+    return strings.CHAT_EDIT_RESTRICTED_LINKS_WHITELIST_ADD, kb.as_markup()
 
-async def show_ban_links_whitelist_edit(
-        callback: Union[types.CallbackQuery, types.Message], 
+@inline_router.route("chat-edit", "add-lf-whitelist")
+async def show_ban_links_whitelist_add(
+        callback: types.CallbackQuery,
         user_state: BotUserState
 ):
-    chat_id = user_state.edit.selected_chat_tid
-    chat_state = await services.get_chat_from_cache(chat_id)
-    chat_settings = chat_state.settings
+    user_state.state = constants.UserState.EDIT_BOT_LINK_FILTER_ADD
+    await set_user_state(callback.from_user.id, user_state)
+    return await show_menu(callback, user_state, "lf-whitelist-add", render_ban_links_whitelist_add)
 
+
+def render_ban_links_whitelist_edit(chat_id: int, chat_settings: ChatSettings) -> RenderedMenu:
     kb = InlineKeyboardBuilder()
     kb.button(
         text=strings.ADD, 
@@ -284,45 +288,33 @@ async def show_ban_links_whitelist_edit(
         callback_data=encode_inline_data("chat-edit", "edit-banlinks", "-")
     )
     kb.adjust(1) 
-    if isinstance(callback, types.CallbackQuery):
-        await callback.message.edit_text(
-            strings.CHAT_EDIT_RESTRICTED_LINKS_WHITELIST.format(
-                whitelist_links = ", ".join(chat_settings.link_filtering.whitelist)
-            ), 
-            reply_markup=kb.as_markup()
-        )
-    elif isinstance(callback, types.Message):
-        await callback.bot.edit_message_text(
-            text = strings.CHAT_EDIT_RESTRICTED_LINKS_WHITELIST.format(
-               whitelist_links = ", ".join(chat_settings.link_filtering.whitelist)
-            ),
-            chat_id=callback.chat.id,
-            message_id=user_state.last_message_id,
-            inline_message_id=user_state.last_inline_message_id,
-            reply_markup=kb.as_markup()
-        )
-    return 
+    return strings.CHAT_EDIT_RESTRICTED_LINKS_WHITELIST.format(
+        whitelist_links = ", ".join(chat_settings.link_filtering.whitelist)
+    ), kb.as_markup()
+
+@inline_router.route("chat-edit", "edit-lf-whitelist")
+async def show_ban_links_whitelist_edit(
+        callback: Union[types.CallbackQuery, types.Message], 
+        user_state: BotUserState
+):
+    return await show_menu(callback, user_state, "lf-whitelist", render_ban_links_whitelist_edit)
 
 
+@inline_router.route("chat-edit", "toggle-lf-blockall")
 async def toggle_ban_links_blockall(callback: types.CallbackQuery, session: AsyncSession, user_state: BotUserState):
     chat_id = user_state.edit.selected_chat_tid
-    chat_state = await services.get_chat_from_cache(chat_id)
-    chat_settings = chat_state.settings
-    chat_settings.link_filtering.block_all = not chat_settings.link_filtering.block_all
-    await services.update_chat_settings_by_id(session, chat_id, chat_settings)
+    await services.patch_chat_settings(session, chat_id, "link_filtering.block_all", toggle=True)
     return await show_ban_links_edit(callback, user_state)
-    
-async def show_ban_words_edit(
-    callback: Union[types.CallbackQuery, types.Message], 
-    user_state: BotUserState
-):
-    chat_id = user_state.edit.selected_chat_tid
-    chat_state = await services.get_chat_from_cache(chat_id)
-    chat_settings = chat_state.settings
-    punishment_type = {
+
+
+def _punishment_type_label(chat_settings: ChatSettings) -> str:
+    return {
         'ban': strings.BAN,
         "mute": strings.MUTE
     }.get(chat_settings.restricted_words.punishment.type)
+
+def render_ban_words_edit(chat_id: int, chat_settings: ChatSettings) -> RenderedMenu:
+    punishment_type = _punishment_type_label(chat_settings)
     
     kb = InlineKeyboardBuilder()
     kb.button(
@@ -337,61 +329,76 @@ async def show_ban_words_edit(
         text=f"{strings.PUNISHENT_DURATION}: {chat_settings.restricted_words.punishment.duration}", 
         callback_data=encode_inline_data("chat-edit", "toggle-bw-punishment-time")
     )
+    kb.button(
+        text=f"{strings.SENSITIVITY}: {strings.sensitivity(chat_settings.restricted_words.sensitivity)}", 
+        callback_data=encode_inline_data("chat-edit", "toggle-bw-sensitivity", "-")
+    )
+    kb.button(
+        text=strings.TOXIC_WORDS, 
+        callback_data=encode_inline_data("chat-edit", "edit-bw-toxic", "-")
+    )
     kb.button(
         text=strings.BACK, 
         callback_data=encode_inline_data("chat-edit", "edit", chat_id)
     )
     kb.adjust(1) 
-    if isinstance(callback, types.CallbackQuery):
-        await callback.message.edit_text(
-            strings.CHAT_EDIT_RESTRICTED_WORDS.format(
-                is_ban_word_on=strings.YES if chat_settings.restricted_words.enabled else strings.NO,
-                punishment_type=punishment_type,
-                punishment_duration=chat_settings.restricted_words.punishment.duration,
-                punishment_warns_count=chat_settings.restricted_words.punishment.warning_threshold
-            ), 
-            reply_markup=kb.as_markup()
-        )
-    elif isinstance(callback, types.Message):
-        await callback.bot.edit_message_text(
-            text = strings.CHAT_EDIT_RESTRICTED_WORDS.format(
-                is_ban_word_on=strings.YES if chat_settings.restricted_words.enabled else strings.NO,
-                punishment_type=punishment_type,
-                punishment_duration=chat_settings.restricted_words.punishment.duration,
-                punishment_warns_count=chat_settings.restricted_words.punishment.warning_threshold
-            ),
-            chat_id=callback.chat.id,
-            message_id=user_state.last_message_id,
-            inline_message_id=user_state.last_inline_message_id,
-            reply_markup=kb.as_markup()
-        )
-    return 
+    return strings.CHAT_EDIT_RESTRICTED_WORDS.format(
+        is_ban_word_on=strings.YES if chat_settings.restricted_words.enabled else strings.NO,
+        punishment_type=punishment_type,
+        punishment_duration=chat_settings.restricted_words.punishment.duration,
+        punishment_warns_count=chat_settings.restricted_words.punishment.warning_threshold,
+        sensitivity=strings.sensitivity(chat_settings.restricted_words.sensitivity),
+        toxic_words=_toxic_words_label(chat_settings)
+    ), kb.as_markup()
+
+@inline_router.route("chat-edit", "edit-banwords")
+async def show_ban_words_edit(
+    callback: Union[types.CallbackQuery, types.Message], 
+    user_state: BotUserState
+):
+    return await show_menu(callback, user_state, "banwords", render_ban_words_edit)
 
+
+def render_ban_words_punishment_time(chat_id: int, chat_settings: ChatSettings) -> RenderedMenu:
+    kb = InlineKeyboardBuilder()
+    kb.button(text=strings.BACK, callback_data=encode_inline_data("chat-edit", "edit-banwords", chat_id))
+    kb.adjust(1) 
+    return strings.CHAT_EDIT_RW_SELECT_PUNISHMENT_DURATION.format(
+        punishment_type=_punishment_type_label(chat_settings),
+        punishment_warns_count=chat_settings.restricted_words.punishment.warning_threshold
+    ), kb.as_markup()
+
+@inline_router.route("chat-edit", "toggle-bw-punishment-time")
 async def toggle_ban_words_punishment_time(callback: types.CallbackQuery, session: AsyncSession, user_state: BotUserState, raw_data: str):
-    chat_id = user_state.edit.selected_chat_tid
-    chat_state = await services.get_chat_from_cache(chat_id)
-    chat_settings = chat_state.settings
-    punishment_type = {
-        'ban': strings.BAN,
-        "mute": strings.MUTE
-    }.get(chat_settings.restricted_words.punishment.type)
-    
-    
     if raw_data:
         user_state.state = None
     else:
-        kb = InlineKeyboardBuilder()
-        kb.button(text=strings.BACK, callback_data=encode_inline_data("chat-edit", "edit-banwords", chat_id))
-        kb.adjust(1) 
         user_state.state = constants.UserState.EDIT_BOT_RESTRICTED_WORD_DURATION
         user_state.last_message_id = callback.message.message_id
         user_state.last_inline_message_id = callback.inline_message_id
-        await callback.message.edit_text(strings.CHAT_EDIT_RW_SELECT_PUNISHMENT_DURATION.format(
-            punishment_type=punishment_type,
-            punishment_warns_count=chat_settings.restricted_words.punishment.warning_threshold
-        ), reply_markup=kb.as_markup())
+        await show_menu(callback, user_state, "bw-punishment-time", render_ban_words_punishment_time)
     return
-    
+
+
+def render_ban_words_punishment_type(chat_id: int, chat_settings: ChatSettings) -> RenderedMenu:
+    kb = InlineKeyboardBuilder()
+    kb.button(
+        text=f"{strings.BAN} 🔒", 
+        callback_data=encode_inline_data("chat-edit", "toggle-bw-punishment-type", "ban")
+    )
+    kb.row()
+    kb.button(
+        text=f"{strings.MUTE} 🌐", 
+        callback_data=encode_inline_data("chat-edit", "toggle-bw-punishment-type", "mute")
+    )
+    kb.row()
+    kb.button(text=strings.BACK, callback_data=encode_inline_data("chat-edit", "edit-banwords", chat_id))
+    kb.adjust(2) 
+    return strings.CHAT_EDIT_RW_SELECT_PUNISHMENT_TYPE.format(
+        punishment_warns_count=chat_settings.restricted_words.punishment.warning_threshold
+    ), kb.as_markup()
+
+@inline_router.route("chat-edit", "toggle-bw-punishment-type")
 async def toggle_ban_words_punishment_type(callback: types.CallbackQuery, session: AsyncSession, user_state: BotUserState, raw_data: str):
     if not user_state: 
         await callback.answer("Помилка даних, почніть з початку...", show_alert=True)
@@ -399,33 +406,98 @@ async def toggle_ban_words_punishment_type(callback: types.CallbackQuery, sessio
     
     
     chat_id = user_state.edit.selected_chat_tid
-    chat_state = await services.get_chat_from_cache(chat_id)
-    chat_settings = chat_state.settings
     
     if raw_data in ["ban", "mute"]:
-        chat_settings.restricted_words.punishment.type = raw_data
-        await services.update_chat_settings_by_id(session, chat_id, chat_settings)
+        await services.patch_chat_settings(session, chat_id, "restricted_words.punishment.type", raw_data)
         await show_ban_words_edit(callback, user_state)
     else:
-        kb = InlineKeyboardBuilder()
-        kb.button(
-            text=f"{strings.BAN} 🔒", 
-            callback_data=encode_inline_data("chat-edit", "toggle-bw-punishment-type", "ban")
-        )
-        kb.row()
-        kb.button(
-            text=f"{strings.MUTE} 🌐", 
-            callback_data=encode_inline_data("chat-edit", "toggle-bw-punishment-type", "mute")
-        )
-        kb.row()
-        kb.button(text=strings.BACK, callback_data=encode_inline_data("chat-edit", "edit-banwords", chat_id))
-        kb.adjust(2) 
-        await callback.message.edit_text(strings.CHAT_EDIT_RW_SELECT_PUNISHMENT_TYPE.format(
-            punishment_warns_count=chat_settings.restricted_words.punishment.warning_threshold
-        ), reply_markup=kb.as_markup())
+        await show_menu(callback, user_state, "bw-punishment-type", render_ban_words_punishment_type)
         
     return
 
+_SENSITIVITY_CYCLE = {"default": "high", "high": "low", "low": "default"}
+
+@inline_router.route("chat-edit", "toggle-bw-sensitivity")
+async def toggle_ban_words_sensitivity(callback: types.CallbackQuery, session: AsyncSession, user_state: BotUserState):
+    chat_id = user_state.edit.selected_chat_tid
+    chat_state = await services.get_chat_from_cache(chat_id)
+    sensitivity = _SENSITIVITY_CYCLE.get(chat_state.settings.restricted_words.sensitivity, "default")
+    await services.patch_chat_settings(session, chat_id, "restricted_words.sensitivity", sensitivity)
+    return await show_ban_words_edit(callback, user_state)
+
+
+def _toxic_words_label(chat_settings: ChatSettings) -> str:
+    return ", ".join(chat_settings.restricted_words.toxic_words) or strings.NONE
+
+def render_toxic_words_edit(chat_id: int, chat_settings: ChatSettings) -> RenderedMenu:
+    kb = InlineKeyboardBuilder()
+    kb.button(
+        text=strings.ADD, 
+        callback_data=encode_inline_data("chat-edit", "add-bw-toxic", "-")
+    )
+    kb.button(
+        text=strings.DELETE, 
+        callback_data=encode_inline_data("chat-edit", "delete-bw-toxic", "-")
+    )
+    kb.button(
+        text=strings.BACK, 
+        callback_data=encode_inline_data("chat-edit", "edit-banwords", chat_id)
+    )
+    kb.adjust(1) 
+    return strings.CHAT_EDIT_TOXIC_WORDS.format(
+        toxic_words=_toxic_words_label(chat_settings)
+    ), kb.as_markup()
+
+@inline_router.route("chat-edit", "edit-bw-toxic")
+async def show_toxic_words_edit(
+        callback: Union[types.CallbackQuery, types.Message], 
+        user_state: BotUserState
+):
+    return await show_menu(callback, user_state, "bw-toxic", render_toxic_words_edit)
+
+
+def render_toxic_words_add(chat_id: int, chat_settings: ChatSettings) -> RenderedMenu:
+    kb = InlineKeyboardBuilder()
+    kb.button(
+        text=strings.BACK, 
+        callback_data=encode_inline_data("chat-edit", "edit-bw-toxic", "-")
+    )
+    kb.adjust(1) 
+    return strings.CHAT_EDIT_TOXIC_WORDS_ADD, kb.as_markup()
+
+@inline_router.route("chat-edit", "add-bw-toxic")
+async def show_toxic_words_add(
+        callback: types.CallbackQuery,
+        user_state: BotUserState
+):
+    user_state.state = constants.UserState.EDIT_BOT_TOXIC_WORDS_ADD
+    user_state.last_message_id = callback.message.message_id
+    await set_user_state(callback.from_user.id, user_state)
+    return await show_menu(callback, user_state, "bw-toxic-add", render_toxic_words_add)
+
+
+def render_toxic_words_delete(chat_id: int, chat_settings: ChatSettings) -> RenderedMenu:
+    kb = InlineKeyboardBuilder()
+    kb.button(
+        text=strings.BACK, 
+        callback_data=encode_inline_data("chat-edit", "edit-bw-toxic", "-")
+    )
+    kb.adjust(1) 
+    return strings.CHAT_EDIT_TOXIC_WORDS_DELETE.format(
+        toxic_words=_toxic_words_label(chat_settings)
+    ), kb.as_markup()
+
+@inline_router.route("chat-edit", "delete-bw-toxic")
+async def show_toxic_words_delete(
+        callback: types.CallbackQuery,
+        user_state: BotUserState
+):
+    user_state.state = constants.UserState.EDIT_BOT_TOXIC_WORDS_DELETE
+    user_state.last_message_id = callback.message.message_id
+    await set_user_state(callback.from_user.id, user_state)
+    return await show_menu(callback, user_state, "bw-toxic-delete", render_toxic_words_delete)
+
+
 @with_session
 async def on_welcome_chat(callback: types.CallbackQuery, session: AsyncSession):
     user_id = callback.from_user.id
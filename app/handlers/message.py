@@ -4,13 +4,19 @@ from app import services
 from app import strings
 from app import schemas
 from app import constants
-from app.cache import get_user_state, check_user_spam_status, increment_user_message_count, set_user_state
+from app.cache import (
+    get_approved_message, get_user_state, check_user_spam_status, increment_user_message_count,
+    is_new_member, set_approved_message, set_member_joined, set_user_state, update_chat_member_role
+)
 from app.classes import DurationString
 from app.dependencies import with_session, with_user_and_chat_and_rights
 from sqlalchemy.ext.asyncio import AsyncSession
-from .inline import show_ban_words_edit, show_ban_links_whitelist_edit
+from .inline import show_ban_words_edit, show_ban_links_whitelist_edit, show_toxic_words_edit
 from app.models import TelegramUser, TelegramChat, UserChatAssociation
-from app.utils import compare_links, encode_inline_data, format_timedelta_ua, is_link, subtract_datetimes, utcnow
+from app.callbacks import encode_inline_data
+from app.moderation import edited_text, message_text, message_tokens
+from app.raid import raid_actions, raid_detector
+from app.utils import compare_links, format_timedelta_ua, is_link, subtract_datetimes, utcnow
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 
@@ -26,6 +32,7 @@ async def on_left_chat_member(message: types.ChatMemberUpdated, session:AsyncSes
 
         chat = await services.get_or_create_chat(session, chat_id, chat_title, chat_type)
         left_user_id = message.new_chat_member.user.id
+        await update_chat_member_role(chat_id, left_user_id, constants.UserRole.from_status(message.new_chat_member.status))
         association = await services.get_association(session, left_user_id, chat_id)
         
         if association and association.ban_expires: 
@@ -48,9 +55,13 @@ async def on_new_chat_member(message: types.ChatMemberUpdated, session:AsyncSess
         chat_type = constants.ChatType(message.chat.type)
         chat_title = message.from_user.full_name if chat_type.is_private else message.chat.title
 
+        new_user_id = message.new_chat_member.user.id
+        raid = not message.new_chat_member.user.is_bot and raid_detector.record_join(chat_id, new_user_id)
+
         chat = await services.get_or_create_chat(session, chat_id, chat_title, chat_type)
 
         if message.new_chat_member.user.is_bot: return
+        await set_member_joined(chat_id, new_user_id)
         user, user_association = await services.proccess_new_member(message.new_chat_member.user, chat, session)
 
         if user_association.ban_expires:
@@ -59,14 +70,21 @@ async def on_new_chat_member(message: types.ChatMemberUpdated, session:AsyncSess
                 user_id=user.telegram_id,
                 until_date=user_association.ban_expires
             )
-            await message.bot.send_message(
-                chat_id,
-                strings.USER_BANNED_MESSAGE.format(
-                    username=user.username
-                ),
-            )
+            if not raid:
+                await message.bot.send_message(
+                    chat_id,
+                    strings.USER_BANNED_MESSAGE.format(
+                        username=user.username
+                    ),
+                )
             return 
 
+        # The member is recorded; during a raid skip the welcome and rules
+        # prompt and leave the restriction to the batched raid actions.
+        if raid:
+            raid_actions.restrict(message.bot, chat_id, new_user_id)
+            return
+
 
         await message.bot.restrict_chat_member(
             chat_id,
@@ -109,6 +127,7 @@ async def on_user_permissions_changed(event: types.ChatMemberUpdated, session:As
     # username = event.new_chat_member.user.username
     # old_status = event.old_chat_member.status
     new_status = event.new_chat_member.status
+    await update_chat_member_role(chat_id, user_id, constants.UserRole.from_status(new_status))
     new_permissions = schemas.TelegramUserPermissions.from_user(event.new_chat_member)
     new_permissions.is_member = True
     
@@ -121,7 +140,7 @@ async def on_user_permissions_changed(event: types.ChatMemberUpdated, session:As
         return 
     
 
-    association._privileges = new_permissions.model_dump(mode="json")
+    association.privileges = new_permissions
     association.role = {
         "administrator": constants.UserRole.ADMIN,
         "member": constants.UserRole.MEMBER,
@@ -141,38 +160,12 @@ async def on_rm_duration_message(message: types.Message, session:AsyncSession):
     
     user_id = message.from_user.id
     user_state = await get_user_state(user_id)
-    if not user_state: return await message.delete()
-
-    if user_state.state != constants.UserState.EDIT_BOT_RESTRICTED_WORD_DURATION: return await message.delete()
 
     try:
-        chat_state = await services.get_chat_from_cache(user_state.edit.selected_chat_tid)
-        punishment_type = {
-            'ban': strings.BAN,
-            "mute": strings.MUTE
-        }.get(chat_state.settings.restricted_words.punishment.type)
-
-        chat_settings = chat_state.settings.model_copy()
-        chat_settings.restricted_words.punishment.duration = DurationString(message.text)
-        await services.update_chat_settings_by_id(session, user_state.edit.selected_chat_tid, chat_settings)
-        kb = InlineKeyboardBuilder()
-        kb.button(
-            text=strings.OFF if chat_settings.restricted_words.enabled else strings.ON, 
-            callback_data=encode_inline_data("chat-edit", "toggle-bn-enabled", "-")
-        ) 
-        kb.button(
-            text=f"{strings.PUNISHENT}: {punishment_type}", 
-            callback_data=encode_inline_data("chat-edit", "toggle-bn-punishment-type")
-        )
-        kb.button(
-            text=f"{strings.PUNISHENT_DURATION}: {chat_settings.restricted_words.punishment.duration}", 
-            callback_data=encode_inline_data("chat-edit", "toggle-bn-punishment-time")
+        await services.patch_chat_settings(
+            session, user_state.edit.selected_chat_tid,
+            "restricted_words.punishment.duration", DurationString(message.text)
         )
-        kb.button(
-            text=strings.BACK, 
-            callback_data=encode_inline_data("chat-edit", "edit", message.chat.id)
-        )
-        kb.adjust(1) 
 
         user_state.state = None
         await show_ban_words_edit(message, user_state)
@@ -180,7 +173,7 @@ async def on_rm_duration_message(message: types.Message, session:AsyncSession):
     except Exception as e:
         ...
  
-# @with_session
+@with_session
 async def on_link_filter_whitelist_add(message: types.Message, session:AsyncSession):
     if not is_link(message.text):
         await message.answer(strings.INVALID_LINK)
@@ -196,11 +189,13 @@ async def on_link_filter_whitelist_add(message: types.Message, session:AsyncSess
         return await message.delete()
     
 
-    chat_settings.link_filtering.whitelist.append(message.text)
-    await services.update_chat_settings_by_id(session, chat_id, chat_settings)
+    await services.patch_chat_settings(
+        session, chat_id, "link_filtering.whitelist",
+        [*chat_settings.link_filtering.whitelist, message.text]
+    )
     return await show_ban_links_whitelist_edit(message, user_state)
 
-# @with_session
+@with_session
 async def on_link_filter_whitelist_delete(message: types.Message, session:AsyncSession):
     if not is_link(message.text):
         await message.reply(strings.INVALID_LINK)
@@ -214,71 +209,150 @@ async def on_link_filter_whitelist_delete(message: types.Message, session:AsyncS
         await message.reply(strings.LINK_NOT_IN_WHITELIST)
         return await message.delete()
     
-    chat_settings.link_filtering.whitelist.remove(message.text)
-    await services.update_chat_settings_by_id(session, chat_id, chat_settings)
+    await services.patch_chat_settings(
+        session, chat_id, "link_filtering.whitelist",
+        [link for link in chat_settings.link_filtering.whitelist if link != message.text]
+    )
     return await show_ban_links_whitelist_edit(message, user_state)
 
+def _parse_words(text: str) -> list:
+    return list(dict.fromkeys(word.strip().lower() for word in text.split(",") if word.strip()))
+
+@with_session
+async def on_toxic_words_add(message: types.Message, session:AsyncSession):
+    user_state = await get_user_state(message.from_user.id)
+    chat_id = user_state.edit.selected_chat_tid
+    chat_state = await services.get_chat_from_cache(chat_id)
+    toxic_words = chat_state.settings.restricted_words.toxic_words
+    words = [*toxic_words, *(word for word in _parse_words(message.text) if word not in toxic_words)]
+    if len(words) > constants.TOXIC_OVERLAY_MAX_WORDS:
+        await message.reply(strings.TOXIC_WORDS_LIMIT.format(max_words=constants.TOXIC_OVERLAY_MAX_WORDS))
+        return await message.delete()
+
+    await services.patch_chat_settings(session, chat_id, "restricted_words.toxic_words", words)
+    await message.delete()
+    return await show_toxic_words_edit(message, user_state)
+
+@with_session
+async def on_toxic_words_delete(message: types.Message, session:AsyncSession):
+    user_state = await get_user_state(message.from_user.id)
+    chat_id = user_state.edit.selected_chat_tid
+    chat_state = await services.get_chat_from_cache(chat_id)
+    toxic_words = chat_state.settings.restricted_words.toxic_words
+    removed = set(_parse_words(message.text))
+    if not removed.intersection(toxic_words):
+        await message.reply(strings.TOXIC_WORDS_NOT_FOUND)
+        return await message.delete()
+
+    await services.patch_chat_settings(
+        session, chat_id, "restricted_words.toxic_words",
+        [word for word in toxic_words if word not in removed]
+    )
+    await message.delete()
+    return await show_toxic_words_edit(message, user_state)
+
 @with_user_and_chat_and_rights()
 async def on_global_message(
     message:types.Message,
     session: AsyncSession, user: TelegramUser, chat: TelegramChat, association: UserChatAssociation
 ):
     if message.chat.type == "private": 
-        user_state = await get_user_state(message.from_user.id)
-        if user_state:
-            if user_state.state is constants.UserState.EDIT_BOT_LINK_FILTER_ADD:
-                return await on_link_filter_whitelist_add(message, session)
-            elif user_state.state is constants.UserState.EDIT_BOT_LINK_FILTER_DELETE:
-                return await on_link_filter_whitelist_delete(message, session)
         return
     
+    in_raid = raid_detector.record_message(message.chat.id)
+    if in_raid and raid_detector.is_raid_joiner(message.chat.id, message.from_user.id):
+        raid_actions.delete(message.bot, message.chat.id, message.message_id)
+        return
 
     if not chat.settings and association.role in [constants.UserRole.ADMIN, constants.UserRole.OWNER]: 
         return await message.reply(strings.CHAT_NOT_CONFIGURED)
 
+    text = message_text(message)
+    is_safe, reason = services.is_message_safe(
+        chat.settings, text, chat_id=message.chat.id,
+        sender_id=message.from_user.id,
+        new_member=await is_new_member(message.chat.id, message.from_user.id),
+        exempt=association.role in (constants.UserRole.ADMIN, constants.UserRole.OWNER)
+    )
+    if is_safe:
+        if text:
+            await set_approved_message(message.chat.id, message.message_id, message_tokens(text))
+        return
+    await punish_unsafe_message(message, session, user, chat, association)
+
+
+@with_user_and_chat_and_rights()
+async def on_edited_message(
+    message:types.Message,
+    session: AsyncSession, user: TelegramUser, chat: TelegramChat, association: UserChatAssociation
+):
+    if message.chat.type == "private" or not chat.settings:
+        return
+
+    text = message_text(message)
+    approved = await get_approved_message(message.chat.id, message.message_id)
+    # Edits of approved messages are scored on the added tokens only and kept
+    # out of the duplicate index, which already saw the original.
+    scored = edited_text(approved, text) if approved is not None else text
+    is_safe, reason = services.is_message_safe(
+        chat.settings, scored, deep=not raid_detector.is_raid_joiner(message.chat.id, message.from_user.id),
+        chat_id=None if approved is not None else message.chat.id,
+        sender_id=message.from_user.id,
+        new_member=await is_new_member(message.chat.id, message.from_user.id),
+        exempt=association.role in (constants.UserRole.ADMIN, constants.UserRole.OWNER)
+    )
+    if is_safe:
+        if text:
+            await set_approved_message(message.chat.id, message.message_id, message_tokens(text))
+        return
+    await punish_unsafe_message(message, session, user, chat, association)
+
+
+async def punish_unsafe_message(
+    message:types.Message,
+    session: AsyncSession, user: TelegramUser, chat: TelegramChat, association: UserChatAssociation
+):
     now = utcnow()
-    is_safe, reason = services.is_message_safe(chat.settings, message.text)
-    if not is_safe:
-        chat_id = message.chat.id
-        await message.delete()
+    chat_id = message.chat.id
+    await message.delete()
 
 
-        user, chat, association = await services.punish_user(
-            session, user, chat, association
-        )
+    user, chat, association = await services.punish_user(
+        session, user, chat, association
+    )
 
-        punishment_message = ""
-        if association.warn_count > 0:
-            punishment_message = strings.RESTRICTED_WORD_WARNING.format(
-                current_warn_count = association.warn_count,
-                max_warn_count = chat.settings.restricted_words.punishment.warning_threshold,
-                punishment_type = strings.punish_type(chat.settings.restricted_words.punishment.type)
+    punishment_message = ""
+    if association.warn_count > 0:
+        punishment_message = strings.RESTRICTED_WORD_WARNING.format(
+            current_warn_count = association.warn_count,
+            max_warn_count = chat.settings.restricted_words.punishment.warning_threshold,
+            punishment_type = strings.punish_type(chat.settings.restricted_words.punishment.type)
+        )
+    elif association.mute_expires:
+        punishment_message = strings.MUTED_WARNING.format(time_left = format_timedelta_ua(subtract_datetimes(association.mute_expires, now)))
+        if chat.chat_type is constants.ChatType.SUPERGROUP and not association.role in [constants.UserRole.OWNER, constants.UserRole.ADMIN]:
+            await message.bot.restrict_chat_member(
+                chat_id=chat.telegram_id,
+                user_id=user.telegram_id,
+                permissions=types.ChatPermissions(can_send_messages=False),
+                until_date=association.mute_expires
             )
-        elif association.mute_expires:
-            punishment_message = strings.MUTED_WARNING.format(time_left = format_timedelta_ua(subtract_datetimes(association.mute_expires, now)))
-            if chat.chat_type is constants.ChatType.SUPERGROUP and not association.role in [constants.UserRole.OWNER, constants.UserRole.ADMIN]:
-                await message.bot.restrict_chat_member(
-                    chat_id=chat.telegram_id,
-                    user_id=user.telegram_id,
-                    permissions=types.ChatPermissions(can_send_messages=False),
-                    until_date=association.mute_expires
-                )
-        elif association.ban_expires:
-            punishment_message = strings.BANNED_WARNING.format(time_left = format_timedelta_ua(subtract_datetimes(association.mute_expires, now)))
-            if chat.chat_type in [constants.ChatType.SUPERGROUP,constants.ChatType.GROUP, constants.ChatType.CHANNEL] \
-                    and not association.role in [constants.UserRole.OWNER, constants.UserRole.ADMIN]:
-                await  message.bot.ban_chat_member(
-                    chat=chat.telegram_id,
-                    user_id=user.telegram_id,
-                    until_date=association.ban_expires
-                )
-        if punishment_message:
-            if await check_user_spam_status(chat_id, user.telegram_id):
-                return
-            
-            await message.bot.send_message(
-                chat_id=chat_id,
-                text=punishment_message,
-                message_thread_id=message.message_thread_id
+    elif association.ban_expires:
+        punishment_message = strings.BANNED_WARNING.format(time_left = format_timedelta_ua(subtract_datetimes(association.mute_expires, now)))
+        if chat.chat_type in [constants.ChatType.SUPERGROUP,constants.ChatType.GROUP, constants.ChatType.CHANNEL] \
+                and not association.role in [constants.UserRole.OWNER, constants.UserRole.ADMIN]:
+            await  message.bot.ban_chat_member(
+                chat=chat.telegram_id,
+                user_id=user.telegram_id,
+                until_date=association.ban_expires
             )
-            await increment_user_message_count(chat_id, user.telegram_id)
\ No newline at end of file
+    if punishment_message:
+        if await check_user_spam_status(chat_id, user.telegram_id):
+            return
+        
+        await message.bot.send_message(
+            chat_id=chat_id,
+            text=punishment_message,
+            message_thread_id=message.message_thread_id
+        )
+        await increment_user_message_count(chat_id, user.telegram_id)
\ No newline at end of file
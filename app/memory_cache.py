@@ -0,0 +1,133 @@
+import sys
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from enum import Enum
+from typing import Any, Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+def deep_sizeof(obj: Any, _seen: Optional[set] = None) -> int:
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen or isinstance(obj, (type, Enum)):
+        return 0
+    _seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, _seen) + deep_sizeof(v, _seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, _seen) for item in obj)
+    elif hasattr(obj, "__slots__"):
+        size += sum(
+            deep_sizeof(getattr(obj, slot), _seen)
+            for slot in obj.__slots__ if hasattr(obj, slot)
+        )
+    elif hasattr(obj, "__dict__"):
+        size += deep_sizeof(vars(obj), _seen)
+    return size
+
+
+class BoundedCache(Generic[V]):
+    __slots__ = (
+        "max_entries", "max_bytes", "ttl", "sliding", "sizeof",
+        "_records", "_bytes", "hits", "misses", "evictions", "expirations"
+    )
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: timedelta,
+        max_bytes: Optional[int] = None,
+        sliding: bool = False,
+        sizeof: Callable[[Any], int] = deep_sizeof
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl.total_seconds()
+        self.sliding = sliding
+        self.sizeof = sizeof
+        self._records: "OrderedDict[Hashable, Tuple[float, int, V]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: Hashable) -> Optional[V]:
+        record = self._records.get(key)
+        if record is None:
+            self.misses += 1
+            return None
+
+        now = time.monotonic()
+        expires_at, size, value = record
+        if expires_at <= now:
+            self._drop(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        if self.sliding:
+            self._records[key] = (now + self.ttl, size, value)
+        self._records.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: V) -> None:
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            self.delete(key)
+            return
+
+        self._drop(key)
+        now = time.monotonic()
+        self._records[key] = (now + self.ttl, size, value)
+        self._bytes += size
+        self._sweep(now)
+
+    def delete(self, key: Hashable) -> None:
+        self._drop(key)
+
+    def clear(self) -> None:
+        self._records.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._records),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def _drop(self, key: Hashable) -> None:
+        record = self._records.pop(key, None)
+        if record is not None:
+            self._bytes -= record[1]
+
+    def _sweep(self, now: float) -> None:
+        while self._records:
+            key, (expires_at, _, _) = next(iter(self._records.items()))
+            if expires_at > now:
+                break
+            self._drop(key)
+            self.expirations += 1
+
+        while len(self._records) > self.max_entries or (
+            self.max_bytes is not None and self._bytes > self.max_bytes
+        ):
+            _, (_, size, _) = self._records.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
@@ -0,0 +1,181 @@
+import asyncio
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+LATENCY_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0,
+)
+
+
+class Histogram:
+    __slots__ = ("name", "help", "bounds", "counts", "total", "count")
+
+    def __init__(self, name: str, bounds: Sequence[float] = LATENCY_BUCKETS, help: str = ""):
+        self.name = name
+        self.help = help
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def buckets(self) -> List[Tuple[float, int]]:
+        cumulative, result = 0, []
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            cumulative += count
+            result.append((bound, cumulative))
+        return result
+
+    def quantile(self, q: float) -> float:
+        target = q * self.count
+        for bound, cumulative in self.buckets():
+            if cumulative >= target:
+                return bound
+        return float("inf")
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+        }
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for bound, cumulative in self.buckets():
+            lines.append(f'{self.name}_bucket{{le="{_number(bound)}"}} {cumulative}')
+        lines.append(f"{self.name}_sum {_number(self.total)}")
+        lines.append(f"{self.name}_count {self.count}")
+        return lines
+
+
+class Counter:
+    # Updated only from the event loop thread, so a plain dict is enough: no
+    # lock, one lookup and one store per increment.
+    __slots__ = ("name", "help", "labels", "values")
+
+    def __init__(self, name: str, help: str = "", labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for values, value in self.values.items():
+            lines.append(f"{self.name}{_labels(self.labels, values)} {_number(value)}")
+        return lines
+
+
+Sample = Tuple[Dict[str, str], float]
+
+
+class Gauge:
+    # Read at scrape time from state the app already keeps, so it costs
+    # nothing on the hot path.
+    # kind="counter" exposes totals the app already counts, like cache hits.
+    __slots__ = ("name", "help", "collect", "kind")
+
+    def __init__(self, name: str, collect: Callable[[], Iterable[Sample]], help: str = "", kind: str = "gauge"):
+        self.name = name
+        self.help = help
+        self.collect = collect
+        self.kind = kind
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in self.collect():
+            lines.append(f"{self.name}{_labels(tuple(labels), tuple(labels.values()))} {_number(value)}")
+        return lines
+
+
+Metric = Union[Counter, Gauge, Histogram]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str = "", labels: Sequence[str] = ()) -> Counter:
+        return self.metrics.get(name) or self.register(Counter(name, help, labels))
+
+    def gauge(
+        self, name: str, collect: Callable[[], Iterable[Sample]], help: str = "", kind: str = "gauge"
+    ) -> Gauge:
+        return self.register(Gauge(name, collect, help, kind))
+
+    def histogram(self, name: str, help: str = "", bounds: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.metrics.get(name) or self.register(Histogram(name, bounds, help))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+
+registry = MetricsRegistry()
+
+
+async def _handle_scrape(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        request = await reader.readline()
+        while (await reader.readline()).strip():
+            pass
+        if request.split()[1:2] == [b"/metrics"]:
+            status, body = "200 OK", registry.render().encode()
+        else:
+            status, body = "404 Not Found", b"not found\n"
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve_metrics(host: str, port: int) -> Optional[asyncio.AbstractServer]:
+    if not port:
+        return None
+    return await asyncio.start_server(_handle_scrape, host, port)
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except FileNotFoundError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
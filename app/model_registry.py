@@ -0,0 +1,156 @@
+import asyncio
+import gc
+import os
+import time
+from glob import glob
+from typing import Callable, Generic, Optional, Set, Tuple, TypeVar
+from app.metrics import rss_bytes
+from app.utils import get_logger
+
+logger = get_logger()
+
+T = TypeVar("T")
+Signature = Tuple[str, int, int]
+
+
+class ModelRegistry(Generic[T]):
+    # The active model sits behind a single reference. New artifacts are loaded
+    # and validated in a worker thread, then swapped in; callers that already
+    # fetched the old model keep scoring on it until they finish.
+
+    def __init__(
+        self,
+        name: str,
+        loader: Callable[[str], T],
+        validator: Callable[[T], Tuple[bool, str]],
+        default_path: str,
+        pattern: str,
+        poll_interval: float,
+        nbytes: Callable[[T], int] = lambda model: 0,
+        on_swap: Callable[[T], None] = lambda model: None,
+    ):
+        self.name = name
+        self.loader = loader
+        self.validator = validator
+        self.default_path = default_path
+        self.pattern = pattern
+        self.poll_interval = poll_interval
+        self.nbytes = nbytes
+        self.on_swap = on_swap
+        self.path: Optional[str] = None
+        self._active: Optional[T] = None
+        self._seen: Optional[Signature] = None
+        self._pending: Optional[Signature] = None
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._requests: Set[asyncio.Task] = set()
+
+    def get(self) -> T:
+        if self._active is None:
+            self._active = self.loader(self.default_path)
+            self.path = self.default_path
+        return self._active
+
+    def latest(self) -> Optional[Signature]:
+        newest = None
+        for path in glob(self.pattern):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            signature = (path, stat.st_mtime_ns, stat.st_size)
+            if newest is None or signature[1] > newest[1]:
+                newest = signature
+        return newest
+
+    async def reload(self, path: Optional[str] = None) -> bool:
+        async with self._lock:
+            latest = self.latest()
+            if path is None:
+                path = latest[0] if latest else self.default_path
+            # Mark the file as seen so the watcher does not load it again.
+            if latest and latest[0] == path:
+                self._seen = self._pending = latest
+            return await self._reload(path)
+
+    async def _reload(self, path: str) -> bool:
+        rss_before = rss_bytes()
+        started = time.perf_counter()
+        try:
+            model = await asyncio.to_thread(self.loader, path)
+        except Exception as e:
+            logger.error(f"{self.name}: failed to load {path}: {e}")
+            return False
+        loaded = time.perf_counter()
+
+        try:
+            ok, report = await asyncio.to_thread(self.validator, model)
+        except Exception as e:
+            logger.error(f"{self.name}: validation of {path} failed, keeping {self.path}: {e}", exc_info=True)
+            return False
+        validated = time.perf_counter()
+        if not ok:
+            logger.warning(f"{self.name}: {path} rejected by validation: {report}")
+            return False
+
+        rss_overlap = rss_bytes()
+        old, old_path = self._active, self.path
+        swap_started = time.perf_counter()
+        self._active, self.path = model, path
+        swap_seconds = time.perf_counter() - swap_started
+        # Results derived from the old model (e.g. cached verdicts) are stale now.
+        self.on_swap(model)
+
+        old_bytes = self.nbytes(old) if old is not None else 0
+        del old, model
+        gc.collect()
+        logger.info(
+            f"{self.name}: swapped {old_path} -> {path} ({report}); "
+            f"load {loaded - started:.2f}s, validation {validated - loaded:.2f}s, "
+            f"swap {swap_seconds * 1e6:.1f}us; overlap RSS +{(rss_overlap - rss_before) / 2**20:.1f} MiB "
+            f"(old model {old_bytes / 2**20:.1f} MiB), after release {(rss_bytes() - rss_before) / 2**20:+.1f} MiB"
+        )
+        return True
+
+    def request_reload(self) -> None:
+        # The loop only holds weak references to tasks; keep one until done.
+        task = asyncio.get_running_loop().create_task(self.reload())
+        self._requests.add(task)
+        task.add_done_callback(self._request_done)
+
+    def _request_done(self, task: asyncio.Task) -> None:
+        self._requests.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"{self.name}: requested reload failed", exc_info=task.exception())
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            latest = self.latest()
+            if latest is None or latest == self._seen:
+                continue
+            # Wait one more poll with the same size and mtime, so a file that
+            # is still being copied in is not picked up half-written.
+            if latest != self._pending:
+                self._pending = latest
+                continue
+            self._seen = self._pending = latest
+            try:
+                async with self._lock:
+                    await self._reload(latest[0])
+            except Exception as e:
+                # Never let one bad artifact end the watcher for the process.
+                logger.error(f"{self.name}: reload of {latest[0]} failed: {e}", exc_info=True)
+
+    def start(self) -> None:
+        self._seen = self.latest()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._watch())
+
+    async def close(self) -> None:
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
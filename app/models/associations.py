@@ -4,11 +4,13 @@ from app.schemas import TelegramUserPermissions
 from .base import Base
 from sqlalchemy import ForeignKey, TIMESTAMP, Integer, Enum as SQLAlchemyEnum, BigInteger, UniqueConstraint, DateTime
 from sqlalchemy.dialects.mysql import JSON
-from app.constants import UserRole
+from app.constants import UserPrivilege, UserRole
 from typing import  Optional
 from .base import Base
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+DEFAULT_PRIVILEGES_MASK = TelegramUserPermissions().to_mask()
+
 class UserChatAssociation(Base):
     __tablename__ = 'telegram_user_chat_association'
 
@@ -21,7 +23,10 @@ class UserChatAssociation(Base):
     mute_metadata: Mapped[dict] = mapped_column(JSON, default={}, nullable=False)
     ban_metadata: Mapped[dict] = mapped_column(JSON, default={}, nullable=False)
 
-    _privileges: Mapped[dict] = mapped_column("privileges", JSON, default={}, nullable=False)
+    _privileges: Mapped[int] = mapped_column(
+        "privileges_mask", Integer, default=DEFAULT_PRIVILEGES_MASK, server_default=str(DEFAULT_PRIVILEGES_MASK),
+        nullable=False
+    )
 
     user: Mapped["TelegramUser"] = relationship(
         "TelegramUser", 
@@ -40,7 +45,14 @@ class UserChatAssociation(Base):
 
     @property
     def privileges(self) -> TelegramUserPermissions:
-        return TelegramUserPermissions(**self._privileges)
+        return TelegramUserPermissions.from_mask(self._privileges)
+
+    @privileges.setter
+    def privileges(self, value: Optional[TelegramUserPermissions]):
+        self._privileges = value.to_mask() if value else DEFAULT_PRIVILEGES_MASK
+
+    def has_privilege(self, privilege: UserPrivilege) -> bool:
+        return self._privileges & privilege == privilege
 
     def __repr__(self) -> str:
         return f"<UserChatAssociation(user_id={self.user_id}, chat_id={self.chat_id}, role={self.role})>"
@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import Dict, List, Optional
 from uuid import UUID
 from pydantic import BaseModel, create_model
-from sqlalchemy import BigInteger, VARCHAR, Enum as SQLAlchemyEnum, TIMESTAMP
+from sqlalchemy import BigInteger, Integer, VARCHAR, Enum as SQLAlchemyEnum, TIMESTAMP
 from sqlalchemy.dialects.mysql import JSON
 from app.schemas import ChatSettings
 from .base import Base
@@ -17,6 +17,8 @@ class TelegramChat(Base):
     title: Mapped[str] = mapped_column(VARCHAR(64), nullable=False)
     chat_type: Mapped[ChatType] = mapped_column(SQLAlchemyEnum(ChatType))
     _settings: Mapped[dict] = mapped_column("settings", JSON, default={})
+    # Bumped with every settings write; keys caches derived from the settings.
+    settings_version: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
 
     last_init: Mapped[datetime] = mapped_column(TIMESTAMP, nullable=True)
 
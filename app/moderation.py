@@ -0,0 +1,206 @@
+import time
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+from app import constants
+from app.bad_word import is_toxic_canonical
+from app.canonical import canonicalize, find_restricted_word
+from app.fingerprint import FingerprintEntry, duplicate_index
+from app.metrics import Histogram, registry
+from app.schemas import ChatSettings
+from app.tracing import span
+from app.utils import extract_urls
+
+Verdict = Tuple[bool, str]
+
+
+def message_text(message: Any) -> str:
+    # Text or caption plus the hidden targets of text_link entities, joined so
+    # every field is normalized once and scored in a single pipeline run.
+    parts = [message.text or message.caption or ""]
+    for entity in message.entities or message.caption_entities or ():
+        if entity.type == "text_link" and entity.url:
+            parts.append(entity.url)
+    return "\n".join(part for part in parts if part)
+
+
+def message_tokens(text: str) -> FrozenSet[str]:
+    return frozenset(text.split())
+
+
+def edited_text(approved: FrozenSet[str], text: str) -> str:
+    # Only tokens the edit introduced; the rest were already approved.
+    return " ".join(dict.fromkeys(token for token in text.split() if token not in approved))
+
+
+class ModerationContext:
+    __slots__ = (
+        "settings", "text", "chat_id", "deep", "sender_id", "new_member", "exempt", "duplicate", "_canonical"
+    )
+
+    def __init__(
+        self, settings: ChatSettings, text: str, chat_id: Optional[int] = None, deep: bool = True,
+        sender_id: Optional[int] = None, new_member: bool = False, exempt: bool = False
+    ):
+        self.settings = settings
+        self.text = text
+        self.chat_id = chat_id
+        self.deep = deep
+        self.sender_id = sender_id
+        self.new_member = new_member
+        self.exempt = exempt
+        self.duplicate: Optional[FingerprintEntry] = None
+        self._canonical: Optional[str] = None
+
+    @property
+    def canonical(self) -> str:
+        if self._canonical is None:
+            self._canonical = canonicalize(self.text)
+        return self._canonical
+
+
+class ModerationStage:
+    name: str = ""
+    # Rough per-message cost in microseconds; stages run cheapest first.
+    cost: float = 0.0
+
+    def enabled(self, context: ModerationContext) -> bool:
+        return True
+
+    def check(self, context: ModerationContext) -> Optional[str]:
+        raise NotImplementedError
+
+
+class LinkStage(ModerationStage):
+    name = "links"
+    cost = 5.0
+
+    def enabled(self, context: ModerationContext) -> bool:
+        return context.settings.link_filtering.enabled
+
+    def check(self, context: ModerationContext) -> Optional[str]:
+        urls = extract_urls(context.text)
+        if not urls:
+            return None
+        if context.settings.link_filtering.block_all:
+            return "bad-link"
+
+        whitelist = context.settings.link_filtering.whitelist
+        for url in urls:
+            if not any(allowed_url in url for allowed_url in whitelist):
+                return "bad-link"
+        return None
+
+
+class FingerprintStage(ModerationStage):
+    name = "fingerprint"
+    cost = 15.0
+
+    def __init__(self):
+        self.flags = registry.counter(
+            "moderation_flags_total", "Cross-chat duplicates seen without enough evidence to punish.", ("reason",)
+        )
+
+    def enabled(self, context: ModerationContext) -> bool:
+        return context.chat_id is not None
+
+    def check(self, context: ModerationContext) -> Optional[str]:
+        duplicate = context.duplicate = duplicate_index.observe(context.canonical, context.chat_id, context.sender_id)
+        if not duplicate or len(duplicate.chats) < constants.CROSS_CHAT_SPAM_CHATS or context.exempt:
+            return None
+        # The same text in several chats is only spam when several accounts
+        # post it, or a newcomer does. Otherwise (greetings, a member's own
+        # cross-post) it is flagged and the later stages decide, reusing the
+        # verdict cached on the duplicate.
+        if len(duplicate.senders) >= constants.CROSS_CHAT_SPAM_SENDERS or context.new_member:
+            return "cross-chat-spam"
+        self.flags.inc("cross-chat-duplicate")
+        return None
+
+
+class RestrictedWordsStage(ModerationStage):
+    name = "restricted_words"
+    cost = 25.0
+
+    def enabled(self, context: ModerationContext) -> bool:
+        restricted_words = context.settings.restricted_words
+        return restricted_words.enabled and bool(restricted_words.words)
+
+    def check(self, context: ModerationContext) -> Optional[str]:
+        if find_restricted_word(context.canonical, context.settings.restricted_words.words):
+            return "bad-word"
+        return None
+
+
+class ToxicityStage(ModerationStage):
+    name = "toxicity"
+    cost = 500.0
+
+    def enabled(self, context: ModerationContext) -> bool:
+        return context.deep and context.settings.restricted_words.enabled
+
+    def check(self, context: ModerationContext) -> Optional[str]:
+        restricted_words = context.settings.restricted_words
+        threshold_adjust = constants.TOXIC_SENSITIVITY.get(restricted_words.sensitivity, 0.0)
+        overlay_words = tuple(restricted_words.toxic_words or ())
+        # Verdicts cached on a duplicate are only shared between chats on the
+        # base model, and only for the exact same text: a near match can be a
+        # known-clean message with an insult added.
+        duplicate = context.duplicate if not (threshold_adjust or overlay_words) else None
+        key = hash(context.canonical) if duplicate else None
+        if duplicate and duplicate.toxicity and duplicate.toxicity_key == key:
+            is_toxic, max_similarity, toxic_match = duplicate.toxicity
+        else:
+            is_toxic, max_similarity, toxic_match = is_toxic_canonical(
+                context.canonical, threshold_adjust, overlay_words
+            )
+            if duplicate and duplicate.toxicity is None:
+                duplicate.toxicity = (is_toxic, max_similarity, toxic_match)
+                duplicate.toxicity_key = key
+        if is_toxic:
+            return f"bad-word: {toxic_match} ({max_similarity})"
+        return None
+
+
+class ModerationPipeline:
+    def __init__(self, stages: Iterable[ModerationStage]):
+        self.stages: List[ModerationStage] = []
+        self.latency: Dict[str, Histogram] = {}
+        self.verdicts = registry.counter(
+            "moderation_verdicts_total", "Moderation verdicts by the stage that decided them.", ("reason",)
+        )
+        for stage in stages:
+            self.add(stage)
+
+    def add(self, stage: ModerationStage) -> None:
+        self.stages.append(stage)
+        self.stages.sort(key=lambda item: item.cost)
+        self.latency[stage.name] = registry.histogram(
+            f"moderation_{stage.name}_seconds", f"Time spent in the {stage.name} moderation stage."
+        )
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {stage.name: self.latency[stage.name].summary() for stage in self.stages}
+
+    def run(self, context: ModerationContext) -> Verdict:
+        if not context.settings.moderation.enabled or not context.text:
+            return True, ""
+
+        for stage in self.stages:
+            if not stage.enabled(context):
+                continue
+            started = time.perf_counter()
+            with span(f"moderation.{stage.name}"):
+                reason = stage.check(context)
+            self.latency[stage.name].observe(time.perf_counter() - started)
+            if reason:
+                self.verdicts.inc(stage.name)
+                return False, reason
+        self.verdicts.inc("ok")
+        return True, ""
+
+
+moderation_pipeline = ModerationPipeline([
+    FingerprintStage(),
+    LinkStage(),
+    RestrictedWordsStage(),
+    ToxicityStage(),
+])
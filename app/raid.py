@@ -0,0 +1,168 @@
+import asyncio
+import math
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set
+from aiogram import Bot, types
+from app.constants import (
+    RAID_FLUSH_INTERVAL, RAID_JOIN_THRESHOLD, RAID_MAX_JOINERS, RAID_MESSAGE_THRESHOLD,
+    RAID_MODE_DURATION, RAID_RATE_HALF_LIFE, RAID_TRACKED_CHATS
+)
+from app.memory_cache import BoundedCache
+from app.utils import get_logger
+
+logger = get_logger()
+
+
+class DecayedCounter:
+    __slots__ = ("decay", "value", "updated_at")
+
+    def __init__(self, half_life: float):
+        self.decay = math.log(2) / half_life
+        self.value = 0.0
+        self.updated_at = 0.0
+
+    def get(self, now: float) -> float:
+        return self.value * math.exp(-self.decay * (now - self.updated_at))
+
+    def add(self, now: float, amount: float = 1.0) -> float:
+        self.value = self.get(now) + amount
+        self.updated_at = now
+        return self.value
+
+
+class ChatActivity:
+    __slots__ = ("joins", "messages", "raid_until", "joiners")
+
+    def __init__(self, half_life: float):
+        self.joins = DecayedCounter(half_life)
+        self.messages = DecayedCounter(half_life)
+        self.raid_until = 0.0
+        self.joiners: Set[int] = set()
+
+
+class RaidDetector:
+    def __init__(
+        self,
+        join_threshold: float = RAID_JOIN_THRESHOLD,
+        message_threshold: float = RAID_MESSAGE_THRESHOLD,
+        half_life: float = RAID_RATE_HALF_LIFE.total_seconds(),
+        raid_duration: float = RAID_MODE_DURATION.total_seconds(),
+        max_chats: int = RAID_TRACKED_CHATS,
+    ):
+        self.join_threshold = join_threshold
+        self.message_threshold = message_threshold
+        self.half_life = half_life
+        self.raid_duration = raid_duration
+        self.chats: BoundedCache[ChatActivity] = BoundedCache(
+            max_entries=max_chats, ttl=RAID_MODE_DURATION, sliding=True
+        )
+
+    def _activity(self, chat_id: int) -> ChatActivity:
+        activity = self.chats.get(chat_id)
+        if activity is None:
+            activity = ChatActivity(self.half_life)
+            self.chats.set(chat_id, activity)
+        return activity
+
+    def _update(self, chat_id: int, activity: ChatActivity, over_threshold: bool, now: float) -> bool:
+        if over_threshold:
+            if activity.raid_until <= now:
+                logger.warning(
+                    f"Raid mode enabled in chat {chat_id}: "
+                    f"joins={activity.joins.get(now):.1f}, messages={activity.messages.get(now):.1f}"
+                )
+            activity.raid_until = now + self.raid_duration
+            return True
+
+        if activity.raid_until and activity.raid_until <= now:
+            logger.info(f"Raid mode disabled in chat {chat_id}")
+            activity.raid_until = 0.0
+            activity.joiners.clear()
+        return activity.raid_until > now
+
+    def record_join(self, chat_id: int, user_id: int, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        activity = self._activity(chat_id)
+        joins = activity.joins.add(now)
+        in_raid = self._update(chat_id, activity, joins >= self.join_threshold, now)
+        if in_raid and len(activity.joiners) < RAID_MAX_JOINERS:
+            activity.joiners.add(user_id)
+        return in_raid
+
+    def record_message(self, chat_id: int, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        activity = self._activity(chat_id)
+        messages = activity.messages.add(now)
+        return self._update(chat_id, activity, messages >= self.message_threshold, now)
+
+    def is_raid(self, chat_id: int, now: Optional[float] = None) -> bool:
+        activity = self.chats.get(chat_id)
+        now = time.monotonic() if now is None else now
+        return activity is not None and activity.raid_until > now
+
+    def is_raid_joiner(self, chat_id: int, user_id: int) -> bool:
+        activity = self.chats.get(chat_id)
+        return activity is not None and user_id in activity.joiners
+
+
+class RaidActions:
+    def __init__(self, flush_interval: float = RAID_FLUSH_INTERVAL):
+        self.flush_interval = flush_interval
+        self._bot: Optional[Bot] = None
+        self._deletes: Dict[int, List[int]] = {}
+        self._restricts: Dict[int, Set[int]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def delete(self, bot: Bot, chat_id: int, message_id: int) -> None:
+        self._deletes.setdefault(chat_id, []).append(message_id)
+        self._schedule(bot)
+
+    def restrict(self, bot: Bot, chat_id: int, user_id: int) -> None:
+        self._restricts.setdefault(chat_id, set()).add(user_id)
+        self._schedule(bot)
+
+    def _schedule(self, bot: Bot) -> None:
+        self._bot = bot
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    async def flush(self) -> None:
+        if self._bot is None:
+            return
+        bot = self._bot
+        deletes, self._deletes = self._deletes, {}
+        restricts, self._restricts = self._restricts, {}
+
+        calls = []
+        # Joiners are muted for one raid-mode period rather than for good;
+        # Telegram lifts the restriction itself at until_date.
+        until = datetime.now(timezone.utc) + RAID_MODE_DURATION
+        for chat_id, message_ids in deletes.items():
+            for start in range(0, len(message_ids), 100):
+                calls.append(bot.delete_messages(chat_id, message_ids[start:start + 100]))
+        for chat_id, user_ids in restricts.items():
+            for user_id in user_ids:
+                calls.append(bot.restrict_chat_member(
+                    chat_id, user_id, types.ChatPermissions(can_send_messages=False), until_date=until
+                ))
+        if not calls:
+            return
+
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        failed = [result for result in results if isinstance(result, Exception)]
+        if failed:
+            logger.error(f"Raid batch: {len(failed)} of {len(calls)} calls failed: {failed[0]}")
+
+    async def close(self) -> None:
+        if self._task and not self._task.done():
+            self._task.cancel()
+        await self.flush()
+
+
+raid_detector = RaidDetector()
+raid_actions = RaidActions()
@@ -0,0 +1,183 @@
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterator, List, Optional, Tuple
+from app.ann import IVFIndex
+from app.bad_word import ToxicityModel, is_toxic_canonical, load_toxicity_model
+from app.canonical import canonicalize
+from app.embeddings import STORES
+from app.lazy import lazy_import
+from app.subword import SubwordTable
+
+np = lazy_import("numpy")
+
+_META = "model.json"
+_models: Optional[Tuple[ToxicityModel, ToxicityModel]] = None
+
+
+def export_mapped_model(model: ToxicityModel, directory: str) -> None:
+    # Plain .npy files, so every worker can np.load(mmap_mode="r") them and
+    # share one copy of the vectors through the page cache.
+    os.makedirs(directory, exist_ok=True)
+    quantization = "int8" if model.store.quantized else "float32"
+    store_arrays = model.store.arrays()
+    for name, array in store_arrays.items():
+        np.save(os.path.join(directory, f"store_{name}.npy"), array)
+    table = model.toxic_table if isinstance(model.toxic_table, tuple) else (model.toxic_table,)
+    for i, part in enumerate(table):
+        np.save(os.path.join(directory, f"toxic_{i}.npy"), part)
+    if model.subwords is not None:
+        np.save(os.path.join(directory, "subword_vectors.npy"), model.subwords.vectors)
+        np.save(os.path.join(directory, "subword_filled.npy"), model.subwords.filled)
+    if model.index is not None:
+        model.index.save(os.path.join(directory, "index.npz"), model.toxic_words)
+
+    words = sorted(model.store.key_to_index, key=model.store.key_to_index.get)
+    with open(os.path.join(directory, _META), "w", encoding="utf-8") as f:
+        json.dump({
+            "quantization": quantization,
+            "store_arrays": list(store_arrays),
+            "threshold": model.threshold,
+            "toxic_words": model.toxic_words,
+            "toxic_parts": len(table),
+            "ngram_range": [model.subwords.min_n, model.subwords.max_n] if model.subwords else None,
+            "nprobe": model.index.nprobe if model.index else None,
+            "words": words,
+        }, f, ensure_ascii=False)
+
+
+def load_mapped_model(directory: str) -> ToxicityModel:
+    with open(os.path.join(directory, _META), encoding="utf-8") as f:
+        meta = json.load(f)
+
+    def mapped(name: str) -> "np.ndarray":
+        return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+
+    store = STORES[meta["quantization"]].from_arrays(
+        {word: i for i, word in enumerate(meta["words"])},
+        {name: mapped(f"store_{name}") for name in meta["store_arrays"]},
+    )
+    table = tuple(mapped(f"toxic_{i}") for i in range(meta["toxic_parts"]))
+    model = ToxicityModel.from_table(
+        store, meta["toxic_words"], table if len(table) > 1 else table[0], meta["threshold"]
+    )
+    if meta["ngram_range"]:
+        min_n, max_n = meta["ngram_range"]
+        model.subwords = SubwordTable(mapped("subword_vectors"), mapped("subword_filled"), min_n, max_n)
+    if meta["nprobe"]:
+        model.index = IVFIndex.load(os.path.join(directory, "index.npz"), model.toxic_words, meta["nprobe"])
+    return model
+
+
+def _init_worker(old_dir: str, new_dir: str, new_threshold: Optional[float]) -> None:
+    global _models
+    old, new = load_mapped_model(old_dir), load_mapped_model(new_dir)
+    if new_threshold is not None:
+        new.threshold = new_threshold
+    _models = (old, new)
+
+
+def _score_batch(batch: List[Tuple[int, bytes]]) -> Tuple[int, List[dict]]:
+    old, new = _models
+    diffs = []
+    for line_no, line in batch:
+        row = json.loads(line)
+        text = row.get("text") or row.get("caption")
+        if not text:
+            continue
+        # Same normalization and scoring the toxicity stage of is_message_safe runs.
+        canonical = canonicalize(text)
+        old_verdict = is_toxic_canonical(canonical, model=old)
+        new_verdict = is_toxic_canonical(canonical, model=new)
+        if old_verdict[0] != new_verdict[0]:
+            diffs.append({
+                "line": line_no,
+                "id": row.get("id", row.get("message_id")),
+                "chat_id": row.get("chat_id"),
+                "text": text,
+                "old": old_verdict,
+                "new": new_verdict,
+            })
+    return len(batch), diffs
+
+
+def _batches(path: str, size: int) -> Iterator[List[Tuple[int, bytes]]]:
+    with open(path, "rb") as f:
+        lines = ((line_no, line) for line_no, line in enumerate(f, 1) if line.strip())
+        while True:
+            batch = list(islice(lines, size))
+            if not batch:
+                return
+            yield batch
+
+
+def rescore(
+    input_path: str, old_dir: str, new_dir: str, output_path: str,
+    workers: int, batch_size: int, new_threshold: Optional[float] = None,
+) -> dict:
+    started = time.perf_counter()
+    processed = flipped_toxic = flipped_clean = 0
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(old_dir, new_dir, new_threshold)) as pool, \
+            open(output_path, "w", encoding="utf-8") as output:
+        # A bounded window of in-flight batches keeps memory flat on any input size.
+        pending = deque()
+        batches = _batches(input_path, batch_size)
+        for batch in islice(batches, workers * 2):
+            pending.append(pool.submit(_score_batch, batch))
+        while pending:
+            count, diffs = pending.popleft().result()
+            next_batch = next(batches, None)
+            if next_batch is not None:
+                pending.append(pool.submit(_score_batch, next_batch))
+
+            processed += count
+            for diff in diffs:
+                flipped_toxic += diff["new"][0]
+                flipped_clean += not diff["new"][0]
+                output.write(json.dumps(diff, ensure_ascii=False) + "\n")
+            if processed % (batch_size * workers * 50) < count:
+                elapsed = time.perf_counter() - started
+                print(f"{processed:,} messages, {processed / elapsed:,.0f} msg/s", file=sys.stderr)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "messages": processed,
+        "seconds": round(elapsed, 2),
+        "messages_per_second": round(processed / max(elapsed, 1e-9)),
+        "now_toxic": flipped_toxic,
+        "now_clean": flipped_clean,
+    }
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(prog="main.py rescore")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="convert a pickled model into memory-mappable arrays")
+    export.add_argument("--model", required=True)
+    export.add_argument("--quantization", default="float32", choices=sorted(STORES))
+    export.add_argument("--out", required=True)
+
+    run = commands.add_parser("run", help="score a JSONL export with two models and write verdict diffs")
+    run.add_argument("--input", required=True)
+    run.add_argument("--old", required=True, help="exported model directory")
+    run.add_argument("--new", required=True, help="exported model directory")
+    run.add_argument("--output", required=True)
+    run.add_argument("--new-threshold", type=float)
+    run.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    run.add_argument("--batch", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        export_mapped_model(load_toxicity_model(args.model, args.quantization), args.out)
+        print(f"exported {args.model} ({args.quantization}): {args.out}")
+        return 0
+
+    report = rescore(args.input, args.old, args.new, args.output, args.workers, args.batch, args.new_threshold)
+    print(json.dumps(report))
+    return 0
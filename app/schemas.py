@@ -1,7 +1,8 @@
+import dataclasses
 from datetime import datetime
 from uuid import UUID
 from pydantic import BaseModel, ConfigDict, validator
-from typing import Any, List, Optional, Literal
+from typing import Any, Dict, List, Optional, Literal
 from aiogram import types
 from app import constants
 from app.classes import DurationString
@@ -24,6 +25,8 @@ class ChatSettingsPunishment(BaseModel):
 class ChatSettingsRestrictedWords(BaseModel):
     enabled: bool
     words: Optional[List[str]] = []
+    sensitivity: Optional[Literal["low", "default", "high"]] = "default"
+    toxic_words: Optional[List[str]] = []
     punishment: ChatSettingsPunishment
 
 
@@ -57,12 +60,13 @@ class ChatSettings(BaseModel):
     link_filtering: ChatSettingsLinkFiltering
 
 
-class BotUserStateEdit(BaseModel):
+@dataclasses.dataclass(slots=True)
+class BotUserStateEdit:
     selected_chat_id: Optional[UUID] = None
     selected_chat_tid: Optional[int]= None
-    settings: Optional[ChatSettings]= None
 
-class BotUserState(BaseModel):
+@dataclasses.dataclass(slots=True)
+class BotUserState:
     user_id: int
     edit: Optional[BotUserStateEdit] = None
     state: Optional[constants.UserState] = None
@@ -70,6 +74,51 @@ class BotUserState(BaseModel):
     last_inline_message_id: Optional[int] = None
 
     read_rules_start: Optional[datetime] = None
+    data: Dict[str, Any] = dataclasses.field(default_factory=dict)
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class ChatSnapshot:
+    id: Optional[UUID]
+    telegram_id: int
+    title: str
+    chat_type: constants.ChatType
+    _settings: Dict[str, Any]
+    last_init: Optional[datetime] = None
+    settings_version: int = 0
+    # Validated once per snapshot; hot paths read .settings several times per
+    # update. Shared by every reader, so treat it as read-only.
+    _model: Optional[ChatSettings] = dataclasses.field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "_model", ChatSettings(**self._settings) if self._settings else None)
+
+    @classmethod
+    def from_model(cls, chat: Any) -> "ChatSnapshot":
+        return cls(
+            id=chat.id,
+            telegram_id=chat.telegram_id,
+            title=chat.title,
+            chat_type=chat.chat_type,
+            _settings=dict(chat._settings or {}),
+            last_init=chat.last_init,
+            settings_version=chat.settings_version or 0,
+        )
+
+    def with_settings(self, settings: Dict[str, Any], settings_version: int) -> "ChatSnapshot":
+        return dataclasses.replace(self, _settings=settings, settings_version=settings_version)
+
+    @property
+    def settings(self) -> Optional[ChatSettings]:
+        return self._model
+
+    @property
+    def settings_notify_system_thread_id(self) -> Optional[int]:
+        if self.settings.notifications.system_thread_id:
+            if self.chat_type is constants.ChatType.PRIVATE: return None
+
+            return self.settings.notifications.system_thread_id
+
+        return None
 
 class TelegramUserSchema(BaseModel):
     id: UUID
@@ -129,6 +178,17 @@ class TelegramUserPermissions(BaseModel):
     can_restrict_members: Optional[bool] = False
     can_delete_messages: Optional[bool] = False
 
+    def to_mask(self) -> int:
+        mask = 0
+        for field, bit in _PRIVILEGE_FIELDS:
+            if getattr(self, field):
+                mask |= bit
+        return mask
+
+    @staticmethod
+    def from_mask(mask: int) -> "TelegramUserPermissions":
+        return TelegramUserPermissions(**{field: bool(mask & bit) for field, bit in _PRIVILEGE_FIELDS})
+
     # 
     @staticmethod
     def from_user(user: list[types.ChatMemberOwner | types.ChatMemberAdministrator | types.ChatMemberMember | types.ChatMemberRestricted | types.ChatMemberLeft | types.ChatMemberBanned]):
@@ -178,4 +238,7 @@ class TelegramUserPermissions(BaseModel):
                 can_delete_messages=can_delete_messages
             )
         except Exception as e:
-            return TelegramUserPermissions()
\ No newline at end of file
+            return TelegramUserPermissions()
+
+
+_PRIVILEGE_FIELDS = [(privilege.name.lower(), int(privilege)) for privilege in constants.UserPrivilege]
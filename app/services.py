@@ -1,20 +1,26 @@
+import asyncio
+import json
 from datetime import datetime
-from typing import Any, List, Literal, Optional, Tuple, Union
+from functools import lru_cache
+from typing import Any, Dict, List, Literal, Optional, Tuple, Union
 from uuid import UUID
-from sqlalchemy import func, update, delete
+from pydantic import BaseModel, ConfigDict, TypeAdapter
+from sqlalchemy import JSON, Text, case, cast, func, literal, update, delete
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import noload, selectinload
 from app import constants
-from app.bad_word import is_toxic_message
-from app.cache import get_chat_state, get_user_state, set_chat_state, clear_chat_state
+from app.moderation import ModerationContext, moderation_pipeline
+from app.cache import get_chat_state, get_user_state, set_chat_state, clear_chat_state, get_chat_roles, set_chat_roles
 from app.classes import DurationString
 from app.database import get_session
 from app.models import TelegramUser, TelegramChat, UserChatAssociation
-from app.schemas import BotUserState, ChatSettings, TelegramChatSchema, TelegramUserPermissions
-from app.utils import extract_urls, to_timestamp, utcnow
+from app.schemas import BotUserState, ChatSettings, ChatSnapshot, TelegramChatSchema, TelegramUserPermissions
+from app.utils import to_timestamp, utcnow
 
-from aiogram.types import User
+from aiogram import Bot
+from aiogram.types import ChatMember, User
 
 async def get_user_by_username(
     session: AsyncSession, 
@@ -118,6 +124,8 @@ async def get_chat_by(
                 TelegramUser.username
             )
         )
+    else:
+        query = query.options(noload(TelegramChat.users), noload(TelegramChat.user_chat_associations))
         
     result = await session.execute(query)
     chat = result.unique().scalar_one_or_none()
@@ -168,8 +176,8 @@ async def get_or_create_association(
             chat_id=chat_id,
             role=user_role,
             warn_count = warn_count,
-            _privileges = privileges.model_dump(mode="json") if privileges else {}
         )
+        association_record.privileges = privileges
         session.add(association_record)
         await session.commit()
 
@@ -204,16 +212,51 @@ async def get_user_chats(
     chats = result.scalars().unique().all()
     return chats
 
-async def get_chat_from_cache(chat_id: UUID | int) -> Optional[TelegramChatSchema]:
+async def get_chat_from_cache(chat_id: UUID | int) -> Optional[ChatSnapshot]:
     chat_state = await get_chat_state(chat_id)
     if not chat_state:
         async with get_session() as session:
-            chat = await get_chat_by(session, chat_id)
+            chat = await get_chat_by(session, chat_id, load_relations=False)
             chat_state = await get_chat_state(chat_id)
         
     return chat_state
 
 
+_pending_chat_roles: Dict[int, asyncio.Task] = {}
+
+async def cache_chat_administrators(chat_id: int, admins: List[ChatMember]) -> Dict[int, constants.UserRole]:
+    roles = {admin.user.id: constants.UserRole.from_status(admin.status) for admin in admins}
+    await set_chat_roles(chat_id, roles)
+    return roles
+
+async def _load_chat_roles(bot: Bot, chat_id: int) -> Dict[int, constants.UserRole]:
+    admins = await bot.get_chat_administrators(chat_id)
+    return await cache_chat_administrators(chat_id, admins)
+
+async def get_chat_member_role(
+    bot: Bot, chat_id: int, user_id: int, resolve_members: bool = False
+) -> constants.UserRole:
+    # The cached map only holds admins and the owner. Everyone else is a
+    # MEMBER unless resolve_members asks Telegram, which also tells banned
+    # users apart.
+    roles = await get_chat_roles(chat_id)
+    if roles is None:
+        task = _pending_chat_roles.get(chat_id)
+        if task is None:
+            task = asyncio.create_task(_load_chat_roles(bot, chat_id))
+            _pending_chat_roles[chat_id] = task
+            task.add_done_callback(lambda _: _pending_chat_roles.pop(chat_id, None))
+        roles = await asyncio.shield(task)
+
+    role = roles.get(user_id)
+    if role is not None:
+        return role
+    if resolve_members:
+        member = await bot.get_chat_member(chat_id, user_id)
+        return constants.UserRole.from_status(member.status)
+    return constants.UserRole.MEMBER
+
+
 async def update_chat_settings_by_id(
     session: AsyncSession, 
     identifier: Union[int, UUID], 
@@ -226,11 +269,94 @@ async def update_chat_settings_by_id(
     else:
         query = update(TelegramChat).where(TelegramChat.telegram_id == identifier)
 
-    await session.execute(query.values(_settings=settings_dict))
+    await session.execute(query.values(
+        _settings=settings_dict, settings_version=TelegramChat.settings_version + 1
+    ))
     await session.commit()
     await clear_chat_state(identifier)
 
 
+@lru_cache(maxsize=128)
+def _settings_field_adapter(path: str) -> TypeAdapter:
+    model = ChatSettings
+    annotation = None
+    for key in path.split("."):
+        if model is None or key not in model.model_fields:
+            raise ValueError(f"Unknown chat settings path: {path}")
+        annotation = model.model_fields[key].annotation
+        model = annotation if isinstance(annotation, type) and issubclass(annotation, BaseModel) else None
+
+    if model is not None:
+        raise ValueError(f"Chat settings path must point to a value: {path}")
+    return TypeAdapter(annotation, config=ConfigDict(arbitrary_types_allowed=True))
+
+def _json_set_expression(dialect_name: str, keys: List[str], value: Any, toggle: bool):
+    column = TelegramChat.__table__.c.settings
+
+    if dialect_name == "postgresql":
+        document = cast(column, JSONB)
+        path = literal(keys, ARRAY(Text))
+        if toggle:
+            new_value = case((document.op("#>>")(path) == "true", "false"), else_="true")
+        else:
+            new_value = literal(json.dumps(value))
+        return cast(func.jsonb_set(document, path, cast(new_value, JSONB)), JSON)
+
+    path = "$." + ".".join(keys)
+    if dialect_name == "sqlite":
+        is_true = func.json_extract(column, path) == 1
+        parse_json = func.json
+    else:
+        is_true = func.JSON_EXTRACT(column, path) == func.JSON_EXTRACT("true", "$")
+        parse_json = lambda document: func.JSON_EXTRACT(document, "$")
+
+    if toggle:
+        new_value = case((is_true, "false"), else_="true")
+    else:
+        new_value = literal(json.dumps(value))
+    return func.JSON_SET(column, path, parse_json(new_value))
+
+async def patch_chat_settings(
+    session: AsyncSession,
+    chat_id: int,
+    path: str,
+    value: Any = None,
+    toggle: bool = False
+) -> Optional[ChatSettings]:
+    adapter = _settings_field_adapter(path)
+    keys = path.split(".")
+    if toggle:
+        adapter.validate_python(True)
+    else:
+        value = adapter.dump_python(adapter.validate_python(value), mode="json")
+
+    expression = _json_set_expression(session.bind.dialect.name, keys, value, toggle)
+    await session.execute(
+        update(TelegramChat)
+        .where(TelegramChat.telegram_id == chat_id)
+        .values({
+            TelegramChat._settings: expression,
+            TelegramChat.settings_version: TelegramChat.settings_version + 1,
+        })
+    )
+    # Read back what the database wrote, in the same transaction, so a stale
+    # cached snapshot is replaced rather than patched (a toggle computed from
+    # it could be the opposite of the stored value).
+    stored = (await session.execute(
+        select(TelegramChat._settings, TelegramChat.settings_version)
+        .where(TelegramChat.telegram_id == chat_id)
+    )).one_or_none()
+    await session.commit()
+
+    chat_state = await get_chat_state(chat_id)
+    if stored is None or chat_state is None or not stored[0]:
+        return None
+
+    settings, settings_version = stored
+    chat_state = await set_chat_state(chat_id, chat_state.with_settings(dict(settings), settings_version))
+    return chat_state.settings
+
+
 async def proccess_left_member(user_id: int, chat_id:int, session:AsyncSession) -> bool:
     try:
         await session.execute(
@@ -354,36 +480,13 @@ async def warn_user(session: AsyncSession,
 
 
 
-def is_message_safe(chat_settings:ChatSettings, text: str) -> Tuple[bool, Optional[Literal["bad-word", "bad-link"]]]:
-    if not chat_settings.moderation.enabled:
-        return True, ""
-    
-    if not text:
-        return True, ""
-
-
-    if chat_settings.restricted_words.enabled:
-        if chat_settings.restricted_words.words and text:
-            if  any(bad_word in text for bad_word in chat_settings.restricted_words.words):
-                return False, "bad-word"
-        
-        is_toxic, max_similarity, toxic_match = is_toxic_message(text)
-        if is_toxic:
-            return False, f"bad-word: {toxic_match} ({max_similarity})"
-    
-    if chat_settings.link_filtering.enabled:
-        urls = extract_urls(text)
-        # print((urls, chat_settings.link_filtering))
-        
-        if chat_settings.link_filtering.block_all and urls:
-            return False, "bad-link"
-        
-        whitelist = chat_settings.link_filtering.whitelist
-        for url in urls:
-            if not any(allowed_url in url for allowed_url in whitelist):
-                return False, "bad-link"
-            
-    return True, ""
+def is_message_safe(
+    chat_settings:ChatSettings, text: str, deep: bool = True, chat_id: Optional[int] = None,
+    sender_id: Optional[int] = None, new_member: bool = False, exempt: bool = False
+) -> Tuple[bool, Optional[Literal["bad-word", "bad-link", "cross-chat-spam"]]]:
+    return moderation_pipeline.run(
+        ModerationContext(chat_settings, text, chat_id, deep, sender_id, new_member, exempt)
+    )
 
 
 async def punish_user(
@@ -0,0 +1,138 @@
+import asyncio
+import hashlib
+import json
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+from aiogram import Bot, types
+from sqlalchemy import text
+from app.config import COMMANDS_HASH_PATH
+from app.database import get_engine
+from app.utils import get_logger
+
+logger = get_logger()
+
+CommandScope = Tuple[List[types.BotCommand], Callable[[Bot], Awaitable[Any]]]
+
+PRIVATE_COMMANDS = [
+    types.BotCommand(command="start", description="Почати"),
+    types.BotCommand(command="help", description="Допомога"),
+    types.BotCommand(command="cat_gif", description="Гіфка котика"),
+    types.BotCommand(command="my_chats", description="Налаштування чатів"),
+]
+
+ADMIN_COMMANDS = [
+    types.BotCommand(command="mute", description="Видати мут ({час} {причина})"),
+    types.BotCommand(command="unmute", description="Зняти мут"),
+    types.BotCommand(command="warn", description="Видати попередження ({причина})"),
+    types.BotCommand(command="unwarn", description="Зняти попередження"),
+    types.BotCommand(command="ban", description="Видати бан ({час} {причина})"),
+    types.BotCommand(command="unban", description="Зняти бан"),
+    types.BotCommand(command="start", description="Почати"),
+    types.BotCommand(command="help", description="Допомога"),
+]
+
+CHATS_COMMANDS = [
+    types.BotCommand(command="start", description="Почати"),
+    types.BotCommand(command="help", description="Допомога"),
+    types.BotCommand(command="cat_gif", description="Гіфка котика"),
+]
+
+async def set_private_commands(bot: Bot):
+    await bot.set_my_commands(PRIVATE_COMMANDS, scope=types.BotCommandScopeAllPrivateChats())
+
+async def set_admin_commands(bot: Bot):
+    await bot.set_my_commands(ADMIN_COMMANDS, scope=types.BotCommandScopeAllChatAdministrators())
+
+async def set_chats_commands(bot: Bot):
+    await bot.set_my_commands(CHATS_COMMANDS, scope=types.BotCommandScopeAllGroupChats())
+
+
+COMMAND_SCOPES = {
+    "private": (PRIVATE_COMMANDS, set_private_commands),
+    "admin": (ADMIN_COMMANDS, set_admin_commands),
+    "chats": (CHATS_COMMANDS, set_chats_commands),
+}
+
+
+@asynccontextmanager
+async def startup_phase(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        logger.info(f"Startup phase '{name}' took {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+def hash_commands(bot: Bot, commands: List[types.BotCommand]) -> str:
+    payload = json.dumps(
+        [bot.id, [command.model_dump(mode="json") for command in commands]],
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _load_commands_hashes() -> Dict[str, str]:
+    try:
+        return json.loads(Path(COMMANDS_HASH_PATH).read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _save_commands_hashes(hashes: Dict[str, str]) -> None:
+    Path(COMMANDS_HASH_PATH).write_text(json.dumps(hashes, indent=2), encoding="utf-8")
+
+
+async def sync_bot_commands(bot: Bot, scopes: Dict[str, CommandScope]) -> None:
+    stored = _load_commands_hashes()
+    current = {name: hash_commands(bot, commands) for name, (commands, _) in scopes.items()}
+    changed = [name for name in scopes if stored.get(name) != current[name]]
+
+    if not changed:
+        logger.info("Bot commands are up to date, skipping set_my_commands")
+        return
+
+    results = await asyncio.gather(
+        *(scopes[name][1](bot) for name in changed),
+        return_exceptions=True
+    )
+    for name, result in zip(changed, results):
+        if isinstance(result, Exception):
+            logger.error(f"Failed to set '{name}' commands: {result}")
+            current[name] = stored.get(name)
+        else:
+            logger.info(f"Updated '{name}' commands")
+
+    _save_commands_hashes({name: value for name, value in current.items() if value})
+
+
+async def warm_model() -> None:
+    from app.bad_word import _get_cached_model
+    await asyncio.to_thread(_get_cached_model)
+
+
+async def warm_database() -> None:
+    async with get_engine().connect() as connection:
+        await connection.execute(text("SELECT 1"))
+
+
+async def warm_cat_gifs() -> None:
+    from app.cat_gifs import cat_gif_buffer
+    await cat_gif_buffer.refill()
+
+
+async def _timed(name: str, coro: Awaitable[Any]) -> Any:
+    async with startup_phase(name):
+        return await coro
+
+
+async def warm_up(bot: Bot, scopes: Dict[str, CommandScope]) -> None:
+    async with startup_phase("total"):
+        await asyncio.gather(
+            _timed("model", warm_model()),
+            _timed("database", warm_database()),
+            _timed("commands", sync_bot_commands(bot, scopes)),
+            _timed("cat_gifs", warm_cat_gifs()),
+        )
@@ -0,0 +1,47 @@
+from typing import Any, Dict, Optional, Tuple
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from app import constants
+from app.memory_cache import BoundedCache
+from app.schemas import BotUserState
+
+
+class UserStateStorage(BaseStorage):
+    def __init__(self, store: BoundedCache[BotUserState]):
+        self.store = store
+
+    @staticmethod
+    def _key(key: StorageKey) -> Tuple[int, int]:
+        return key.chat_id, key.user_id
+
+    def _record(self, key: StorageKey) -> BotUserState:
+        record = self.store.get(self._key(key))
+        if record is None:
+            record = BotUserState(user_id=key.user_id)
+            self.store.set(self._key(key), record)
+        return record
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        if isinstance(state, State):
+            state = state.state
+        try:
+            state = constants.UserState(state) if state is not None else None
+        except ValueError:
+            pass
+        self._record(key).state = state
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        record = self.store.get(self._key(key))
+        if record is None or record.state is None:
+            return None
+        return getattr(record.state, "value", record.state)
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        self._record(key).data = dict(data)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        record = self.store.get(self._key(key))
+        return dict(record.data) if record else {}
+
+    async def close(self) -> None:
+        self.store.clear()
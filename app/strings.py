@@ -54,6 +54,8 @@ ACTION_NOT_ALLOWED_TIMER = "Цю дію неможливо виконати ту
 
 INVALID_LINK = "<b>❌ Недійсне посилання:</b> Перевірте, чи правильно вказано посилання та спробуйте ще раз."
 LINK_ALREADY_IN_WHITELIST = "<b>ℹ️ Посилання вже є у списку виключень:</b>"
+TOXIC_WORDS_LIMIT = "<b>❌ Забагато слів:</b> у списку може бути не більше {max_words}."
+TOXIC_WORDS_NOT_FOUND = "<b>❌ Слів немає у списку:</b> Перевірте та спробуйте ще раз."
 LINK_NOT_IN_WHITELIST = "<b>❌ Посилання відсутнє у списку виключень:</b> Можливо, ви ввели неправильну адресу. Перевірте та спробуйте ще раз."
 
 
@@ -78,6 +80,11 @@ WARN = "Попередження"
 MUTE = "Заткнути"
 PUNISHENT = "Покарання"
 PUNISHENT_DURATION = "Час покарання"
+SENSITIVITY = "Чутливість"
+SENSITIVITY_LOW = "Низька"
+SENSITIVITY_DEFAULT = "Стандартна"
+SENSITIVITY_HIGH = "Висока"
+TOXIC_WORDS = "Додаткові слова"
 
 WELCOME_RULES_ACCEPT = "Приймаю правила"
 
@@ -130,6 +137,34 @@ CHAT_EDIT_RESTRICTED_WORDS = """
 - Тривалість покарання: <b>{punishment_duration}</b>
 - Попереджень перед покаранням: <b>{punishment_warns_count}</b>
 <em>Налаштування покарань за порушення</em>
+
+<b>🧠 Фільтр образ:</b>
+- Чутливість: <b>{sensitivity}</b>
+- Додаткові слова: <b>{toxic_words}</b>
+<em>Чим вища чутливість, тим більше схожих слів буде заблоковано</em>
+"""
+
+CHAT_EDIT_TOXIC_WORDS = """
+<b>🧠 Додаткові слова</b>
+
+Слова, які фільтр образ блокуватиме у цьому чаті разом зі схожими на них.
+
+<b>Поточний список:</b> {toxic_words}
+"""
+
+CHAT_EDIT_TOXIC_WORDS_ADD = """
+<b>🧠 Додавання слів</b>
+
+Надішліть слово або кілька слів через кому.
+Наприклад: <code>слово1, слово2</code>
+"""
+
+CHAT_EDIT_TOXIC_WORDS_DELETE = """
+<b>🧠 Видалення слів</b>
+
+Надішліть слово або кілька слів через кому, щоб прибрати їх зі списку.
+
+<b>Поточний список:</b> {toxic_words}
 """
 
 CHAT_EDIT_RESTRICTED_LINKS = """
@@ -364,6 +399,14 @@ def punish_type(ptype: str) -> str:
     }.get(ptype)
 
 
+def sensitivity(level: str) -> str:
+    return {
+        "low": SENSITIVITY_LOW,
+        "default": SENSITIVITY_DEFAULT,
+        "high": SENSITIVITY_HIGH
+    }.get(level, SENSITIVITY_DEFAULT)
+
+
 def yes_no(value: bool) -> str:
     return YES if value else NO
 
@@ -0,0 +1,86 @@
+import zlib
+from typing import TYPE_CHECKING, Dict, List, Optional
+from app.embeddings import normalize_rows
+from app.lazy import lazy_import
+
+if TYPE_CHECKING:
+    import numpy
+
+np = lazy_import("numpy")
+
+_CHUNK_WORDS = 5_000
+
+
+def char_ngrams(word: str, min_n: int = 3, max_n: int = 5) -> List[str]:
+    word = f"<{word}>"
+    return [
+        word[i:i + n]
+        for n in range(min_n, max_n + 1)
+        for i in range(len(word) - n + 1)
+    ]
+
+
+def ngram_buckets(word: str, buckets: int, min_n: int = 3, max_n: int = 5) -> List[int]:
+    # crc32 rather than hash(): bucket ids are persisted with the table.
+    return [zlib.crc32(ngram.encode("utf-8")) % buckets for ngram in char_ngrams(word, min_n, max_n)]
+
+
+class SubwordTable:
+    # fastText-style fallback for a word2vec vocabulary: every character
+    # n-gram hashes into one of a fixed number of buckets, and each bucket
+    # holds the mean unit vector of the known words containing its n-grams.
+    def __init__(self, vectors: "numpy.ndarray", filled: "numpy.ndarray", min_n: int = 3, max_n: int = 5):
+        self.vectors = vectors.astype(np.float16, copy=False)
+        self.filled = filled.astype(bool, copy=False)
+        self.buckets = len(vectors)
+        self.min_n = min_n
+        self.max_n = max_n
+
+    @property
+    def nbytes(self) -> int:
+        return self.vectors.nbytes + self.filled.nbytes
+
+    @classmethod
+    def build(
+        cls,
+        key_to_index: Dict[str, int],
+        vectors: "numpy.ndarray",
+        buckets: int,
+        min_n: int = 3,
+        max_n: int = 5,
+    ) -> "SubwordTable":
+        sums = np.zeros((buckets, vectors.shape[1]), dtype=np.float32)
+        counts = np.zeros(buckets, dtype=np.int64)
+        words = list(key_to_index.items())
+        for start in range(0, len(words), _CHUNK_WORDS):
+            bucket_ids, rows = [], []
+            for word, row in words[start:start + _CHUNK_WORDS]:
+                ids = ngram_buckets(word, buckets, min_n, max_n)
+                bucket_ids.extend(ids)
+                rows.extend([row] * len(ids))
+            bucket_ids = np.asarray(bucket_ids, dtype=np.int64)
+            rows = np.asarray(rows, dtype=np.int64)
+            np.add.at(sums, bucket_ids, normalize_rows(vectors[rows]))
+            counts += np.bincount(bucket_ids, minlength=buckets)
+
+        filled = counts > 0
+        sums[filled] /= counts[filled, None]
+        return cls(sums, filled, min_n, max_n)
+
+    def vector(self, word: str) -> Optional["numpy.ndarray"]:
+        ids = [i for i in ngram_buckets(word, self.buckets, self.min_n, self.max_n) if self.filled[i]]
+        if not ids:
+            return None
+        return self.vectors[ids].astype(np.float32).sum(axis=0)
+
+    def save(self, path: str) -> None:
+        np.savez(path, vectors=self.vectors, filled=self.filled, ngram_range=np.asarray([self.min_n, self.max_n]))
+
+    @classmethod
+    def load(cls, path: str) -> Optional["SubwordTable"]:
+        try:
+            data = np.load(path, allow_pickle=False)
+        except FileNotFoundError:
+            return None
+        min_n, max_n = data["ngram_range"].tolist()
+        return cls(data["vectors"], data["filled"], min_n, max_n)
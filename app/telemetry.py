@@ -0,0 +1,83 @@
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterator
+from aiogram import BaseMiddleware, Bot, Dispatcher
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.types import Update
+from sqlalchemy.ext.asyncio import AsyncEngine
+from app.cache import approved_message_cache, chat_cache, user_message_cache, user_state_store
+from app.metrics import Sample, registry
+
+UPDATES = registry.counter("bot_updates_total", "Updates received by type.", ("type",))
+UPDATE_LATENCY = registry.histogram("bot_update_seconds", "Time spent handling one update.")
+API_REQUESTS = registry.counter("bot_api_requests_total", "Bot API requests by method.", ("method",))
+API_ERRORS = registry.counter("bot_api_errors_total", "Failed Bot API requests by method and error.", ("method", "error"))
+FLOOD_WAITS = registry.counter("bot_api_flood_waits_total", "FloodWait responses by method.", ("method",))
+
+CACHES = {
+    "chat_cache": chat_cache,
+    "user_state_store": user_state_store,
+    "user_message_cache": user_message_cache,
+    "approved_message_cache": approved_message_cache,
+}
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    async def __call__(
+        self,
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        UPDATES.inc(event.event_type)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            UPDATE_LATENCY.observe(time.perf_counter() - started)
+
+
+class RequestMetricsMiddleware(BaseRequestMiddleware):
+    async def __call__(self, make_request, bot: Bot, method):
+        name = type(method).__name__
+        API_REQUESTS.inc(name)
+        try:
+            return await make_request(bot, method)
+        except TelegramRetryAfter:
+            FLOOD_WAITS.inc(name)
+            API_ERRORS.inc(name, "TelegramRetryAfter")
+            raise
+        except Exception as e:
+            API_ERRORS.inc(name, type(e).__name__)
+            raise
+
+
+def _cache_stat(stat: str) -> Callable[[], Iterator[Sample]]:
+    def collect() -> Iterator[Sample]:
+        for name, cache in CACHES.items():
+            yield {"cache": name}, cache.stats()[stat]
+    return collect
+
+
+def _cache_hit_ratio() -> Iterator[Sample]:
+    for name, cache in CACHES.items():
+        lookups = cache.hits + cache.misses
+        yield {"cache": name}, cache.hits / lookups if lookups else 0.0
+
+
+def setup_metrics(dispatcher: Dispatcher, bot: Bot, engine: AsyncEngine) -> None:
+    dispatcher.update.outer_middleware(UpdateMetricsMiddleware())
+    bot.session.middleware(RequestMetricsMiddleware())
+
+    registry.gauge("cache_hits_total", _cache_stat("hits"), "Cache hits.", kind="counter")
+    registry.gauge("cache_misses_total", _cache_stat("misses"), "Cache misses.", kind="counter")
+    registry.gauge("cache_hit_ratio", _cache_hit_ratio, "Cache hit ratio since start.")
+    registry.gauge("cache_entries", _cache_stat("entries"), "Entries currently cached.")
+    registry.gauge("cache_bytes", _cache_stat("bytes"), "Estimated bytes currently cached.")
+
+    # Not every pool class (e.g. NullPool) tracks checkouts.
+    pool = engine.sync_engine.pool
+    if hasattr(pool, "checkedout"):
+        registry.gauge("db_pool_checked_out", lambda: [({}, pool.checkedout())], "Connections in use.")
+        registry.gauge("db_pool_size", lambda: [({}, pool.size())], "Configured pool size.")
+        registry.gauge("db_pool_overflow", lambda: [({}, max(0, pool.overflow()))], "Connections above pool size.")
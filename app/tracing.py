@@ -0,0 +1,218 @@
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+from aiogram import BaseMiddleware, Bot, Dispatcher
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.types import Update
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from app.config import TRACE_EXPORT_PATH, TRACE_SAMPLE_RATE, TRACE_SLOW_UPDATE_MS
+from app.constants import TRACE_EXPORT_QUEUE_SIZE
+from app.metrics import registry
+from app.utils import get_logger
+
+logger = get_logger()
+
+TRACES_DROPPED = registry.counter("traces_dropped_total", "Traces dropped on a full export queue.")
+
+
+class Span:
+    # Ids are plain ints from getrandbits; they are only turned into hex on
+    # the exporter thread, for the few traces that are kept.
+    __slots__ = ("name", "span_id", "parent_id", "start_ns", "end_ns", "attributes")
+
+    def __init__(self, name: str, parent_id: Optional[int], attributes: Dict[str, Any]):
+        self.name = name
+        self.span_id = random.getrandbits(64)
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = attributes
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+
+class Trace:
+    __slots__ = ("spans",)
+
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def start(self, name: str, attributes: Dict[str, Any]) -> Span:
+        span = Span(name, _parent.get(), attributes)
+        self.spans.append(span)
+        return span
+
+
+_trace: ContextVar[Optional[Trace]] = ContextVar("trace", default=None)
+_parent: ContextVar[Optional[int]] = ContextVar("trace_parent", default=None)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    # Outside an update (startup, workers) there is no trace and this only
+    # costs the ContextVar lookup.
+    trace = _trace.get()
+    if trace is None:
+        yield None
+        return
+    current = trace.start(name, attributes)
+    token = _parent.set(current.span_id)
+    try:
+        yield current
+    finally:
+        current.end_ns = time.time_ns()
+        _parent.reset(token)
+
+
+def to_otlp(trace: Trace) -> dict:
+    trace_id = os.urandom(16).hex()
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": "telegram-bot"}}]},
+        "scopeSpans": [{
+            "scope": {"name": "app.tracing"},
+            "spans": [{
+                "traceId": trace_id,
+                "spanId": f"{item.span_id:016x}",
+                "parentSpanId": f"{item.parent_id:016x}" if item.parent_id is not None else "",
+                "name": item.name,
+                "startTimeUnixNano": item.start_ns,
+                "endTimeUnixNano": item.end_ns,
+                "attributes": [
+                    {"key": key, "value": {"stringValue": str(value)}} for key, value in item.attributes.items()
+                ],
+            } for item in trace.spans],
+        }],
+    }]}
+
+
+def breakdown(trace: Trace) -> str:
+    root = trace.spans[0]
+    totals: Dict[str, Tuple[int, float]] = {}
+    children = 0.0
+    for item in trace.spans[1:]:
+        count, total = totals.get(item.name, (0, 0.0))
+        totals[item.name] = (count + 1, total + item.duration_ms)
+        if item.parent_id == root.span_id:
+            children += item.duration_ms
+    parts = [
+        f"{name} {count}x {total:.1f} ms"
+        for name, (count, total) in sorted(totals.items(), key=lambda item: -item[1][1])
+    ]
+    parts.append(f"other {max(0.0, root.duration_ms - children):.1f} ms")
+    return ", ".join(parts)
+
+
+class TraceExporter:
+    # Serialization, the slow-update breakdown and file writes all happen on
+    # a background thread; the event loop only pays for a queue put.
+    def __init__(self, path: str = TRACE_EXPORT_PATH, max_pending: int = TRACE_EXPORT_QUEUE_SIZE):
+        self.path = path
+        self._queue: "queue.Queue[Optional[Tuple[Trace, bool]]]" = queue.Queue(max_pending)
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, trace: Trace, slow: bool) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+            self._thread.start()
+        try:
+            self._queue.put_nowait((trace, slow))
+        except queue.Full:
+            TRACES_DROPPED.inc()
+
+    def _run(self) -> None:
+        output = open(self.path, "a", encoding="utf-8") if self.path else None
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    return
+                trace, slow = item
+                root = trace.spans[0]
+                if slow:
+                    logger.warning(
+                        f"Slow update {root.attributes['update_id']} ({root.name}): "
+                        f"{root.duration_ms:.1f} ms: {breakdown(trace)}"
+                    )
+                if output is not None:
+                    output.write(json.dumps(to_otlp(trace)) + "\n")
+                    if self._queue.empty():
+                        output.flush()
+                elif logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Trace: {json.dumps(to_otlp(trace))}")
+        finally:
+            if output is not None:
+                output.close()
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+
+trace_exporter = TraceExporter()
+
+
+class TracingMiddleware(BaseMiddleware):
+    # Tail-based sampling: spans are recorded for every update and the
+    # decision to keep them is made once it is known whether the update was
+    # slow, so every slow update gets its breakdown.
+    def __init__(self, sample_rate: float = TRACE_SAMPLE_RATE, slow_ms: float = TRACE_SLOW_UPDATE_MS,
+                 exporter: TraceExporter = trace_exporter):
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.exporter = exporter
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any],
+    ) -> Any:
+        trace = Trace()
+        token = _trace.set(trace)
+        try:
+            with span(f"update.{event.event_type}", update_id=event.update_id) as root:
+                return await handler(event, data)
+        finally:
+            _trace.reset(token)
+            slow = 0 < self.slow_ms < root.duration_ms
+            if slow or random.random() < self.sample_rate:
+                self.exporter.submit(trace, slow)
+
+
+class TracingRequestMiddleware(BaseRequestMiddleware):
+    async def __call__(self, make_request, bot: Bot, method):
+        with span("telegram", method=type(method).__name__):
+            return await make_request(bot, method)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    trace = _trace.get()
+    if trace is not None:
+        conn.info.setdefault("trace_spans", []).append(trace.start("sql", {"db.statement": statement[:200]}))
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    spans = conn.info.get("trace_spans")
+    if spans:
+        spans.pop().end_ns = time.time_ns()
+
+
+def setup_tracing(dispatcher: Dispatcher, bot: Bot, engine: AsyncEngine) -> None:
+    if TRACE_SAMPLE_RATE <= 0 and TRACE_SLOW_UPDATE_MS <= 0:
+        return
+    dispatcher.update.outer_middleware(TracingMiddleware())
+    bot.session.middleware(TracingRequestMiddleware())
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
@@ -1,37 +1,34 @@
-from datetime import datetime, timezone, timedelta
+import atexit
+from datetime import date, datetime, timezone, timedelta
 from functools import lru_cache
+import json
 import logging
+from logging.handlers import QueueHandler, QueueListener
+import os
+import queue
 from pathlib import Path
-import random
 import re
-import aiohttp
-from typing import Any, List, Optional, Tuple, Type, Union, cast, Dict
+from typing import TYPE_CHECKING, Any, List, Optional, Tuple, Type, Union, cast, Dict
 from app import constants
 from app import strings
 from app.classes import DurationString
-from app.config import DEBUG_MODE, API_HASH, API_ID, TENOR_API_KEY
-from telethon import TelegramClient
-from telethon.tl.types import (
-    ChannelParticipantAdmin, 
-    ChannelParticipantCreator, 
-    ChannelParticipantBanned, 
-    ChannelParticipantLeft,
-    ChannelParticipant,
-    ChatFull,
-    ChatBannedRights,
-    ChatAdminRights,
-    User
-)
-from telethon.tl.functions.channels import GetParticipantRequest, GetFullChannelRequest
+from app.config import DEBUG_MODE, API_HASH, API_ID, LOG_DIR, LOG_JSON
+from app.metrics import registry
 import dataclasses
-from app.schemas import TelegramUserPermissions
 
+if TYPE_CHECKING:
+    from telethon import TelegramClient
+    from app.schemas import TelegramUserPermissions
 
-telethon_client = TelegramClient('bot_client', API_ID, API_HASH)
 
+@lru_cache()
+def get_telethon_client() -> "TelegramClient":
+    from telethon import TelegramClient
+    return TelegramClient('bot_client', API_ID, API_HASH)
 
 
 TIME_DURATION_PATTERN = r"^(\d+[smhdM])+$"
+LOG_RECORDS_DROPPED = registry.counter("log_records_dropped_total", "Log records dropped on a full log queue.")
 
 
 class CustomFormatter(logging.Formatter):
@@ -55,9 +52,96 @@ class InfoOrLowerFilter(logging.Filter):
     def filter(self, record) -> bool:
         return record.levelno <= self.levelno
 
+class DuplicateFilter(logging.Filter):
+    # The same error goes through at most once per window; the next copy that
+    # does carries the number suppressed in between.
+    def __init__(self, window: float, max_keys: int, levelno: int = logging.ERROR) -> None:
+        super().__init__()
+        self.window = window
+        self.max_keys = max_keys
+        self.levelno = levelno
+        self._seen: Dict[Tuple[str, int, str], List[float]] = {}
 
-
-async def get_user_permissions(client: TelegramClient, chat_id: int, user_id: int, default_permissions: TelegramUserPermissions) -> TelegramUserPermissions:
+    def filter(self, record) -> bool:
+        if record.levelno < self.levelno:
+            return True
+        key = (record.pathname, record.lineno, record.getMessage())
+        seen = self._seen.get(key)
+        if seen and record.created - seen[0] < self.window:
+            seen[1] += 1
+            return False
+
+        if seen and seen[1]:
+            record.msg = f"{record.getMessage()} (suppressed {seen[1]:.0f} duplicates in {record.created - seen[0]:.0f}s)"
+            record.args = ()
+        if len(self._seen) >= self.max_keys:
+            self._seen = {k: v for k, v in self._seen.items() if record.created - v[0] < self.window}
+            if len(self._seen) >= self.max_keys:
+                self._seen.clear()
+        self._seen[key] = [record.created, 0]
+        return True
+
+class LogQueueHandler(QueueHandler):
+    # The stock prepare() formats the message and traceback on the caller,
+    # before its args can change; only the write moves to the listener
+    # thread. A full queue drops the record instead of blocking the loop.
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+class DailyFileHandler(logging.FileHandler):
+    # Writes to <root>/<YYYY-MM-DD>/<name> and moves on to the next day's
+    # directory at midnight.
+    def __init__(self, root: str, name: str) -> None:
+        self.root = Path(root)
+        self.log_name = name
+        self.day = date.today()
+        super().__init__(self._path(self.day), encoding='utf-8', delay=True)
+
+    def _path(self, day: date) -> Path:
+        directory = self.root / day.isoformat()
+        directory.mkdir(parents=True, exist_ok=True)
+        return directory / self.log_name
+
+    def emit(self, record) -> None:
+        # Records from other threads can arrive slightly out of order around
+        # midnight; never switch back to the previous day's file.
+        day = max(date.fromtimestamp(record.created), self.day)
+        if day > self.day:
+            self.day = day
+            if self.stream:
+                self.stream.close()
+                self.stream = None
+            self.baseFilename = os.path.abspath(self._path(day))
+        super().emit(record)
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record) -> str:
+        entry = {
+            "time": self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            "level": record.levelname,
+            "logger": record.name,
+            "func": record.funcName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+
+async def get_user_permissions(client: "TelegramClient", chat_id: int, user_id: int, default_permissions: "TelegramUserPermissions") -> "TelegramUserPermissions":
+    from app.schemas import TelegramUserPermissions
+    from telethon.tl.types import (
+        ChannelParticipantAdmin, 
+        ChannelParticipantCreator, 
+        ChannelParticipantBanned, 
+        ChannelParticipantLeft,
+        ChannelParticipant,
+    )
+    from telethon.tl.functions.channels import GetParticipantRequest
     try:
         participant_full = await client(GetParticipantRequest(channel=chat_id, participant=user_id))
         participant = participant_full.participant
@@ -100,7 +184,11 @@ async def get_user_permissions(client: TelegramClient, chat_id: int, user_id: in
         print(f"Error getting user permissions: {e}")
         return TelegramUserPermissions()
 
-async def get_chat_members(chat_id: int) -> List[Tuple[str, int, TelegramUserPermissions]]:
+async def get_chat_members(chat_id: int) -> List[Tuple[str, int, "TelegramUserPermissions"]]:
+    from app.schemas import TelegramUserPermissions
+    from telethon.tl.types import ChatFull, ChatBannedRights
+    from telethon.tl.functions.channels import GetFullChannelRequest
+    telethon_client = get_telethon_client()
     if not telethon_client.is_connected():
         await telethon_client.start()
 
@@ -137,15 +225,17 @@ async def get_chat_members(chat_id: int) -> List[Tuple[str, int, TelegramUserPer
     return chat_members
 
 async def stop_telethon_client():
+    if not get_telethon_client.cache_info().currsize:
+        return
+    telethon_client = get_telethon_client()
     if telethon_client.is_connected():
         await telethon_client.disconnect()
 
 @lru_cache()
 def get_logger() -> logging.Logger:
-    logger = logging.getLogger("aiogram")
-
-    logger.setLevel(logging.DEBUG if DEBUG_MODE else logging.INFO)
+    return logging.getLogger("aiogram")
 
+def build_log_handlers(root: str = LOG_DIR, json_lines: bool = LOG_JSON) -> List[logging.Handler]:
     formatter = CustomFormatter(
         max_func_name_length=15,
         fmt='%(levelname)-8s | %(name)-20s | %(funcName)-15s | %(asctime)-8s : %(message)s',
@@ -156,38 +246,59 @@ def get_logger() -> logging.Logger:
         '%(asctime)s | %(name)-20s | %(funcName)s : %(message)s',
         datefmt='%H:%M:%S'
     )
+    file_formatter = JsonFormatter() if json_lines else formatter
+    suffix = "jsonl" if json_lines else "log"
 
-    log_dir = Path(f"logs/{datetime.now().strftime('%Y-%m-%d')}")
-    log_dir.mkdir(parents=True, exist_ok=True)
-    
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
-
-    file_handler_info = logging.FileHandler(
-        f'{log_dir}/info.log', encoding='utf-8')
+    file_handler_info = DailyFileHandler(root, f'info.{suffix}')
     file_handler_info.setLevel(logging.INFO)
-    file_handler_info.setFormatter(formatter)
+    file_handler_info.setFormatter(file_formatter)
     file_handler_info.addFilter(InfoOrLowerFilter(logging.INFO))
 
-    file_handler_error = logging.FileHandler(
-        f'{log_dir}/error.log', encoding='utf-8')
+    file_handler_error = DailyFileHandler(root, f'error.{suffix}')
     file_handler_error.setLevel(logging.ERROR)
-    file_handler_error.setFormatter(formatter)
+    file_handler_error.setFormatter(file_formatter)
+
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(formatter)
 
+    # Files first: the console formatter shortens funcName on the shared record.
+    handlers = [file_handler_info, file_handler_error]
     if DEBUG_MODE:
-        file_handler_debug = logging.FileHandler(
-            f'{log_dir}/debug.log', encoding='utf-8')
+        file_handler_debug = DailyFileHandler(root, f'debug.{suffix}')
         file_handler_debug.setLevel(logging.DEBUG)
-        file_handler_debug.setFormatter(debug_no_level_formatter)
+        file_handler_debug.setFormatter(JsonFormatter() if json_lines else debug_no_level_formatter)
         file_handler_debug.addFilter(InfoOrLowerFilter(logging.DEBUG))
+        handlers.append(file_handler_debug)
+    handlers.append(console_handler)
+    return handlers
 
-    logger.addHandler(file_handler_info)
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler_error)
-    if DEBUG_MODE: logger.addHandler(file_handler_debug)
+def start_log_listener(logger: logging.Logger, handlers: List[logging.Handler]) -> QueueListener:
+    handler = LogQueueHandler(queue.Queue(constants.LOG_QUEUE_SIZE))
+    handler.addFilter(DuplicateFilter(constants.LOG_DUPLICATE_WINDOW, constants.LOG_DUPLICATE_MAX_KEYS))
+    listener = QueueListener(handler.queue, *handlers, respect_handler_level=True)
+    listener.start()
+    logger.addHandler(handler)
+    return listener
 
+_log_listener: Optional[QueueListener] = None
+
+@lru_cache()
+def setup_logging() -> logging.Logger:
+    global _log_listener
+    logger = get_logger()
+
+    logger.setLevel(logging.DEBUG if DEBUG_MODE else logging.INFO)
+    _log_listener = start_log_listener(logger, build_log_handlers())
+    atexit.register(stop_logging)
     return logger
 
+def stop_logging() -> None:
+    # Drains the queue, so records logged during shutdown still reach disk.
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
 
 def utcnow() -> datetime:
     return datetime.now(timezone.utc).replace(tzinfo=None)
@@ -322,52 +433,25 @@ def get_second_declination(seconds: int) -> str:
         return "секунд"
     
 
-def encode_inline_data(prefix: str, sub_prefix: Optional[str], data: Optional[Union[int, str]]=None) -> str:
-    sub_prefix = sub_prefix or ""
-    data = data if data is not None else ""
-
-    if not isinstance(data, str):
-        data = str(data)
-    data = data.replace("_", "__") 
-    data = data.replace("-", "*") 
-    
-    ret = f"{prefix}_{sub_prefix}_{data}"
-    print('ret: ', ret)
-    return ret
-
-def decode_inline_data(data: str) -> Optional[Tuple[str, Optional[str], Optional[Union[int, str]]]]:
-    match = re.match(r"([a-zA-Z0-9_-]+)_([a-zA-Z0-9_-]+)?_(.*)", data)
-    if match:
-        prefix, sub_prefix, raw_data = match.groups()
-        sub_prefix = None if sub_prefix is None else sub_prefix
-        if raw_data:
-            try:
-                return prefix, sub_prefix, int(raw_data)
-            except ValueError:
-                raw_data = raw_data.replace("__", "_")
-                raw_data = raw_data.replace("*", "-")
-                return prefix, sub_prefix, raw_data
-        else:
-            return prefix, sub_prefix, None
-    return None, None, None
-
 def check_admin_rights(
     role: constants.UserRole,
-    required_rights: List[constants.Permission] = None,
+    required_rights: Union[int, List[constants.Permission]] = None,
     required_role: List[constants.UserRole] = None
 ) -> bool:
     
     if not isinstance(role, constants.UserRole): role = constants.UserRole(role)
-    if not isinstance(required_role, list): required_role = [required_role]
     
-    if required_role and role not in required_role:
-        return False
+    if required_role:
+        if isinstance(required_role, constants.UserRole):
+            if role is not required_role:
+                return False
+        elif role not in required_role:
+            return False
 
     if required_rights:
-        user_permissions = constants.ROLE_PERMISSIONS.get(role, [])
-        required_rights_set = set(required_rights)
-        user_permissions_set = set(user_permissions)
-        return required_rights_set.issubset(user_permissions_set)
+        if not isinstance(required_rights, int):
+            required_rights = constants.permissions_mask(required_rights)
+        return constants.ROLE_PERMISSION_MASKS.get(role, 0) & required_rights == required_rights
 
     return True
 
@@ -471,25 +555,3 @@ def compare_links(link:str, whitelist: List[str]) -> bool:
     normalized_whitelist = [normalize_url(item) for item in whitelist]
     
     return normalized_link in normalized_whitelist
-
-
-
-
-async def get_random_cat_gif() -> Optional[str]:
-    url = "https://g.tenor.com/v1/search"
-    params = {
-        "q": "cat",
-        "key": TENOR_API_KEY,
-        "limit": 50,
-        "random": "true",
-        "media_filter": "gif"
-    }
-    
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, params=params) as response:
-            data = await response.json()
-            if response.status == 200:
-                gifs = data.get('results', [])
-                urls = [gif['media'][0]['gif']['url'] for gif in gifs]
-                return random.choice(urls)
-    return None
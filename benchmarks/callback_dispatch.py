@@ -0,0 +1,104 @@
+"""
+Callback dispatch cost as the settings menu grows: regex decode + if/elif
+chain (old) vs. cached binary decode + dict router (new).
+
+    python benchmarks/callback_dispatch.py --sizes 10 25 50 100 200
+"""
+import argparse
+import asyncio
+import random
+import re
+import sys
+import time
+import zlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.callbacks import CALLBACK_NAMES, CallbackRouter, decode_inline_data, encode_inline_data
+
+
+def setting_names(size: int) -> list:
+    # Synthetic sub-prefixes, skipping any whose crc16 id is taken by a real one.
+    taken = {zlib.crc32(name.encode("utf-8")) & 0xFFFF for name in CALLBACK_NAMES}
+    names, i = [], 0
+    while len(names) < size:
+        name = f"toggle-setting-{i}"
+        if zlib.crc32(name.encode("utf-8")) & 0xFFFF not in taken:
+            names.append(name)
+        i += 1
+    return names
+
+
+def legacy_encode(prefix, sub_prefix, data=None) -> str:
+    data = "" if data is None else str(data)
+    return f"{prefix}_{sub_prefix or ''}_{data.replace('_', '__').replace('-', '*')}"
+
+
+def legacy_decode(data: str):
+    match = re.match(r"([a-zA-Z0-9_-]+)_([a-zA-Z0-9_-]+)?_(.*)", data)
+    if not match:
+        return None, None, None
+    prefix, sub_prefix, raw_data = match.groups()
+    if raw_data:
+        try:
+            return prefix, sub_prefix, int(raw_data)
+        except ValueError:
+            return prefix, sub_prefix, raw_data.replace("__", "_").replace("*", "-")
+    return prefix, sub_prefix, None
+
+
+async def _noop(callback, raw_data=None):
+    return raw_data
+
+
+def build_legacy(names):
+    async def dispatch(data):
+        _, sub_prefix, raw_data = legacy_decode(data)
+        for name in names:
+            if sub_prefix == name:
+                return await _noop(None, raw_data)
+    return dispatch
+
+
+def build_router(names):
+    router = CallbackRouter()
+    for name in names:
+        router.add("bench-edit", name, _noop)
+
+    async def dispatch(data):
+        prefix, sub_prefix, raw_data = decode_inline_data(data)
+        return await router.dispatch(None, prefix, sub_prefix, raw_data=raw_data)
+    return dispatch
+
+
+async def measure(dispatch, payloads) -> float:
+    started = time.perf_counter()
+    for data in payloads:
+        await dispatch(data)
+    return (time.perf_counter() - started) / len(payloads) * 1e9
+
+
+async def run(sizes, calls, seed) -> None:
+    rng = random.Random(seed)
+    print(f"{'routes':>6} {'legacy ns':>10} {'router ns':>10} {'legacy len':>10} {'binary len':>10}")
+    for size in sizes:
+        names = setting_names(size)
+        picks = [(rng.choice(names), rng.choice([None, "-", -1001234567890])) for _ in range(calls)]
+        legacy_payloads = [legacy_encode("bench-edit", name, data) for name, data in picks]
+        binary_payloads = [encode_inline_data("bench-edit", name, data) for name, data in picks]
+
+        legacy_ns = await measure(build_legacy(names), legacy_payloads)
+        router_ns = await measure(build_router(names), binary_payloads)
+        legacy_len = max(map(len, legacy_payloads))
+        binary_len = max(map(len, binary_payloads))
+        print(f"{size:>6} {legacy_ns:>10.0f} {router_ns:>10.0f} {legacy_len:>10} {binary_len:>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 25, 50, 100, 200])
+    parser.add_argument("--calls", type=int, default=50_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.calls, args.seed))
@@ -0,0 +1,86 @@
+"""
+Restricted-word recall and cost: the old per-word substring loop over raw
+text (with and without a hand-grown list of obfuscated variants) vs. one
+canonicalization pass plus a single compiled pattern over the base list.
+
+    python benchmarks/canonicalization.py --words 300 --messages 20000
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.canonical import canonicalize, find_restricted_word
+
+LETTERS = "абвгдежзийклмнопрстуфхцчшщьюяіїє"
+HOMOGLYPHS = {"а": "a", "е": "e", "о": "o", "р": "p", "с": "c", "х": "x", "у": "y", "і": "i", "к": "k", "з": "3"}
+
+
+def obfuscate(rng: random.Random, word: str) -> str:
+    chars = list(word)
+    for _ in range(rng.randint(1, 2)):
+        i = rng.randrange(len(chars))
+        action = rng.random()
+        if action < 0.4 and chars[i] in HOMOGLYPHS:
+            chars[i] = HOMOGLYPHS[chars[i]]
+        elif action < 0.6:
+            chars[i] = chars[i] * rng.randint(3, 5)
+        elif action < 0.8 and 0 < i < len(chars):
+            chars[i] = rng.choice("*.-_") + chars[i]
+        else:
+            chars[i] = chars[i].upper()
+    return "".join(chars)
+
+
+def legacy_check(text: str, words: list) -> bool:
+    return any(bad_word in text for bad_word in words)
+
+
+def timed(label: str, messages: list, check, labels: list) -> None:
+    started = time.perf_counter()
+    verdicts = [check(text) for text in messages]
+    elapsed = time.perf_counter() - started
+    hits = sum(v and l for v, l in zip(verdicts, labels))
+    false_hits = sum(v and not l for v, l in zip(verdicts, labels))
+    print(f"  {label:<36} {elapsed / len(messages) * 1e6:7.2f} us/msg  "
+          f"recall {hits / max(1, sum(labels)):.1%}  false positives {false_hits / max(1, labels.count(False)):.2%}")
+
+
+def main(args) -> None:
+    rng = random.Random(args.seed)
+    words = ["".join(rng.choices(LETTERS, k=rng.randint(5, 8))) for _ in range(args.words)]
+    grown = words + [obfuscate(rng, word) for word in words for _ in range(args.variants)]
+    vocabulary = ["".join(rng.choices(LETTERS, k=rng.randint(2, 9))) for _ in range(20_000)]
+
+    messages, labels = [], []
+    for _ in range(args.messages):
+        tokens = rng.choices(vocabulary, k=rng.randint(5, 25))
+        toxic = rng.random() < args.toxic
+        if toxic:
+            word = rng.choice(words)
+            tokens[rng.randrange(len(tokens))] = obfuscate(rng, word) if rng.random() < 0.8 else word
+        messages.append(" ".join(tokens))
+        labels.append(toxic)
+
+    print(f"{args.messages:,} messages, {args.words} restricted words ({len(grown):,} with grown variants)")
+    timed("substring loop, base list", messages, lambda text: legacy_check(text, words), labels)
+    timed(f"substring loop, +{args.variants} variants per word", messages, lambda text: legacy_check(text, grown), labels)
+    started = time.perf_counter()
+    for text in messages:
+        canonicalize(text)
+    print(f"  {'canonicalize only':<36} {(time.perf_counter() - started) / len(messages) * 1e6:7.2f} us/msg")
+    timed("canonicalize + compiled pattern", messages,
+          lambda text: find_restricted_word(canonicalize(text), words), labels)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--words", type=int, default=300)
+    parser.add_argument("--variants", type=int, default=5)
+    parser.add_argument("--messages", type=int, default=20_000)
+    parser.add_argument("--toxic", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    main(parser.parse_args())
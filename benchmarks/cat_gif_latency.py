@@ -0,0 +1,75 @@
+"""
+/cat_gif latency: per-call ClientSession (old path) vs. pooled session with
+the prefetched GIF ring buffer (new path), both against the local stub.
+
+    python benchmarks/cat_gif_latency.py --calls 200 --delay 0.03
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tests"))
+
+import aiohttp
+from stub_tenor import StubTenorServer
+
+
+async def legacy_get_random_cat_gif(url: str):
+    params = {"q": "cat", "key": "stub", "limit": 50, "random": "true", "media_filter": "gif"}
+    async with aiohttp.ClientSession() as session:
+        async with session.get(url, params=params) as response:
+            data = await response.json()
+            if response.status == 200:
+                urls = [gif['media'][0]['gif']['url'] for gif in data.get('results', [])]
+                return random.choice(urls)
+    return None
+
+
+def summarize(name: str, samples: list) -> None:
+    samples = sorted(samples)
+    p = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))] * 1000
+    print(f"{name:<8} mean {statistics.mean(samples) * 1000:7.2f} ms  "
+          f"p50 {p(0.5):7.2f} ms  p95 {p(0.95):7.2f} ms  p99 {p(0.99):7.2f} ms")
+
+
+async def run(calls: int, delay: float) -> None:
+    async with StubTenorServer(delay=delay) as server:
+        os.environ["TENOR_API_URL"] = server.url
+        from app.cat_gifs import cat_gif_buffer
+        from app.http_client import close_http_session
+
+        before = []
+        for _ in range(calls):
+            started = time.perf_counter()
+            await legacy_get_random_cat_gif(server.url)
+            before.append(time.perf_counter() - started)
+        legacy_requests = server.requests
+
+        await cat_gif_buffer.refill()
+        after = []
+        for _ in range(calls):
+            started = time.perf_counter()
+            await cat_gif_buffer.get()
+            after.append(time.perf_counter() - started)
+            await asyncio.sleep(0)
+
+        await cat_gif_buffer.close()
+        await close_http_session()
+
+        summarize("before", before)
+        summarize("after", after)
+        print(f"upstream requests: before {legacy_requests}, after {server.requests - legacy_requests}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--delay", type=float, default=0.03, help="stub server latency, seconds")
+    args = parser.parse_args()
+    asyncio.run(run(args.calls, args.delay))
@@ -0,0 +1,95 @@
+"""
+Memory of the chat cache with 10k active chats: live TelegramChat ORM
+instances with loaded members (old) vs. detached ChatSnapshot values in the
+bounded LRU cache (new), plus hit rate under a skewed access pattern.
+
+    python benchmarks/chat_cache_memory.py --chats 10000 --members 50
+"""
+import argparse
+import copy
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import constants
+from app.memory_cache import BoundedCache
+from app.models import TelegramChat, TelegramUser, UserChatAssociation
+from app.schemas import ChatSnapshot
+
+
+def build_chat(telegram_id: int, members: int) -> TelegramChat:
+    chat = TelegramChat(
+        telegram_id=telegram_id,
+        title=f"chat {telegram_id}",
+        chat_type=constants.ChatType.SUPERGROUP,
+        _settings=copy.deepcopy(constants.DEFAULT_CHAT_SETTINGS),
+    )
+    for user_id in range(members):
+        user = TelegramUser(telegram_id=telegram_id * 1000 + user_id, username=f"user{user_id}")
+        chat.users.append(user)
+        chat.user_chat_associations.append(
+            UserChatAssociation(user_id=user.telegram_id, chat_id=telegram_id, role=constants.UserRole.MEMBER)
+        )
+    return chat
+
+
+def measure_memory(build) -> tuple:
+    gc.collect()
+    tracemalloc.start()
+    data = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return data, current
+
+
+def main(chats: int, members: int, max_entries: int, max_bytes: int, requests: int, seed: int) -> None:
+    orm_chats = [build_chat(-100_000 - i, members) for i in range(chats)]
+
+    _, pinned_bytes = measure_memory(lambda: [build_chat(-1, members) for _ in range(min(chats, 500))])
+    pinned_bytes = pinned_bytes * chats // min(chats, 500)
+
+    def fill() -> BoundedCache:
+        cache = BoundedCache(max_entries=max_entries, ttl=timedelta(minutes=10), max_bytes=max_bytes)
+        for chat in orm_chats:
+            cache.set(chat.telegram_id, ChatSnapshot.from_model(chat))
+        return cache
+
+    cache, snapshot_bytes = measure_memory(fill)
+    print(f"memory for {chats:,} chats x {members} members")
+    print(f"  ORM instances (pinned graph)  {pinned_bytes / 2**20:10.1f} MiB")
+    print(f"  bounded snapshot cache        {snapshot_bytes / 2**20:10.1f} MiB "
+          f"({len(cache):,} entries, {cache.size_bytes / 2**20:.1f} MiB accounted)")
+
+    rng = random.Random(seed)
+    keys = [chat.telegram_id for chat in orm_chats]
+    weights = [1 / (rank + 1) for rank in range(chats)]
+    lookups = rng.choices(keys, weights=weights, k=requests)
+
+    started = time.perf_counter()
+    for key in lookups:
+        if cache.get(key) is None:
+            cache.set(key, ChatSnapshot.from_model(orm_chats[-100_000 - key]))
+    elapsed = time.perf_counter() - started
+
+    stats = cache.stats()
+    hit_rate = stats["hits"] / max(1, stats["hits"] + stats["misses"])
+    print(f"{requests:,} zipf lookups in {elapsed:.3f} s ({elapsed / requests * 1e9:.0f} ns/op)")
+    print(f"  hit rate {hit_rate:.1%}, evictions {stats['evictions']:,}, expirations {stats['expirations']:,}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chats", type=int, default=10_000)
+    parser.add_argument("--members", type=int, default=50)
+    parser.add_argument("--max-entries", type=int, default=constants.CHAT_CACHE_MAX_ENTRIES)
+    parser.add_argument("--max-bytes", type=int, default=constants.CHAT_CACHE_MAX_BYTES)
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    main(args.chats, args.members, args.max_entries, args.max_bytes, args.requests, args.seed)
@@ -0,0 +1,329 @@
+"""
+End-to-end throughput: synthetic Telegram updates (chatter, toxic messages,
+links, joins, settings callbacks) fed through the real Dispatcher with a
+fake Bot session and a throwaway SQLite database. Reports updates/s, handler
+latency percentiles, SQL statements and allocations per update, and saves
+the result as JSON; --compare prints deltas against an earlier run.
+
+    python benchmarks/end_to_end.py --updates 5000 --output e2e.json
+    python benchmarks/end_to_end.py --updates 5000 --compare e2e.json
+"""
+import argparse
+import asyncio
+import copy
+import json
+import logging
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+_DB_DIR = tempfile.mkdtemp(prefix="e2e-bench-")
+os.environ.setdefault("BOT_TOKEN", "123456:" + "A" * 35)
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_DB_DIR}/bench.db"
+# Primary keys are CHAR(36) filled with uuid4(); PostgreSQL casts, sqlite3 needs an adapter.
+sqlite3.register_adapter(uuid.UUID, str)
+
+import numpy as np
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import TelegramMethod
+from aiogram.types import Chat, Message, Update
+from sqlalchemy import event
+
+from app import bad_word, constants
+from app.bot import dp
+from app.callbacks import encode_inline_data
+from app.database import close_engine, get_engine
+from app.embeddings import EmbeddingStore
+from app.models import Base
+from app.telemetry import setup_metrics
+from app.tracing import setup_tracing
+
+LETTERS = "абвгдежзийклмнопрстуфхцчшщьюяіїє"
+KINDS = ("chatter", "toxic", "link", "join", "callback")
+
+
+class FakeSession(BaseSession):
+    # Answers every Bot API call locally with the cheapest valid result.
+    def __init__(self):
+        super().__init__()
+        self.calls: Counter = Counter()
+        self._message_id = 10_000_000
+
+    async def make_request(self, bot: Bot, method: TelegramMethod, timeout=None):
+        self.calls[type(method).__name__] += 1
+        returning = method.__returning__
+        if returning is Message:
+            self._message_id += 1
+            chat_id = getattr(method, "chat_id", 0) or 0
+            return Message(
+                message_id=self._message_id,
+                date=datetime.now(timezone.utc),
+                chat=Chat(id=chat_id, type="private" if chat_id > 0 else "supergroup"),
+                text=getattr(method, "text", None),
+            )
+        if getattr(returning, "__origin__", None) is list:
+            return []
+        return True
+
+    async def stream_content(self, *args, **kwargs):
+        if False:
+            yield b""
+
+    async def close(self) -> None:
+        pass
+
+
+def install_toxicity_model(rng: random.Random, vocabulary: list, toxic: list) -> None:
+    np_rng = np.random.default_rng(rng.randrange(2**32))
+    words = vocabulary + toxic
+    vectors = np_rng.standard_normal((len(words), 100)).astype(np.float32)
+    store = EmbeddingStore({word: i for i, word in enumerate(words)}, vectors)
+    model = bad_word.ToxicityModel(store, {word: vectors[len(vocabulary) + i] for i, word in enumerate(toxic)}, 0.7)
+    bad_word.toxicity_registry._active = model
+
+
+def enable_moderation() -> None:
+    settings = copy.deepcopy(constants.DEFAULT_CHAT_SETTINGS)
+    settings["moderation"]["enabled"] = True
+    settings["restricted_words"]["enabled"] = True
+    settings["link_filtering"]["enabled"] = True
+    constants.DEFAULT_CHAT_SETTINGS.clear()
+    constants.DEFAULT_CHAT_SETTINGS.update(settings)
+
+
+class UpdateFactory:
+    def __init__(self, rng: random.Random, args, vocabulary: list, toxic: list):
+        self.rng = rng
+        self.vocabulary = vocabulary
+        self.toxic = toxic
+        self.chats = [-1_000_000_000_000 - i for i in range(args.chats)]
+        self.users = [1_000 + i for i in range(args.users)]
+        self.seen_chats: list = []
+        self.update_id = 0
+        self.message_id = 0
+        self.date = int(time.time())
+
+    def _user(self, user_id: int) -> dict:
+        return {"id": user_id, "is_bot": False, "first_name": f"user{user_id}", "username": f"user{user_id}"}
+
+    def _chat(self, chat_id: int) -> dict:
+        return {"id": chat_id, "type": "supergroup", "title": f"chat{chat_id}"}
+
+    def _message(self, chat: dict, user_id: int, text: str) -> dict:
+        self.message_id += 1
+        return {"message_id": self.message_id, "date": self.date, "chat": chat, "from": self._user(user_id), "text": text}
+
+    def _words(self, low: int, high: int) -> list:
+        return self.rng.choices(self.vocabulary, k=self.rng.randint(low, high))
+
+    def build(self, kind: str) -> dict:
+        rng = self.rng
+        self.update_id += 1
+        chat = self._chat(rng.choice(self.chats))
+        user_id = rng.choice(self.users)
+        update = {"update_id": self.update_id}
+        if kind == "callback" and not self.seen_chats:
+            kind = "chatter"
+        if kind != "callback" and chat["id"] not in self.seen_chats:
+            self.seen_chats.append(chat["id"])
+
+        if kind == "chatter":
+            update["message"] = self._message(chat, user_id, " ".join(self._words(3, 20)))
+        elif kind == "toxic":
+            words = self._words(3, 12)
+            words.insert(rng.randrange(len(words) + 1), rng.choice(self.toxic))
+            update["message"] = self._message(chat, user_id, " ".join(words))
+        elif kind == "link":
+            words = self._words(2, 8) + [f"https://{rng.choice(self.vocabulary)}.example/{rng.randrange(10**6)}"]
+            update["message"] = self._message(chat, user_id, " ".join(words))
+        elif kind == "join":
+            new_user = self.users[-1] + self.update_id
+            member = {"user": self._user(new_user)}
+            update["chat_member"] = {
+                "chat": chat, "from": self._user(new_user), "date": self.date,
+                "old_chat_member": {**member, "status": "left"},
+                "new_chat_member": {**member, "status": "member"},
+            }
+        else:
+            private = {"id": user_id, "type": "private", "first_name": f"user{user_id}"}
+            update["callback_query"] = {
+                "id": str(self.update_id), "from": self._user(user_id), "chat_instance": "bench",
+                "message": self._message(private, user_id, "menu"),
+                "data": encode_inline_data("chat-edit-menu", "chat", rng.choice(self.seen_chats)),
+            }
+        return update
+
+
+class ErrorCounter(logging.Handler):
+    # The Dispatcher's error handler logs and swallows handler exceptions.
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.errors: Counter = Counter()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.errors[record.getMessage().split(":", 1)[0][:80]] += 1
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+async def feed(bot: Bot, updates: list, latencies: list) -> None:
+    for update in updates:
+        started = time.perf_counter()
+        await dp.feed_update(bot, update)
+        latencies.append(time.perf_counter() - started)
+
+
+async def run(args) -> dict:
+    rng = random.Random(args.seed)
+    vocabulary = list(dict.fromkeys("".join(rng.choices(LETTERS, k=rng.randint(3, 9))) for _ in range(args.vocabulary)))
+    toxic = [f"токс{word}" for word in rng.sample(vocabulary, 200)]
+    install_toxicity_model(rng, vocabulary, toxic)
+    enable_moderation()
+
+    async with get_engine().begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    statements = Counter()
+    event.listen(get_engine().sync_engine, "before_cursor_execute", lambda *_: statements.update(["sql"]))
+
+    session = FakeSession()
+    bot = Bot(os.environ["BOT_TOKEN"], session=session)
+    # Same instrumentation main() installs on the real bot.
+    setup_metrics(dp, bot, get_engine())
+    setup_tracing(dp, bot, get_engine())
+    factory = UpdateFactory(rng, args, vocabulary, toxic)
+    weights = [args.chatter, args.toxic, args.links, args.joins, args.callbacks]
+
+    def build(count: int) -> list:
+        kinds = rng.choices(KINDS, weights=weights, k=count)
+        return [Update.model_validate(factory.build(kind), context={"bot": bot}) for kind in kinds], Counter(kinds)
+
+    errors = ErrorCounter()
+    logging.getLogger("aiogram").addHandler(errors)
+
+    # Warm-up creates chats, users and associations so the measured pass
+    # reflects steady state rather than first-contact inserts.
+    warmup, _ = build(args.warmup)
+    await feed(bot, warmup, [])
+
+    updates, mix = build(args.updates)
+    latencies = []
+    statements.clear()
+    session.calls.clear()
+    errors.errors.clear()
+    blocks_before = sys.getallocatedblocks()
+    started = time.perf_counter()
+    await feed(bot, updates, latencies)
+    elapsed = time.perf_counter() - started
+    blocks_after = sys.getallocatedblocks()
+    sql = statements["sql"]
+    api_calls = sum(session.calls.values())
+
+    traced, _ = build(args.trace)
+    peaks = []
+    tracemalloc.start()
+    for update in traced:
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        await feed(bot, [update], [])
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - before)
+    tracemalloc.stop()
+
+    logging.getLogger("aiogram").removeHandler(errors)
+    await close_engine()
+    latencies.sort()
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "args": vars(args),
+            "mix": dict(mix),
+        },
+        "updates_per_second": round(len(updates) / elapsed, 1),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50) * 1e3, 3),
+            "p95": round(percentile(latencies, 0.95) * 1e3, 3),
+            "p99": round(percentile(latencies, 0.99) * 1e3, 3),
+            "mean": round(statistics.fmean(latencies) * 1e3, 3),
+        },
+        "sql_per_update": round(sql / len(updates), 2),
+        "api_calls_per_update": round(api_calls / len(updates), 2),
+        "api_calls": dict(session.calls),
+        "allocations": {
+            "retained_blocks_per_update": round((blocks_after - blocks_before) / len(updates), 2),
+            "peak_bytes_per_update_mean": round(statistics.fmean(peaks)) if peaks else 0,
+            "peak_bytes_per_update_p99": percentile(sorted(peaks), 0.99) if peaks else 0,
+        },
+        "errors": dict(errors.errors),
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def compare(result: dict, baseline: dict) -> None:
+    rows = [
+        ("updates/s", result["updates_per_second"], baseline["updates_per_second"]),
+        *((f"latency {key} ms", result["latency_ms"][key], baseline["latency_ms"][key]) for key in ("p50", "p95", "p99")),
+        ("sql/update", result["sql_per_update"], baseline["sql_per_update"]),
+        ("peak bytes/update", result["allocations"]["peak_bytes_per_update_mean"],
+         baseline["allocations"]["peak_bytes_per_update_mean"]),
+    ]
+    print(f"vs. {baseline['meta'].get('commit') or 'baseline'}:")
+    for label, value, old in rows:
+        change = (value - old) / old * 100 if old else 0.0
+        print(f"  {label:<20} {old:>12} -> {value:<12} ({change:+.1f}%)")
+
+
+def main(args) -> None:
+    result = asyncio.run(run(args))
+    print(json.dumps({key: value for key, value in result.items() if key != "meta"}, indent=2))
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(result, json.load(f))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--updates", type=int, default=5_000)
+    parser.add_argument("--warmup", type=int, default=1_000)
+    parser.add_argument("--trace", type=int, default=500, help="updates replayed under tracemalloc")
+    parser.add_argument("--chats", type=int, default=50)
+    parser.add_argument("--users", type=int, default=2_000)
+    parser.add_argument("--vocabulary", type=int, default=20_000)
+    parser.add_argument("--chatter", type=float, default=0.75)
+    parser.add_argument("--toxic", type=float, default=0.08)
+    parser.add_argument("--links", type=float, default=0.07)
+    parser.add_argument("--joins", type=float, default=0.05)
+    parser.add_argument("--callbacks", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="")
+    parser.add_argument("--compare", default="")
+    main(parser.parse_args())
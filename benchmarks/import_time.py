@@ -0,0 +1,89 @@
+"""
+Import-time benchmark with a regression budget.
+
+Runs ``python -X importtime`` for the bot entry points in a fresh interpreter,
+reports the cumulative import time of each target and fails when a target
+exceeds its budget or pulls in one of the heavy, feature-only dependencies.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --budget app.bot=900 --repeat 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Cumulative import time budget per module, in milliseconds.
+DEFAULT_BUDGETS = {
+    "main": 150,
+    "app.database": 400,
+    "app.bot": 1200,
+}
+
+# Modules that must only be loaded when their feature is first used.
+LAZY_MODULES = ["telethon", "gensim", "numpy", "aiohttp"]
+
+
+def measure(module: str) -> float:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    for line in reversed(result.stderr.splitlines()):
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if name == module:
+            return int(cumulative) / 1000
+    raise RuntimeError(f"no importtime entry for {module}")
+
+
+def eagerly_loaded(module: str) -> list:
+    code = (
+        f"import sys, json, {module}; "
+        f"print(json.dumps([m for m in {LAZY_MODULES!r} if m in sys.modules]))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", action="append", default=[], metavar="MODULE=MS")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", dest="json_path", default=None)
+    args = parser.parse_args()
+
+    budgets = dict(DEFAULT_BUDGETS)
+    for item in args.budget:
+        module, value = item.split("=", 1)
+        budgets[module] = float(value)
+
+    report = {}
+    failed = False
+    for module, budget in budgets.items():
+        best = min(measure(module) for _ in range(args.repeat))
+        heavy = eagerly_loaded(module)
+        ok = best <= budget and not heavy
+        failed |= not ok
+        report[module] = {"ms": round(best, 1), "budget_ms": budget, "eager_heavy_modules": heavy}
+        status = "ok" if ok else "FAIL"
+        print(f"{status:4} {module:<20} {best:8.1f} ms (budget {budget:.0f} ms) {' '.join(heavy)}")
+
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(report, indent=2))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
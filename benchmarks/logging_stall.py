@@ -0,0 +1,111 @@
+"""
+Event-loop stall caused by logging: handlers called inline from the loop (old
+setup_logging) vs. the QueueHandler/QueueListener pipeline. A ticker task
+sleeps 1 ms at a time and records how late it wakes up while "updates" log
+info lines and error tracebacks.
+
+    python benchmarks/logging_stall.py --updates 5000 --error-every 10 --disk-latency 2
+    python benchmarks/logging_stall.py --updates 5000 --rate 1000
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("BOT_TOKEN", "123456:" + "A" * 35)
+
+from app.utils import build_log_handlers, start_log_listener
+
+
+class SlowDisk(logging.Filter):
+    # Emulates a stalled disk: the handler sleeps before every write.
+    def __init__(self, seconds: float):
+        super().__init__()
+        self.seconds = seconds
+
+    def filter(self, record) -> bool:
+        time.sleep(self.seconds)
+        return True
+
+
+async def ticker(lags: list, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lags.append(time.perf_counter() - started - 0.001)
+
+
+async def workload(logger: logging.Logger, updates: int, error_every: int, rate: float) -> None:
+    started = time.perf_counter()
+    for i in range(updates):
+        if rate:
+            # Paced like real traffic instead of logging flat out.
+            await asyncio.sleep(max(0.0, started + i / rate - time.perf_counter()))
+        logger.info(f"update {i} handled")
+        if error_every and i % error_every == 0:
+            try:
+                raise ValueError(f"handler failed on update {i}")
+            except ValueError as e:
+                logger.error(f"An error occurred while processing the update: {e}", exc_info=True)
+        await asyncio.sleep(0)
+
+
+async def measure(mode: str, args: argparse.Namespace, root: str) -> dict:
+    logger = logging.getLogger(f"bench.{mode}")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    handlers = [handler for handler in build_log_handlers(root) if not type(handler) is logging.StreamHandler]
+    for handler in handlers:
+        if args.disk_latency:
+            handler.addFilter(SlowDisk(args.disk_latency / 1000))
+
+    listener = None
+    if mode == "queue":
+        listener = start_log_listener(logger, handlers)
+    else:
+        for handler in handlers:
+            logger.addHandler(handler)
+
+    lags, stop = [], asyncio.Event()
+    tick = asyncio.create_task(ticker(lags, stop))
+    started = time.perf_counter()
+    await workload(logger, args.updates, args.error_every, args.rate)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await tick
+
+    if listener:
+        listener.stop()
+    for handler in handlers:
+        handler.close()
+    lags.sort()
+    return {
+        "seconds": elapsed,
+        "lag_p50_ms": statistics.median(lags) * 1000,
+        "lag_p99_ms": lags[int(0.99 * (len(lags) - 1))] * 1000,
+        "lag_max_ms": lags[-1] * 1000,
+    }
+
+
+async def run(args: argparse.Namespace) -> None:
+    for mode in ("inline", "queue"):
+        with tempfile.TemporaryDirectory() as root:
+            result = await measure(mode, args, root)
+        print(f"{mode:<7} {args.updates / result['seconds']:9,.0f} updates/s  "
+              f"loop lag p50 {result['lag_p50_ms']:6.2f} ms  p99 {result['lag_p99_ms']:6.2f} ms  "
+              f"max {result['lag_max_ms']:7.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--updates", type=int, default=5_000)
+    parser.add_argument("--error-every", type=int, default=10, help="log a traceback every N updates, 0 to disable")
+    parser.add_argument("--rate", type=float, default=0.0, help="updates per second, 0 to log as fast as possible")
+    parser.add_argument("--disk-latency", type=float, default=0.0, help="emulated per-write stall, ms")
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,110 @@
+"""
+Accuracy and throughput of the SimHash near-duplicate index on a generated
+corpus: spam templates posted with small mutations across many chats, mixed
+with unique messages built from the same vocabulary.
+
+    python benchmarks/near_duplicates.py --templates 200 --copies 50 --ham 20000
+"""
+import argparse
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.fingerprint import DuplicateIndex, normalize_text, simhash
+
+VOCABULARY = [
+    "".join(random.Random(i).choices(string.ascii_lowercase, k=random.Random(-i).randint(2, 9)))
+    for i in range(5000)
+]
+NOISE = ["!!", "🔥", "👉", "...", "✅", "$$$", "💰", "??"]
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choices(VOCABULARY, k=words))
+
+
+def mutate(rng: random.Random, text: str) -> str:
+    words = text.split()
+    for _ in range(rng.randint(1, 3)):
+        action = rng.random()
+        position = rng.randrange(len(words))
+        if action < 0.3:
+            words.insert(position, rng.choice(NOISE))
+        elif action < 0.6:
+            word = words[position]
+            if len(word) > 2:
+                i = rng.randrange(len(word) - 1)
+                words[position] = word[:i] + word[i + 1] + word[i] + word[i + 2:]
+        elif action < 0.8:
+            words[position] = words[position].upper()
+        else:
+            words[position] = rng.choice(VOCABULARY)
+    return " ".join(words)
+
+
+def build_corpus(rng: random.Random, templates: int, copies: int, ham: int) -> list:
+    corpus = []
+    for template_id in range(templates):
+        template = sentence(rng, rng.randint(12, 40))
+        corpus.extend((mutate(rng, template), template_id, rng.randrange(1000)) for _ in range(copies))
+    corpus.extend((sentence(rng, rng.randint(8, 40)), None, rng.randrange(1000)) for _ in range(ham))
+    rng.shuffle(corpus)
+    return corpus
+
+
+def main(args) -> None:
+    rng = random.Random(args.seed)
+    corpus = build_corpus(rng, args.templates, args.copies, args.ham)
+    index = DuplicateIndex(window=float("inf"), max_entries=len(corpus) + 1)
+
+    owners = {}
+    seen_templates = set()
+    true_hits = wrong_hits = missed = ham_false_hits = 0
+    started = time.perf_counter()
+    for now, (text, template_id, chat_id) in enumerate(corpus):
+        before = len(index)
+        entry = index.observe(text, chat_id, now=float(now))
+        if entry is None:
+            continue
+        is_new = len(index) > before
+        if is_new:
+            owners[id(entry)] = template_id
+
+        if template_id is None:
+            ham_false_hits += not is_new
+        elif template_id in seen_templates:
+            if is_new:
+                missed += 1
+            elif owners.get(id(entry)) == template_id:
+                true_hits += 1
+            else:
+                wrong_hits += 1
+        seen_templates.add(template_id)
+    elapsed = time.perf_counter() - started
+
+    repeats = true_hits + wrong_hits + missed
+    print(f"{len(corpus):,} messages in {elapsed:.3f} s "
+          f"({len(corpus) / elapsed:,.0f} msg/s, {elapsed / len(corpus) * 1e6:.1f} us/msg)")
+    print(f"  recall on repeated spam   {true_hits / max(1, repeats):.2%} ({missed:,} missed, {wrong_hits:,} wrong template)")
+    print(f"  ham matched as duplicate  {ham_false_hits / max(1, args.ham):.3%}")
+    print(f"  index entries             {len(index):,}")
+
+    sample = [normalize_text(text) for text, _, _ in corpus[:10_000]]
+    started = time.perf_counter()
+    for text in sample:
+        simhash(text)
+    elapsed = time.perf_counter() - started
+    print(f"  simhash alone             {elapsed / len(sample) * 1e6:.1f} us/msg")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--templates", type=int, default=200)
+    parser.add_argument("--copies", type=int, default=50)
+    parser.add_argument("--ham", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=0)
+    main(parser.parse_args())
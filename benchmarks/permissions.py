@@ -0,0 +1,87 @@
+"""
+Memory and CPU of association privileges: JSON dict + pydantic + set-based
+role checks (old) vs. integer bitmask + precomputed role masks (new).
+
+    python benchmarks/permissions.py --count 1000000
+"""
+import argparse
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import constants
+from app.constants import UserPrivilege
+from app.schemas import TelegramUserPermissions
+from app.utils import check_admin_rights
+
+FIELDS = [privilege.name.lower() for privilege in UserPrivilege]
+ROLES = [constants.UserRole.MEMBER, constants.UserRole.ADMIN, constants.UserRole.OWNER]
+REQUIRED = [constants.Permission.KICK_MEMBER, constants.Permission.BAN_MEMBER]
+
+
+def legacy_check_admin_rights(role, required_rights=None, required_role=None) -> bool:
+    if not isinstance(role, constants.UserRole): role = constants.UserRole(role)
+    if not isinstance(required_role, list): required_role = [required_role]
+    if required_role and role not in required_role:
+        return False
+    if required_rights:
+        user_permissions = constants.ROLE_PERMISSIONS.get(role, [])
+        return set(required_rights).issubset(set(user_permissions))
+    return True
+
+
+def measure_memory(build) -> tuple:
+    gc.collect()
+    tracemalloc.start()
+    data = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return data, current
+
+
+def timed(name: str, count: int, func) -> float:
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    print(f"  {name:<32} {elapsed:8.3f} s  {elapsed / count * 1e9:8.1f} ns/op")
+    return elapsed
+
+
+def main(count: int, seed: int) -> None:
+    rng = random.Random(seed)
+    masks_source = [rng.getrandbits(len(FIELDS)) for _ in range(count)]
+
+    json_rows, json_bytes = measure_memory(
+        lambda: [{field: bool(mask >> i & 1) for i, field in enumerate(FIELDS)} for mask in masks_source]
+    )
+    mask_rows, mask_bytes = measure_memory(lambda: [int(mask) for mask in masks_source])
+    print(f"memory for {count:,} associations")
+    print(f"  JSON dicts    {json_bytes / 2**20:10.1f} MiB")
+    print(f"  int bitmasks  {mask_bytes / 2**20:10.1f} MiB")
+
+    roles = [rng.choice(ROLES) for _ in range(count)]
+    sample = min(count, 100_000)
+    print("cpu")
+    timed("pydantic privileges access", sample,
+          lambda: [TelegramUserPermissions(**row).can_pin_messages for row in json_rows[:sample]])
+    timed("bitmask privileges access", count,
+          lambda: [row & UserPrivilege.CAN_PIN_MESSAGES for row in mask_rows])
+    timed("set-based check_admin_rights", count,
+          lambda: [legacy_check_admin_rights(role, REQUIRED, [constants.UserRole.ADMIN, constants.UserRole.OWNER]) for role in roles])
+    required_mask = constants.permissions_mask(REQUIRED)
+    required_roles = frozenset([constants.UserRole.ADMIN, constants.UserRole.OWNER])
+    timed("mask-based check_admin_rights", count,
+          lambda: [check_admin_rights(role, required_mask, required_roles) for role in roles])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    main(args.count, args.seed)
@@ -0,0 +1,100 @@
+"""
+Replay a synthetic raid against the raid detector: quiet background traffic,
+then 1000 joins per minute with every joiner posting, then quiet again.
+Reports detection latency, joiners caught, false positives and per-event cost.
+
+    python benchmarks/raid_replay.py --raid-rate 1000 --raid-minutes 3
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.memory_cache import deep_sizeof
+from app.raid import RaidDetector
+
+RAID_CHAT = -100_000
+
+
+def poisson_times(rng: random.Random, rate_per_minute: float, start: float, end: float):
+    if rate_per_minute <= 0:
+        return
+    now = start
+    while True:
+        now += rng.expovariate(rate_per_minute / 60)
+        if now >= end:
+            return
+        yield now
+
+
+def build_events(rng: random.Random, args) -> list:
+    quiet_before = args.quiet_minutes * 60
+    raid_end = quiet_before + args.raid_minutes * 60
+    total = raid_end + args.quiet_minutes * 60
+    events = []
+
+    for chat in range(args.background_chats):
+        chat_id = RAID_CHAT - 1 - chat
+        events.extend((t, "join", chat_id, False) for t in poisson_times(rng, args.background_joins, 0, total))
+        events.extend((t, "message", chat_id, False) for t in poisson_times(rng, args.background_messages, 0, total))
+
+    events.extend((t, "join", RAID_CHAT, False) for t in poisson_times(rng, args.background_joins, 0, total))
+    events.extend((t, "message", RAID_CHAT, False) for t in poisson_times(rng, args.background_messages, 0, total))
+    for t in poisson_times(rng, args.raid_rate, quiet_before, raid_end):
+        events.append((t, "join", RAID_CHAT, True))
+        events.append((t + rng.uniform(1, 20), "message", RAID_CHAT, True))
+
+    events.sort()
+    return events, quiet_before
+
+
+def main(args) -> None:
+    rng = random.Random(args.seed)
+    events, raid_start = build_events(rng, args)
+    detector = RaidDetector()
+
+    detected_at = None
+    caught = missed = false_positives = 0
+    started = time.perf_counter()
+    for user_id, (now, kind, chat_id, hostile) in enumerate(events):
+        if kind == "join":
+            in_raid = detector.record_join(chat_id, user_id, now)
+        else:
+            in_raid = detector.record_message(chat_id, now)
+
+        if chat_id != RAID_CHAT:
+            false_positives += in_raid
+        elif hostile and kind == "join":
+            if in_raid:
+                caught += 1
+                detected_at = now if detected_at is None else detected_at
+            else:
+                missed += 1
+    elapsed = time.perf_counter() - started
+
+    print(f"{len(events):,} events over {len(detector.chats):,} chats in {elapsed:.3f} s "
+          f"({elapsed / len(events) * 1e9:.0f} ns/event)")
+    if detected_at is None:
+        print("raid not detected")
+    else:
+        print(f"raid detected {detected_at - raid_start:.1f} s after it started")
+    print(f"raid joiners restricted {caught:,}, let through {missed:,}")
+    print(f"false positives in background chats: {false_positives:,}")
+    activity = detector.chats.get(RAID_CHAT)
+    print(f"state per quiet chat ~{deep_sizeof(detector.chats.get(RAID_CHAT - 1)) if args.background_chats else 0} B, "
+          f"raid chat {deep_sizeof(activity) / 1024:.1f} KiB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--raid-rate", type=float, default=1000, help="joins per minute during the raid")
+    parser.add_argument("--raid-minutes", type=float, default=3)
+    parser.add_argument("--quiet-minutes", type=float, default=5)
+    parser.add_argument("--background-chats", type=int, default=1000)
+    parser.add_argument("--background-joins", type=float, default=2, help="joins per minute per chat")
+    parser.add_argument("--background-messages", type=float, default=30, help="messages per minute per chat")
+    parser.add_argument("--seed", type=int, default=0)
+    main(parser.parse_args())
@@ -0,0 +1,107 @@
+"""
+Coverage and throughput of the subword OOV fallback vs. the vocab-only
+toxicity path, on a synthetic vocabulary of stems with inflections. OOV
+tokens are unseen inflections and obfuscated spellings of known words.
+
+    python benchmarks/subword_oov.py --stems 5000 --messages 5000
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.bad_word import ToxicityModel
+from app.embeddings import EmbeddingStore
+from app.subword import SubwordTable
+
+SUFFIXES = ["", "а", "и", "ом", "ами", "ий", "ого", "ому", "ець", "ка", "ти", "ла", "ли"]
+LETTERS = "абвгдежзийклмнопрстуфхцчшщьюяії"
+
+
+def build_vocabulary(rng: random.Random, stems: int, dim: int):
+    np_rng = np.random.default_rng(rng.randrange(2**32))
+    stem_words = ["".join(rng.choices(LETTERS, k=rng.randint(4, 8))) for _ in range(stems)]
+    stem_vectors = np_rng.standard_normal((stems, dim)).astype(np.float32)
+    known, family, unseen = {}, {}, []
+    for stem, vector in zip(stem_words, stem_vectors):
+        suffixes = rng.sample(SUFFIXES, len(SUFFIXES))
+        for suffix in suffixes[:9]:
+            known[stem + suffix] = vector + 0.3 * np_rng.standard_normal(dim).astype(np.float32)
+            family[stem + suffix] = stem
+        unseen.extend((stem + suffix, stem) for suffix in suffixes[9:])
+    return stem_words, known, family, unseen
+
+
+def obfuscate(rng: random.Random, word: str) -> str:
+    i = rng.randrange(1, len(word))
+    return word[:i] + rng.choice(LETTERS + "ъ") + word[i:]
+
+
+def main(args) -> None:
+    rng = random.Random(args.seed)
+    stem_words, known, family, unseen = build_vocabulary(rng, args.stems, args.dim)
+    first_word = {}
+    for word, stem in family.items():
+        first_word.setdefault(stem, word)
+    key_to_index = {word: i for i, word in enumerate(known)}
+    vectors = np.stack(list(known.values()))
+    store = EmbeddingStore(key_to_index, vectors)
+
+    toxic_stems = rng.sample(stem_words, min(200, len(stem_words)))
+    toxic = {stem: known[first_word[stem]] for stem in toxic_stems}
+
+    started = time.perf_counter()
+    subwords = SubwordTable.build(key_to_index, vectors, args.buckets)
+    print(f"vocabulary {len(known):,} words, subword table {args.buckets:,} buckets "
+          f"({subwords.nbytes / 2**20:.1f} MiB) built in {time.perf_counter() - started:.2f} s")
+
+    oov = [(word, stem) for word, stem in unseen] + [(obfuscate(rng, w), s) for w, s in rng.sample(list(family.items()), 2000)]
+    vocabulary = list(known)
+    messages = []
+    for _ in range(args.messages):
+        words = rng.choices(vocabulary, k=rng.randint(5, 15))
+        words += [word for word, _ in rng.sample(oov, rng.randint(0, 3))]
+        rng.shuffle(words)
+        messages.append(words)
+    tokens = sum(len(words) for words in messages)
+
+    def run(model: ToxicityModel) -> tuple:
+        covered = 0
+        started = time.perf_counter()
+        for words in messages:
+            for word in words:
+                covered += model.best_match(word) is not None
+        return time.perf_counter() - started, covered
+
+    vocab_only = ToxicityModel(store, toxic, 0.7)
+    elapsed, covered = run(vocab_only)
+    print(f"  vocab only          {tokens / elapsed:10,.0f} tokens/s  coverage {covered / tokens:.1%}")
+
+    with_fallback = ToxicityModel(store, toxic, 0.7)
+    with_fallback.subwords = subwords
+    for label in ("subword, cold cache", "subword, warm cache"):
+        elapsed, covered = run(with_fallback)
+        print(f"  {label:<19} {tokens / elapsed:10,.0f} tokens/s  coverage {covered / tokens:.1%}")
+
+    similarities = []
+    for word, stem in oov[:2000]:
+        query = with_fallback._oov_query(word)
+        if query is not None:
+            similarities.append(float(store.score(query, store.encode(known[first_word[stem]][None]))[0]))
+    print(f"  OOV vectors vs. their family: mean cosine {np.mean(similarities):.3f} "
+          f"over {len(similarities):,} of {min(2000, len(oov)):,} OOV tokens")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stems", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=100)
+    parser.add_argument("--buckets", type=int, default=100_000)
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    main(parser.parse_args())
@@ -0,0 +1,87 @@
+"""
+Recall@1 and per-word latency of the IVF index over toxic embeddings
+against brute force, on a synthetic lexicon of inflected word families.
+The last part of the lexicon is added incrementally after the build.
+
+    python benchmarks/toxic_ann.py --lexicon 50000 --dim 100 --queries 2000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.ann import IVFIndex
+from app.embeddings import normalize_rows
+
+
+def synthetic_lexicon(rng: np.random.Generator, size: int, dim: int, families: int) -> np.ndarray:
+    roots = rng.standard_normal((families, dim)).astype(np.float32)
+    members = roots[rng.integers(0, families, size)]
+    return normalize_rows(members + 0.35 * rng.standard_normal((size, dim)).astype(np.float32))
+
+
+def queries_for(rng: np.random.Generator, lexicon: np.ndarray, count: int) -> np.ndarray:
+    near = lexicon[rng.integers(0, len(lexicon), count // 2)]
+    near = near + 0.25 / np.sqrt(lexicon.shape[1]) * rng.standard_normal(near.shape).astype(np.float32)
+    far = rng.standard_normal((count - len(near), lexicon.shape[1])).astype(np.float32)
+    return normalize_rows(np.concatenate([near, far]))
+
+
+def brute_force(lexicon: np.ndarray, queries: np.ndarray) -> tuple:
+    started = time.perf_counter()
+    best = np.array([int((lexicon @ query).argmax()) for query in queries])
+    return best, (time.perf_counter() - started) / len(queries)
+
+
+def approximate(index: IVFIndex, lexicon: np.ndarray, queries: np.ndarray) -> tuple:
+    best = np.empty(len(queries), dtype=np.int64)
+    started = time.perf_counter()
+    for i, query in enumerate(queries):
+        rows = index.candidates(query)
+        best[i] = rows[(lexicon[rows] @ query).argmax()] if len(rows) else -1
+    return best, (time.perf_counter() - started) / len(queries)
+
+
+def main(args) -> None:
+    rng = np.random.default_rng(args.seed)
+    lexicon = synthetic_lexicon(rng, args.lexicon, args.dim, max(1, args.lexicon // 20))
+    initial = int(len(lexicon) * (1 - args.added))
+
+    started = time.perf_counter()
+    index = IVFIndex.build(lexicon[:initial], nprobe=args.nprobe[0], seed=args.seed)
+    build_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    index.add(lexicon[initial:], initial)
+    add_seconds = time.perf_counter() - started
+    print(f"lexicon {len(lexicon):,} x {args.dim}: build {build_seconds:.2f} s on {initial:,} rows "
+          f"({len(index.lists)} lists), incremental add of {len(lexicon) - initial:,} rows {add_seconds * 1000:.1f} ms")
+
+    queries = queries_for(rng, lexicon, args.queries)
+    added_queries = queries_for(rng, lexicon[initial:], args.queries) if initial < len(lexicon) else queries
+    exact, exact_latency = brute_force(lexicon, queries)
+    exact_added, _ = brute_force(lexicon, added_queries)
+    print(f"  brute force      {exact_latency * 1e6:8.1f} us/word")
+
+    for nprobe in args.nprobe:
+        index.nprobe = min(nprobe, len(index.lists))
+        found, latency = approximate(index, lexicon, queries)
+        found_added, _ = approximate(index, lexicon, added_queries)
+        near = len(queries) // 2
+        print(f"  ivf nprobe={nprobe:<4} {latency * 1e6:8.1f} us/word  speedup x{exact_latency / latency:5.1f}  "
+              f"recall@1 near {np.mean(found[:near] == exact[:near]):.3f}  far {np.mean(found[near:] == exact[near:]):.3f}  "
+              f"added rows {np.mean(found_added[:near] == exact_added[:near]):.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lexicon", type=int, default=50_000)
+    parser.add_argument("--dim", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--added", type=float, default=0.1, help="fraction of the lexicon added after the build")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--seed", type=int, default=0)
+    main(parser.parse_args())
@@ -0,0 +1,106 @@
+"""
+Compare the float32 and int8 toxicity models on a labelled sample: verdict
+divergence, similarity error, accuracy against labels, throughput and RSS.
+Each representation is loaded in its own subprocess so RSS is not shared.
+
+    python benchmarks/toxicity_quantization.py --sample labelled.jsonl
+
+The sample is JSON lines with "text" and "label" (1 = toxic, 0 = clean).
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+MODES = ("float32", "int8")
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except FileNotFoundError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def load_sample(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def measure(model_path: str, quantization: str, sample_path: str) -> dict:
+    import gc
+    from app import bad_word
+
+    texts = [row["text"] for row in load_sample(sample_path)]
+    baseline = rss_bytes()
+    model = bad_word.load_toxicity_model(model_path, quantization)
+    bad_word._get_cached_model = lambda: model
+    gc.collect()
+    loaded = rss_bytes()
+
+    started = time.perf_counter()
+    results = [bad_word.is_toxic_message(text) for text in texts]
+    elapsed = time.perf_counter() - started
+    return {
+        "rss": loaded - baseline,
+        "store_bytes": model.store.nbytes,
+        "seconds": elapsed,
+        "verdicts": [bool(is_toxic) for is_toxic, _, _ in results],
+        "similarities": [similarity for _, similarity, _ in results],
+    }
+
+
+def run_mode(model_path: str, quantization: str, sample_path: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, __file__, "--measure", quantization, "--model", model_path, "--sample", sample_path],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def accuracy(verdicts: list, labels: list) -> str:
+    tp = sum(v and l for v, l in zip(verdicts, labels))
+    fp = sum(v and not l for v, l in zip(verdicts, labels))
+    fn = sum(l and not v for v, l in zip(verdicts, labels))
+    precision = tp / max(1, tp + fp)
+    recall = tp / max(1, tp + fn)
+    return f"precision {precision:.3f}  recall {recall:.3f}"
+
+
+def main(args) -> None:
+    labels = [bool(row["label"]) for row in load_sample(args.sample)]
+    results = {mode: run_mode(args.model, mode, args.sample) for mode in MODES}
+    reference, quantized = results["float32"], results["int8"]
+
+    print(f"{len(labels):,} labelled messages")
+    for mode, result in results.items():
+        print(f"  {mode:<8} RSS +{result['rss'] / 2**20:8.1f} MiB  store {result['store_bytes'] / 2**20:8.1f} MiB  "
+              f"{len(labels) / result['seconds']:10,.0f} msg/s  {accuracy(result['verdicts'], labels)}")
+
+    flipped = sum(a != b for a, b in zip(reference["verdicts"], quantized["verdicts"]))
+    errors = [abs(a - b) for a, b in zip(reference["similarities"], quantized["similarities"])]
+    print(f"verdicts flipped by int8: {flipped:,} ({flipped / max(1, len(labels)):.3%})")
+    print(f"similarity error: mean {sum(errors) / max(1, len(errors)):.5f}, max {max(errors, default=0):.5f}")
+    print(f"RSS reduction: {(reference['rss'] - quantized['rss']) / 2**20:.1f} MiB, "
+          f"throughput x{reference['seconds'] / max(quantized['seconds'], 1e-9):.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sample", required=True)
+    parser.add_argument("--model", default="./app/data/toxic_detector_improved_03.pkl")
+    parser.add_argument("--measure", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.measure:
+        print(json.dumps(measure(args.model, args.measure, args.sample)))
+    else:
+        main(args)
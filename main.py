@@ -1,53 +1,40 @@
 import asyncio
-from app.bad_word import _get_cached_model
-from app.database import close_engine
-from app.utils import get_logger
-from app.bot import bot, dp, Bot, types
-from app.utils import stop_telethon_client
+import signal
+import sys
+from app.utils import get_logger, setup_logging
 logger = get_logger()
 
-async def set_private_commands(bot: Bot):
-    commands = [
-        types.BotCommand(command="start", description="Почати"),
-        types.BotCommand(command="help", description="Допомога"),
-        types.BotCommand(command="cat_gif", description="Гіфка котика"),
-        types.BotCommand(command="my_chats", description="Налаштування чатів"),
-    ]
-    await bot.set_my_commands(commands, scope=types.BotCommandScopeAllPrivateChats())
-
-async def set_admin_commands(bot: Bot):
-    commands = [
-        types.BotCommand(command="mute", description="Видати мут ({час} {причина})"),
-        types.BotCommand(command="unmute", description="Зняти мут"),
-        types.BotCommand(command="warn", description="Видати попередження ({причина})"),
-        types.BotCommand(command="unwarn", description="Зняти попередження"),
-        types.BotCommand(command="ban", description="Видати бан ({час} {причина})"),
-        types.BotCommand(command="unban", description="Зняти бан"),
-        types.BotCommand(command="start", description="Почати"),
-        types.BotCommand(command="help", description="Допомога"),
-    ]
-    await bot.set_my_commands(commands, scope=types.BotCommandScopeAllChatAdministrators())
-
-async def set_chats_commands(bot: Bot):
-    commands = [
-        types.BotCommand(command="start", description="Почати"),
-        types.BotCommand(command="help", description="Допомога"),
-        types.BotCommand(command="cat_gif", description="Гіфка котика"),
-    ]
-    await bot.set_my_commands(commands, scope=types.BotCommandScopeAllGroupChats())
-
-
-async def setup_bot_commands(bot: Bot):
-    await set_private_commands(bot)
-    await set_admin_commands(bot)
-    await set_chats_commands(bot)
-
 
 async def main() -> None:
+    from app.bot import bot, dp
+    from app.startup import COMMAND_SCOPES, warm_up
+    from app.database import close_engine
+    from app.utils import stop_telethon_client
+    from app.cat_gifs import cat_gif_buffer
+    from app.http_client import close_http_session
+    from app.raid import raid_actions
+    from app.moderation import moderation_pipeline
+    from app.bad_word import toxicity_registry
+    from app.config import METRICS_HOST, METRICS_PORT
+    from app.metrics import serve_metrics
+    from app.database import get_engine
+    from app.telemetry import setup_metrics
+    from app.tracing import setup_tracing, trace_exporter
+    metrics_server = None
     try:
         logger.info('Starting bot...')
-        _get_cached_model()
-        await setup_bot_commands(bot)
+        setup_metrics(dp, bot, get_engine())
+        setup_tracing(dp, bot, get_engine())
+        await warm_up(bot, COMMAND_SCOPES)
+        toxicity_registry.start()
+        try:
+            metrics_server = await serve_metrics(METRICS_HOST, METRICS_PORT)
+        except OSError as e:
+            logger.warning(f'Metrics endpoint disabled, cannot listen on {METRICS_HOST}:{METRICS_PORT}: {e}')
+        if metrics_server:
+            logger.info(f'Serving metrics on http://{METRICS_HOST}:{METRICS_PORT}/metrics')
+        if hasattr(signal, "SIGHUP"):
+            asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, toxicity_registry.request_reload)
         await dp.start_polling(bot)
         
     except asyncio.CancelledError:
@@ -57,11 +44,65 @@ async def main() -> None:
     finally:
         logger.info('Stopping bot...')
         logger.info('Bot stopped successfully.')
+        for stage, summary in moderation_pipeline.summary().items():
+            logger.info(f"Moderation stage '{stage}': {summary}")
+        if metrics_server:
+            metrics_server.close()
+        await asyncio.to_thread(trace_exporter.close)
+        await toxicity_registry.close()
+        await raid_actions.close()
         await close_engine()
         await stop_telethon_client()
+        await cat_gif_buffer.close()
+        await close_http_session()
         logger.info('Database connection closed.')
 
+async def health_check() -> int:
+    from sqlalchemy import text
+    from app.database import close_engine, get_engine
+    try:
+        async with get_engine().connect() as connection:
+            await connection.execute(text("SELECT 1"))
+        print("ok")
+        return 0
+    except Exception as e:
+        print(f"unhealthy: {e}")
+        return 1
+    finally:
+        await close_engine()
+
+def build_toxic_index() -> int:
+    import pickle
+    from app.bad_word import build_toxic_index
+    from app.config import TOXIC_INDEX_PATH, TOXIC_MODEL_PATH
+    with open(TOXIC_MODEL_PATH, 'rb') as f:
+        toxic_embeddings = pickle.load(f)['toxic_embeddings']
+    index = build_toxic_index(toxic_embeddings, TOXIC_INDEX_PATH)
+    print(f"indexed {len(index)} toxic words into {len(index.lists)} lists: {TOXIC_INDEX_PATH}")
+    return 0
+
+def build_subword_table() -> int:
+    import pickle
+    from app.bad_word import build_subword_table
+    from app.config import SUBWORD_TABLE_PATH, TOXIC_MODEL_PATH
+    with open(TOXIC_MODEL_PATH, 'rb') as f:
+        keyed_vectors = pickle.load(f)['model'].wv
+    table = build_subword_table(keyed_vectors, SUBWORD_TABLE_PATH)
+    print(f"built {table.buckets} subword buckets ({table.nbytes / 2**20:.1f} MiB): {SUBWORD_TABLE_PATH}")
+    return 0
+
 if __name__ == "__main__":
+    if sys.argv[1:] == ["health"]:
+        sys.exit(asyncio.run(health_check()))
+    if sys.argv[1:] == ["build-toxic-index"]:
+        sys.exit(build_toxic_index())
+    if sys.argv[1:] == ["build-subword-table"]:
+        sys.exit(build_subword_table())
+    if sys.argv[1:2] == ["rescore"]:
+        from app.rescore import main as rescore
+        sys.exit(rescore(sys.argv[2:]))
+
+    setup_logging()
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
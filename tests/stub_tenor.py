@@ -0,0 +1,53 @@
+"""
+Local stand-in for the Tenor search API.
+
+Serves Tenor-shaped JSON on localhost with a configurable artificial delay
+and status, so the /cat_gif path can be exercised without network access.
+Used by the tests and by benchmarks/cat_gif_latency.py:
+
+    async with StubTenorServer(delay=0.05) as server:
+        os.environ["TENOR_API_URL"] = server.url
+        server.status = 500  # every following search fails
+"""
+import asyncio
+from aiohttp import web
+
+
+class StubTenorServer:
+    def __init__(self, delay: float = 0.0, status: int = 200, host: str = "127.0.0.1", port: int = 0):
+        self.delay = delay
+        self.status = status
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self._runner = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1/search"
+
+    async def _search(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.status != 200:
+            return web.json_response({"error": "stub failure"}, status=self.status)
+        limit = int(request.query.get("limit", 20))
+        results = [
+            {"media": [{"gif": {"url": f"https://media.example/cat-{self.requests}-{i}.gif"}}]}
+            for i in range(limit)
+        ]
+        return web.json_response({"results": results})
+
+    async def __aenter__(self) -> "StubTenorServer":
+        app = web.Application()
+        app.router.add_get("/v1/search", self._search)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self._runner.cleanup()
@@ -0,0 +1,73 @@
+import asyncio
+import time
+import pytest
+from app import cat_gifs
+from app.cat_gifs import cat_gif_buffer
+from app.http_client import close_http_session
+from stub_tenor import StubTenorServer
+
+
+@pytest.fixture(autouse=True)
+def empty_buffer():
+    cat_gif_buffer._urls.clear()
+    yield
+    cat_gif_buffer._urls.clear()
+
+
+async def _with_stub(monkeypatch, scenario, **stub):
+    async with StubTenorServer(**stub) as server:
+        monkeypatch.setattr(cat_gifs, "TENOR_API_URL", server.url)
+        try:
+            await scenario(server)
+        finally:
+            await cat_gif_buffer.close()
+            await close_http_session()
+
+
+def test_get_serves_buffer_while_slow_refill_runs(monkeypatch):
+    delay = 0.3
+
+    async def scenario(server):
+        # An empty buffer has to wait for the upstream once.
+        started = time.perf_counter()
+        assert await cat_gif_buffer.get() is not None
+        assert time.perf_counter() - started >= delay
+        assert server.requests == 1
+
+        # Draining down to the threshold starts a single background refill;
+        # the calls after it are served from the buffer without waiting.
+        while len(cat_gif_buffer) > cat_gif_buffer.refill_threshold:
+            await cat_gif_buffer.get()
+        started = time.perf_counter()
+        for _ in range(cat_gif_buffer.refill_threshold):
+            assert await cat_gif_buffer.get() is not None
+        assert time.perf_counter() - started < delay
+
+        await cat_gif_buffer._refill_task
+        assert server.requests == 2
+        assert len(cat_gif_buffer) == cat_gif_buffer.size
+
+    asyncio.run(_with_stub(monkeypatch, scenario, delay=delay))
+
+
+def test_failed_upstream_leaves_buffer_empty(monkeypatch):
+    async def scenario(server):
+        assert await cat_gif_buffer.refill() == 0
+        assert await cat_gif_buffer.get() is None
+        assert len(cat_gif_buffer) == 0
+
+        # Once the upstream recovers the next call refills as usual.
+        server.status = 200
+        assert await cat_gif_buffer.get() is not None
+        assert server.requests == 3
+
+    asyncio.run(_with_stub(monkeypatch, scenario, status=500))
+
+
+def test_unreachable_upstream_is_not_raised(monkeypatch):
+    async def scenario(server):
+        await server.__aexit__(None, None, None)
+        assert await cat_gif_buffer.refill() == 0
+        assert await cat_gif_buffer.get() is None
+
+    asyncio.run(_with_stub(monkeypatch, scenario))